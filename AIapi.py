@@ -4,29 +4,190 @@ Provides intelligent insights and responses using HuggingFace API
 """
 
 import os
-from openai import OpenAI
-from typing import Optional, Dict, Any
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from datetime import date
+from openai import OpenAI, AsyncOpenAI
+from typing import Optional, Dict, Any, Coroutine, Iterator, List
 import json
 from dotenv import load_dotenv
+from llm_cache import LLMCache, get_default_cache
+from llm_calls import CallLayer, estimate_tokens, get_default_call_layer
+from llm_router import Backend, LLMRouter, get_default_router
+from telemetry import record, span, usage_fields
 
 load_dotenv()
 
+# EV_LLM_BASE_URL / EV_LLM_MODEL point the assistant at another OpenAI-compatible
+# endpoint, e.g. the local mock_llm_server.py for load tests; EV_LLM_BACKENDS
+# configures several endpoints for llm_router to choose from
+DEFAULT_BASE_URL = os.getenv("EV_LLM_BASE_URL", "https://router.huggingface.co/v1")
+DEFAULT_MODEL = os.getenv("EV_LLM_MODEL", "deepseek-ai/DeepSeek-V3.2-Exp:novita")
 
-class EVAIAssistant:
-    """AI Assistant for Electric Vehicle insights and recommendations"""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the AI assistant with HuggingFace API"""
-        self.api_key = os.getenv("HF_TOK")                  
-        self.client = OpenAI(
-            base_url="https://router.huggingface.co/v1",
-            api_key=self.api_key,
-        )
-        self.model = "deepseek-ai/DeepSeek-V3.2-Exp:novita"
-    
-    def get_vehicle_recommendation(self, vehicle_info: Dict[str, Any], predicted_range: float) -> str:
-        """Get AI recommendation for a specific vehicle"""
-        prompt = f"""You are an expert electric vehicle consultant. Provide a professional recommendation for this vehicle.
+# One client (and therefore one keep-alive connection pool) per process for
+# sync calls, and one per event loop for async calls. The SDK's own retries
+# are off because llm_calls.CallLayer retries with rate limiting and backoff
+_client_lock = threading.Lock()
+_sync_clients: Dict[tuple, OpenAI] = {}
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_shared_client(api_key: Optional[str] = None, base_url: str = DEFAULT_BASE_URL) -> OpenAI:
+    """Return the process-wide sync client for this endpoint and key"""
+    key = (base_url, api_key)
+    with _client_lock:
+        if key not in _sync_clients:
+            _sync_clients[key] = OpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+        return _sync_clients[key]
+
+
+def get_shared_async_client(api_key: Optional[str] = None, base_url: str = DEFAULT_BASE_URL) -> AsyncOpenAI:
+    """Return the async client shared by every coroutine on the running event loop"""
+    loop = asyncio.get_running_loop()
+    key = (base_url, api_key)
+    with _client_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+        return clients[key]
+
+
+class _BackgroundLoop:
+    """Event loop in a daemon thread, so sync callers such as Streamlit can run
+    coroutines while the pooled async client stays bound to a single loop"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro: Coroutine) -> Future:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="ev-ai-loop", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+
+_background_loop = _BackgroundLoop()
+
+
+def submit_async(coro: Coroutine) -> Future:
+    """Schedule a coroutine on the shared background loop and return its future"""
+    return _background_loop.submit(coro)
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared background loop and wait for its result"""
+    return submit_async(coro).result(timeout)
+
+
+def vehicle_age(vehicle_info: Dict[str, Any]) -> int:
+    """Age of a vehicle in years from its model year"""
+    try:
+        return max(0, date.today().year - int(vehicle_info.get('Model Year')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _request_kwargs(model: str, prompt: str, max_tokens: int, temperature: Optional[float]) -> Dict[str, Any]:
+    kwargs = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+    }
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    return kwargs
+
+
+def _resolve_router(api_key: Optional[str], base_url: Optional[str], model: Optional[str],
+                    router: Optional[LLMRouter]) -> LLMRouter:
+    """The given router; a single backend when an endpoint, model or key is passed; else the shared router"""
+    if router is not None:
+        return router
+    if api_key is None and base_url is None and model is None:
+        return get_default_router(DEFAULT_BASE_URL, DEFAULT_MODEL)
+    return LLMRouter.single(base_url or DEFAULT_BASE_URL, model or DEFAULT_MODEL, api_key)
+
+
+def _route(router: LLMRouter, operation: str, send, record_latency: bool = True):
+    """Run ``send(backend, model)`` on the fastest healthy backend, failing over to the next one on errors
+
+    Returns ``(backend, model, result)``. Failures are charged through
+    ``router.record_failure`` (rate limiting does not count against a
+    backend's health); when every candidate fails the last error is raised.
+    Streams pass ``record_latency=False`` and report the backend's outcome
+    themselves once the stream is consumed.
+    """
+    error: Optional[Exception] = None
+    for backend in router.candidates():
+        model = backend.model_for(operation)
+        start = time.perf_counter()
+        try:
+            result = send(backend, model)
+        except Exception as e:
+            router.record_failure(backend, e)
+            error = e
+            continue
+        if record_latency:
+            backend.record_success(time.perf_counter() - start)
+        return backend, model, result
+    raise error
+
+
+async def _route_async(router: LLMRouter, operation: str, send):
+    """Async counterpart of :func:`_route` (``send`` returns an awaitable)"""
+    error: Optional[Exception] = None
+    for backend in router.candidates():
+        model = backend.model_for(operation)
+        start = time.perf_counter()
+        try:
+            result = await send(backend, model)
+        except Exception as e:
+            router.record_failure(backend, e)
+            error = e
+            continue
+        backend.record_success(time.perf_counter() - start)
+        return backend, model, result
+    raise error
+
+
+def _routed_key(key: str, expected_model: str, model: str, prompt: str, max_tokens: int,
+                temperature: Optional[float]) -> str:
+    """Cache key for a reply: ``key`` unless fail-over sent the call to a different model"""
+    return key if model == expected_model else LLMCache.make_key(model, prompt, max_tokens, temperature)
+
+
+def _telemetry_fields(model: str, key: str, prompt: str) -> Dict[str, Any]:
+    """Request fields logged with every LLM call; the cache key groups identical prompts"""
+    return {"model": model, "prompt_key": key[:16], "prompt": prompt[:200], "cache_hit": False}
+
+
+# PROMPTS (shared by the sync and async assistants)
+def build_insight_prompt(vehicle_info: Dict[str, Any], predicted_range: float) -> str:
+    """The app's headline insight about a range prediction (also precomputed by warmup.py)"""
+    return f"""You are an expert electric vehicle consultant. Provide a brief, professional insight about this vehicle's range prediction.
+
+Vehicle Details:
+- Make: {vehicle_info.get('Make', 'Unknown')}
+- Model: {vehicle_info.get('Model', 'Unknown')}
+- Year: {vehicle_info.get('Model Year', 'Unknown')}
+- Type: {vehicle_info.get('Electric Vehicle Type', 'Unknown')}
+- Price: ${vehicle_info.get('Base MSRP', 0):,.0f}
+- Predicted Range: {predicted_range:.1f} miles
+
+Provide a 2-3 sentence professional insight about:
+1. Whether this range is competitive for this vehicle class
+2. Real-world usage recommendations
+Keep it concise and user-friendly."""
+
+
+def _recommendation_prompt(vehicle_info: Dict[str, Any], predicted_range: float) -> str:
+    return f"""You are an expert electric vehicle consultant. Provide a professional recommendation for this vehicle.
 
 Vehicle Details:
 - Make: {vehicle_info.get('Make', 'Unknown')}
@@ -42,20 +203,9 @@ Provide a 2-3 sentence professional insight about:
 2. Best use cases and real-world recommendations
 Keep it concise, professional, and user-friendly."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=250,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Unable to generate AI insights: {str(e)[:100]}"
-    
-    def get_maintenance_tips(self, vehicle_type: str, age: int) -> str:
-        """Get maintenance and care tips for the vehicle"""
-        prompt = f"""You are an EV maintenance expert. Provide maintenance tips for a {age}-year-old {vehicle_type}.
+
+def _maintenance_prompt(vehicle_type: str, age: int) -> str:
+    return f"""You are an EV maintenance expert. Provide maintenance tips for a {age}-year-old {vehicle_type}.
 
 Provide 3-4 key maintenance points in bullet format for:
 - Battery health management
@@ -63,19 +213,9 @@ Provide 3-4 key maintenance points in bullet format for:
 - Seasonal care
 Keep it practical and actionable."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Unable to generate maintenance tips: {str(e)[:100]}"
-    
-    def get_charging_strategy(self, predicted_range: float, daily_commute: float) -> str:
-        """Get optimal charging strategy based on range and usage"""
-        prompt = f"""You are an EV charging expert. Provide optimal charging strategy for a vehicle with {predicted_range:.0f} miles range and {daily_commute:.0f} miles daily commute.
+
+def _charging_prompt(predicted_range: float, daily_commute: float) -> str:
+    return f"""You are an EV charging expert. Provide optimal charging strategy for a vehicle with {predicted_range:.0f} miles range and {daily_commute:.0f} miles daily commute.
 
 Provide practical recommendations for:
 1. Charging frequency
@@ -83,39 +223,40 @@ Provide practical recommendations for:
 3. Home vs public charging strategy
 Keep it concise and actionable."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Unable to generate charging strategy: {str(e)[:100]}"
-    
-    def answer_ev_question(self, question: str) -> str:
-        """Answer general EV-related questions"""
-        prompt = f"""You are an expert electric vehicle consultant with deep knowledge about EVs, charging, batteries, and sustainability.
-        
+
+def _question_prompt(question: str, context: Optional[str] = None) -> str:
+    # context is the conversation so far from chat_store.ChatSession.context()
+    context_section = f"\nConversation so far:\n{context}\n" if context else ""
+    return f"""You are an expert electric vehicle consultant with deep knowledge about EVs, charging, batteries, and sustainability.
+{context_section}
 User Question: {question}
 
 Provide a helpful, accurate, and professional response. Keep it concise (2-3 sentences) and practical."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Unable to answer question: {str(e)[:100]}"
-    
-    def compare_vehicles(self, vehicle1_info: Dict, vehicle1_range: float, 
-                        vehicle2_info: Dict, vehicle2_range: float) -> str:
-        """Compare two vehicles based on their specifications and ranges"""
-        prompt = f"""Compare these two electric vehicles as an expert consultant:
+
+def _lookup_similar(*vehicles: Dict) -> List[Dict]:
+    """Real vehicles close to any of ``vehicles`` from the similar-vehicles index; empty when unavailable"""
+    try:
+        from similar_vehicles import get_default_similar_index  # heavy (sklearn); only loaded for comparisons
+        index = get_default_similar_index()
+        return index.query_many(vehicles) if index is not None else []
+    except Exception as e:
+        record("similar", "lookup", error=f"{type(e).__name__}: {str(e)[:100]}")
+        return []
+
+
+def _comparison_prompt(vehicle1_info: Dict, vehicle1_range: float,
+                       vehicle2_info: Dict, vehicle2_range: float,
+                       similar_vehicles: Optional[List[Dict]] = None) -> str:
+    """Comparison prompt, grounded in real registered vehicles when ``similar_vehicles`` is non-empty"""
+    reference = ""
+    if similar_vehicles:
+        from similar_vehicles import format_similar  # only needed when grounding is requested
+        reference = f"""
+
+Comparable real vehicles from registration data:
+{format_similar(similar_vehicles)}"""
+    return f"""Compare these two electric vehicles as an expert consultant:
 
 Vehicle 1:
 - Make/Model: {vehicle1_info.get('Make')} {vehicle1_info.get('Model')}
@@ -129,29 +270,374 @@ Vehicle 2:
 - Year: {vehicle2_info.get('Model Year')}
 - Type: {vehicle2_info.get('Electric Vehicle Type')}
 - Price: ${vehicle2_info.get('Base MSRP', 0):,.0f}
-- Predicted Range: {vehicle2_range:.0f} miles
+- Predicted Range: {vehicle2_range:.0f} miles{reference}
 
 Provide a brief, professional comparison highlighting key differences and which might be better for different use cases."""
 
+
+class EVAIAssistant:
+    """AI Assistant for Electric Vehicle insights and recommendations"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, cache: Optional[LLMCache] = None, use_cache: bool = True,
+                 call_layer: Optional[CallLayer] = None, router: Optional[LLMRouter] = None):
+        """Initialize the AI assistant
+
+        Calls go through ``router`` (by default the process-wide one from
+        llm_router); passing ``api_key``, ``base_url`` or ``model`` instead
+        pins the assistant to that single endpoint. Replies are cached under
+        the model that produced them.
+        """
+        self.router = _resolve_router(api_key, base_url, model, router)
+        self.model = model or self.router.primary.model
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self.calls = call_layer or get_default_call_layer()
+        # Timing records of recent streamed calls (time to first token and total)
+        self.stream_history = deque(maxlen=200)
+
+    def _request(self, backend: Backend, model: str, prompt: str, max_tokens: int,
+                 temperature: Optional[float], stream: bool = False) -> Any:
+        """One request to ``backend`` through the call layer (rate limit, retries, timeout, hedging)"""
+        client = get_shared_client(backend.api_key, backend.base_url)
+        kwargs = _request_kwargs(model, prompt, max_tokens, temperature)
+        if stream:
+            kwargs["stream"] = True
+        return self.calls.call(lambda timeout: client.chat.completions.create(timeout=timeout, **kwargs),
+                               tokens=estimate_tokens(prompt, max_tokens), hedge=not stream)
+
+    def complete(self, prompt: str, max_tokens: int, temperature: Optional[float] = None,
+                 operation: str = "complete") -> str:
+        """Send a single-message chat completion and return the reply text
+
+        Replies are served from and stored in the persistent LLM cache;
+        requests go to the router's fastest healthy backend (using its model
+        for ``operation``) through the shared call layer (rate limit, retries,
+        timeout, hedging). Exceptions propagate and are never cached. Each
+        call is logged to telemetry under ``operation``.
+        """
+        expected_model = self.router.preferred().model_for(operation)
+        key = LLMCache.make_key(expected_model, prompt, max_tokens, temperature)
+        with span("llm", operation, **_telemetry_fields(expected_model, key, prompt)) as event:
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    event["cache_hit"] = True
+                    return cached
+
+            backend, model, response = _route(
+                self.router, operation,
+                lambda backend, model: self._request(backend, model, prompt, max_tokens, temperature))
+            event.update(backend=backend.name, model=model, **usage_fields(response.usage))
+            content = response.choices[0].message.content
+            if self.cache is not None:
+                self.cache.put(_routed_key(key, expected_model, model, prompt, max_tokens, temperature), content)
+            return content
+
+    def stream_complete(self, prompt: str, max_tokens: int, temperature: Optional[float] = None,
+                        error_prefix: str = "Unable to generate response",
+                        stats: Optional[Dict[str, Any]] = None,
+                        operation: str = "stream_complete") -> Iterator[str]:
+        """Stream a chat completion, yielding text deltas as they arrive
+
+        Cached replies are yielded in one piece. Time to first token and total
+        time are written into ``stats`` (if given) and ``stream_history``.
+        Errors are yielded as text like the non-streaming methods return them,
+        and only fully streamed replies are cached.
+        """
+        stats = stats if stats is not None else {}
+        stats.update(ttft_s=None, total_s=None, chars=0, cached=False, error=None)
+        start = time.perf_counter()
+        expected_model = self.router.preferred().model_for(operation)
+        key = LLMCache.make_key(expected_model, prompt, max_tokens, temperature)
+        parts = []
+        usage = None
+        backend = model = None
+        streaming = False
+        try:
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                stats["cached"] = True
+                parts.append(cached)
+                stats["ttft_s"] = time.perf_counter() - start
+                yield cached
+            else:
+                # Rate limit, retries and fail-over apply until the stream
+                # opens; a half-consumed stream cannot be hedged or replayed
+                backend, model, stream = _route(
+                    self.router, operation,
+                    lambda backend, model: self._request(backend, model, prompt, max_tokens, temperature,
+                                                         stream=True),
+                    record_latency=False)
+                streaming = True
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if stats["ttft_s"] is None:
+                        stats["ttft_s"] = time.perf_counter() - start
+                    parts.append(delta)
+                    yield delta
+                streaming = False
+                backend.record_success(time.perf_counter() - start)
+                if self.cache is not None:
+                    self.cache.put(_routed_key(key, expected_model, model, prompt, max_tokens, temperature),
+                                   "".join(parts))
+        except Exception as e:
+            if streaming:
+                streaming = False
+                self.router.record_failure(backend, e)
+            stats["error"] = str(e)[:100]
+            yield f"{' ' if parts else ''}{error_prefix}: {str(e)[:100]}"
+        finally:
+            stats["total_s"] = time.perf_counter() - start
+            if streaming:  # the caller stopped reading early; the backend itself was fine
+                backend.record_success(stats["total_s"])
+            stats["chars"] = sum(len(part) for part in parts)
+            self.stream_history.append(dict(stats))
+            event = _telemetry_fields(expected_model, key, prompt)
+            event.update(cache_hit=stats["cached"], error=stats["error"], wall_ms=stats["total_s"] * 1000,
+                         ttft_ms=None if stats["ttft_s"] is None else stats["ttft_s"] * 1000)
+            if backend is not None:
+                event.update(backend=backend.name, model=model)
+            if usage is not None:
+                event.update(usage_fields(usage))
+            elif not stats["cached"] and parts:
+                # Most servers only report usage for streams when asked; estimate ~4 characters per token
+                event.update(prompt_tokens=len(prompt) // 4, completion_tokens=stats["chars"] // 4,
+                             tokens_estimated=True)
+                event["total_tokens"] = event["prompt_tokens"] + event["completion_tokens"]
+            record("llm", operation, **event)
+
+    def get_vehicle_recommendation(self, vehicle_info: Dict[str, Any], predicted_range: float) -> str:
+        """Get AI recommendation for a specific vehicle"""
+        try:
+            return self.complete(_recommendation_prompt(vehicle_info, predicted_range),
+                                 max_tokens=250, temperature=0.7, operation="get_vehicle_recommendation")
+        except Exception as e:
+            return f"Unable to generate AI insights: {str(e)[:100]}"
+
+    def get_maintenance_tips(self, vehicle_type: str, age: int) -> str:
+        """Get maintenance and care tips for the vehicle"""
+        try:
+            return self.complete(_maintenance_prompt(vehicle_type, age), max_tokens=200,
+                                 operation="get_maintenance_tips")
+        except Exception as e:
+            return f"Unable to generate maintenance tips: {str(e)[:100]}"
+
+    def get_charging_strategy(self, predicted_range: float, daily_commute: float) -> str:
+        """Get optimal charging strategy based on range and usage"""
+        try:
+            return self.complete(_charging_prompt(predicted_range, daily_commute), max_tokens=200,
+                                 operation="get_charging_strategy")
+        except Exception as e:
+            return f"Unable to generate charging strategy: {str(e)[:100]}"
+
+    def answer_ev_question(self, question: str, context: Optional[str] = None) -> str:
+        """Answer general EV-related questions, following up on ``context`` when given"""
+        try:
+            return self.complete(_question_prompt(question, context), max_tokens=300, temperature=0.7,
+                                 operation="answer_ev_question")
+        except Exception as e:
+            return f"Unable to answer question: {str(e)[:100]}"
+
+    def compare_vehicles(self, vehicle1_info: Dict, vehicle1_range: float,
+                        vehicle2_info: Dict, vehicle2_range: float,
+                        similar_vehicles: Optional[List[Dict]] = None) -> str:
+        """Compare two vehicles based on their specifications and ranges
+
+        The prompt is grounded in ``similar_vehicles``; when None they are
+        looked up in the similar-vehicles index (pass ``[]`` to skip that).
+        """
+        try:
+            if similar_vehicles is None:
+                similar_vehicles = _lookup_similar(vehicle1_info, vehicle2_info)
+            return self.complete(_comparison_prompt(vehicle1_info, vehicle1_range, vehicle2_info,
+                                                    vehicle2_range, similar_vehicles), max_tokens=300,
+                                 operation="compare_vehicles")
+        except Exception as e:
+            return f"Unable to compare vehicles: {str(e)[:100]}"
+
+    def stream_vehicle_recommendation(self, vehicle_info: Dict[str, Any], predicted_range: float,
+                                      stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Streaming variant of get_vehicle_recommendation"""
+        return self.stream_complete(_recommendation_prompt(vehicle_info, predicted_range), max_tokens=250,
+                                    temperature=0.7, error_prefix="Unable to generate AI insights", stats=stats,
+                                    operation="stream_vehicle_recommendation")
+
+    def stream_maintenance_tips(self, vehicle_type: str, age: int,
+                                stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Streaming variant of get_maintenance_tips"""
+        return self.stream_complete(_maintenance_prompt(vehicle_type, age), max_tokens=200,
+                                    error_prefix="Unable to generate maintenance tips", stats=stats,
+                                    operation="stream_maintenance_tips")
+
+    def stream_charging_strategy(self, predicted_range: float, daily_commute: float,
+                                 stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Streaming variant of get_charging_strategy"""
+        return self.stream_complete(_charging_prompt(predicted_range, daily_commute), max_tokens=200,
+                                    error_prefix="Unable to generate charging strategy", stats=stats,
+                                    operation="stream_charging_strategy")
+
+    def stream_ev_answer(self, question: str, stats: Optional[Dict[str, Any]] = None,
+                         context: Optional[str] = None) -> Iterator[str]:
+        """Streaming variant of answer_ev_question"""
+        return self.stream_complete(_question_prompt(question, context), max_tokens=300, temperature=0.7,
+                                    error_prefix="Unable to answer question", stats=stats,
+                                    operation="stream_ev_answer")
+
+    def stream_vehicle_comparison(self, vehicle1_info: Dict, vehicle1_range: float,
+                                  vehicle2_info: Dict, vehicle2_range: float,
+                                  stats: Optional[Dict[str, Any]] = None,
+                                  similar_vehicles: Optional[List[Dict]] = None) -> Iterator[str]:
+        """Streaming variant of compare_vehicles"""
+        if similar_vehicles is None:
+            similar_vehicles = _lookup_similar(vehicle1_info, vehicle2_info)
+        return self.stream_complete(_comparison_prompt(vehicle1_info, vehicle1_range, vehicle2_info,
+                                                       vehicle2_range, similar_vehicles), max_tokens=300,
+                                    error_prefix="Unable to compare vehicles", stats=stats,
+                                    operation="stream_vehicle_comparison")
+
+    def get_ownership_insights(self, vehicle_info: Dict[str, Any], predicted_range: float,
+                               daily_commute: float) -> Dict[str, str]:
+        """Recommendation, maintenance tips and charging strategy fetched concurrently"""
+        assistant = AsyncEVAIAssistant(model=self.model, cache=self.cache, use_cache=self.cache is not None,
+                                       call_layer=self.calls, router=self.router)
+        return run_async(assistant.get_ownership_insights(vehicle_info, predicted_range, daily_commute))
+
+
+class AsyncEVAIAssistant:
+    """Async variant of EVAIAssistant built on a shared, pooled AsyncOpenAI client"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 model: Optional[str] = None, cache: Optional[LLMCache] = None, use_cache: bool = True,
+                 call_layer: Optional[CallLayer] = None, router: Optional[LLMRouter] = None):
+        self.router = _resolve_router(api_key, base_url, model, router)
+        self.model = model or self.router.primary.model
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self.calls = call_layer or get_default_call_layer()
+
+    async def _request(self, backend: Backend, model: str, prompt: str, max_tokens: int,
+                       temperature: Optional[float]) -> Any:
+        client = get_shared_async_client(backend.api_key, backend.base_url)
+        kwargs = _request_kwargs(model, prompt, max_tokens, temperature)
+        return await self.calls.acall(lambda timeout: client.chat.completions.create(timeout=timeout, **kwargs),
+                                      tokens=estimate_tokens(prompt, max_tokens))
+
+    async def complete(self, prompt: str, max_tokens: int, temperature: Optional[float] = None,
+                       operation: str = "complete") -> str:
+        """Send a single-message chat completion and return the reply text (cached like the sync one)"""
+        expected_model = self.router.preferred().model_for(operation)
+        key = LLMCache.make_key(expected_model, prompt, max_tokens, temperature)
+        with span("llm", operation, **_telemetry_fields(expected_model, key, prompt)) as event:
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    event["cache_hit"] = True
+                    return cached
+
+            backend, model, response = await _route_async(
+                self.router, operation,
+                lambda backend, model: self._request(backend, model, prompt, max_tokens, temperature))
+            event.update(backend=backend.name, model=model, **usage_fields(response.usage))
+            content = response.choices[0].message.content
+            if self.cache is not None:
+                self.cache.put(_routed_key(key, expected_model, model, prompt, max_tokens, temperature), content)
+            return content
+
+    async def get_vehicle_recommendation(self, vehicle_info: Dict[str, Any], predicted_range: float) -> str:
+        """Get AI recommendation for a specific vehicle"""
+        try:
+            return await self.complete(_recommendation_prompt(vehicle_info, predicted_range),
+                                       max_tokens=250, temperature=0.7, operation="get_vehicle_recommendation")
+        except Exception as e:
+            return f"Unable to generate AI insights: {str(e)[:100]}"
+
+    async def get_maintenance_tips(self, vehicle_type: str, age: int) -> str:
+        """Get maintenance and care tips for the vehicle"""
+        try:
+            return await self.complete(_maintenance_prompt(vehicle_type, age), max_tokens=200,
+                                       operation="get_maintenance_tips")
+        except Exception as e:
+            return f"Unable to generate maintenance tips: {str(e)[:100]}"
+
+    async def get_charging_strategy(self, predicted_range: float, daily_commute: float) -> str:
+        """Get optimal charging strategy based on range and usage"""
+        try:
+            return await self.complete(_charging_prompt(predicted_range, daily_commute), max_tokens=200,
+                                       operation="get_charging_strategy")
+        except Exception as e:
+            return f"Unable to generate charging strategy: {str(e)[:100]}"
+
+    async def answer_ev_question(self, question: str, context: Optional[str] = None) -> str:
+        """Answer general EV-related questions, following up on ``context`` when given"""
+        try:
+            return await self.complete(_question_prompt(question, context), max_tokens=300, temperature=0.7,
+                                       operation="answer_ev_question")
+        except Exception as e:
+            return f"Unable to answer question: {str(e)[:100]}"
+
+    async def compare_vehicles(self, vehicle1_info: Dict, vehicle1_range: float,
+                               vehicle2_info: Dict, vehicle2_range: float,
+                               similar_vehicles: Optional[List[Dict]] = None) -> str:
+        """Compare two vehicles based on their specifications and ranges (see EVAIAssistant)"""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-            )
-            return response.choices[0].message.content
+            if similar_vehicles is None:
+                similar_vehicles = await asyncio.to_thread(_lookup_similar, vehicle1_info, vehicle2_info)
+            return await self.complete(_comparison_prompt(vehicle1_info, vehicle1_range, vehicle2_info,
+                                                          vehicle2_range, similar_vehicles), max_tokens=300,
+                                       operation="compare_vehicles")
         except Exception as e:
             return f"Unable to compare vehicles: {str(e)[:100]}"
 
+    async def precompute_insights(self, vehicle_info: Dict[str, Any], predicted_range: float,
+                                  daily_commute: float) -> Dict[str, str]:
+        """Headline insight plus the ownership guide, with the live calls' exact requests
+
+        Unlike the methods above, errors propagate instead of coming back as
+        text, so callers never store a failure as a precomputed answer.
+        """
+        insight, recommendation, maintenance_tips, charging_strategy = await asyncio.gather(
+            self.complete(build_insight_prompt(vehicle_info, predicted_range), max_tokens=200,
+                          operation="precompute_insight"),
+            self.complete(_recommendation_prompt(vehicle_info, predicted_range), max_tokens=250,
+                          temperature=0.7, operation="precompute_recommendation"),
+            self.complete(_maintenance_prompt(vehicle_info.get('Electric Vehicle Type', 'EV'),
+                                              vehicle_age(vehicle_info)), max_tokens=200,
+                          operation="precompute_maintenance_tips"),
+            self.complete(_charging_prompt(predicted_range, daily_commute), max_tokens=200,
+                          operation="precompute_charging_strategy"),
+        )
+        return {
+            "insight": insight,
+            "recommendation": recommendation,
+            "maintenance_tips": maintenance_tips,
+            "charging_strategy": charging_strategy,
+        }
+
+    async def get_ownership_insights(self, vehicle_info: Dict[str, Any], predicted_range: float,
+                                     daily_commute: float) -> Dict[str, str]:
+        """Run recommendation, maintenance tips and charging strategy concurrently"""
+        recommendation, maintenance_tips, charging_strategy = await asyncio.gather(
+            self.get_vehicle_recommendation(vehicle_info, predicted_range),
+            self.get_maintenance_tips(vehicle_info.get('Electric Vehicle Type', 'EV'), vehicle_age(vehicle_info)),
+            self.get_charging_strategy(predicted_range, daily_commute),
+        )
+        return {
+            "recommendation": recommendation,
+            "maintenance_tips": maintenance_tips,
+            "charging_strategy": charging_strategy,
+        }
+
 
 # Demo usage
 if __name__ == "__main__":
     print("🚀 EV AI Assistant Demo\n")
     print("=" * 60)
-    
+
     # Initialize assistant
     assistant = EVAIAssistant()
-    
+
     # Demo 1: Get vehicle recommendation
     print("\n1️⃣ VEHICLE RECOMMENDATION")
     print("-" * 60)
@@ -166,19 +652,19 @@ if __name__ == "__main__":
     recommendation = assistant.get_vehicle_recommendation(vehicle_info, 358.5)
     print(f"Vehicle: {vehicle_info['Make']} {vehicle_info['Model']}")
     print(f"Recommendation: {recommendation}\n")
-    
+
     # Demo 2: Get maintenance tips
     print("\n2️⃣ MAINTENANCE TIPS")
     print("-" * 60)
     tips = assistant.get_maintenance_tips("BEV", 2)
     print(f"Maintenance Tips:\n{tips}\n")
-    
+
     # Demo 3: Get charging strategy
     print("\n3️⃣ CHARGING STRATEGY")
     print("-" * 60)
     strategy = assistant.get_charging_strategy(358.5, 50)
     print(f"Charging Strategy:\n{strategy}\n")
-    
+
     # Demo 4: Answer general question
     print("\n4️⃣ EV QUESTION ANSWERING")
     print("-" * 60)
@@ -186,6 +672,13 @@ if __name__ == "__main__":
     answer = assistant.answer_ev_question(question)
     print(f"Q: {question}")
     print(f"A: {answer}\n")
-    
+
+    # Demo 5: Concurrent ownership insights (async client)
+    print("\n5️⃣ CONCURRENT OWNERSHIP INSIGHTS")
+    print("-" * 60)
+    insights = assistant.get_ownership_insights(vehicle_info, 358.5, 50)
+    for name, text in insights.items():
+        print(f"{name}:\n{text}\n")
+
     print("=" * 60)
     print("✅ Demo completed successfully!")
@@ -0,0 +1,138 @@
+"""
+Batch Prediction Module for EV Range Predictor
+Scores a whole fleet file (CSV or Parquet) in chunks with the trained pipeline
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import pandas as pd
+
+from ev_model import FEATURES, MODEL_PATH, load_model, normalize_frame
+from telemetry import span
+
+PREDICTION_COLUMN = "Predicted Range"
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _detect_format(source: Union[str, Path, Any], fmt: Optional[str] = None) -> str:
+    """Work out whether a source is CSV or Parquet from its name"""
+    if fmt:
+        return fmt.lower()
+    name = str(getattr(source, "name", source)).lower()
+    return "parquet" if name.endswith((".parquet", ".pq")) else "csv"
+
+
+def iter_chunks(source: Union[str, Path, Any], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                fmt: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Yield the input file as DataFrames of at most ``chunk_size`` rows"""
+    if _detect_format(source, fmt) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size, low_memory=False)
+
+
+class _ChunkWriter:
+    """Appends prediction chunks to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, destination: Union[str, Path], fmt: str):
+        self.destination = Path(destination)
+        self.fmt = fmt
+        self._parquet_writer = None
+        self._schema = None
+        self._started = False
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._schema = table.schema
+                self._parquet_writer = pq.ParquetWriter(self.destination, self._schema)
+            else:
+                # Later chunks are cast to the first chunk's schema so that
+                # type inference drift between chunks cannot break the file
+                table = pa.Table.from_pandas(chunk, schema=self._schema,
+                                             preserve_index=False, safe=False)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.destination, mode="a" if self._started else "w",
+                         header=not self._started, index=False)
+        self._started = True
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+def predict_file(source: Union[str, Path, Any], destination: Union[str, Path], model=None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, input_format: Optional[str] = None,
+                 output_format: Optional[str] = None) -> Dict[str, Any]:
+    """Predict the range for every row of ``source`` and write the results to ``destination``
+
+    The file is streamed in chunks of ``chunk_size`` rows: each chunk is
+    normalized like the app's single-row input (``normalize_frame``),
+    predicted with one vectorized ``model.predict`` call and appended to the
+    output straight away, so memory use depends on the chunk size only.
+    The output keeps the input values as they were. The run is logged as
+    one ``predict_file`` telemetry event.
+    """
+    if model is None:
+        model = load_model()
+
+    writer = _ChunkWriter(destination, _detect_format(destination, output_format))
+    rows = 0
+    chunks = 0
+    start = time.perf_counter()
+    with span("predict", "predict_file", chunk_size=chunk_size) as event:
+        try:
+            for chunk in iter_chunks(source, chunk_size, input_format):
+                missing = [col for col in FEATURES if col not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Input file is missing required columns: {', '.join(missing)}")
+
+                chunk[PREDICTION_COLUMN] = model.predict(normalize_frame(chunk))
+                writer.write(chunk)
+                rows += len(chunk)
+                chunks += 1
+        finally:
+            writer.close()
+            event.update(rows=rows, chunks=chunks)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+        "output": str(destination),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Batch EV range prediction for fleet files")
+    parser.add_argument("input", help="Input CSV or Parquet file with the vehicle population schema")
+    parser.add_argument("output", help="Output CSV or Parquet file (format taken from the extension)")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows predicted per chunk")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    summary = predict_file(args.input, args.output, model=model, chunk_size=args.chunk_size)
+    print(f"✅ Scored {summary['rows']:,} rows in {summary['chunks']} chunks "
+          f"({summary['seconds']:.2f}s, {summary['rows_per_second']:,.0f} rows/s)")
+    print(f"→ Predictions: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
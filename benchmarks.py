@@ -0,0 +1,307 @@
+"""
+Benchmarks Module for EV Range Predictor
+Speed benchmarks for prediction, model loading, the cleaning pipeline and the
+AI assistant, saved as JSON per commit and compared against a baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ev_model import FEATURES, MODEL_PATH, load_model
+
+RESULTS_DIR = Path(".benchmarks")
+SUITES = ("predict", "load", "cleaning", "assistant")
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+# Batch size at which predict_with_interval's cost is tracked relative to model.predict
+INTERVAL_RATIO_BATCH = 20_000
+DEFAULT_THRESHOLD = 0.2
+
+
+def time_call(fn: Callable[[], Any], min_time: float = 0.5, max_repeats: int = 50) -> Dict[str, float]:
+    """Median and best wall time of ``fn`` over repeats adding up to roughly ``min_time`` seconds
+
+    The first call is a warm-up (imports, caches, page faults); when it alone
+    takes longer than ``min_time`` it is reported as is instead of repeated.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    if first >= min_time:
+        return {"median_s": first, "min_s": first, "repeats": 1}
+    timings: List[float] = []
+    while len(timings) < max_repeats and (len(timings) < 3 or sum(timings) < min_time):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {"median_s": float(np.median(timings)), "min_s": float(min(timings)), "repeats": len(timings)}
+
+
+def sample_rows(model, n: int, seed: int = 0) -> pd.DataFrame:
+    """``n`` model-ready rows drawn from the categories and numeric ranges the model was trained on"""
+    from vocabulary import encoder_categories
+
+    rng = np.random.default_rng(seed)
+    categories = encoder_categories(model)
+    frame = pd.DataFrame({
+        "Model Year": rng.integers(2011, 2025, n),
+        "Base MSRP": np.where(rng.random(n) < 0.9, 0.0, rng.choice([31950.0, 46990.0, 69900.0], n)),
+    })
+    for column, values in categories.items():
+        frame[column] = rng.choice(np.asarray(values, dtype=object), n)
+    return frame[FEATURES]
+
+
+def bench_predict(model_path: Union[str, Path] = MODEL_PATH,
+                  batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES) -> Dict[str, Dict[str, Any]]:
+    """``model.predict``, the compiled engine and ``predict_with_interval`` at each batch size,
+    plus the interval's cost as a multiple of ``model.predict`` at ``INTERVAL_RATIO_BATCH`` rows"""
+    from fast_inference import CompiledForest, predict_with_interval
+
+    model = load_model(model_path)
+    engine = CompiledForest.from_pipeline(model)
+    results = {}
+    for batch_size in batch_sizes:
+        frame = sample_rows(model, batch_size)
+        rows = frame.to_dict("records")
+        variants = (("sklearn", lambda: model.predict(frame)), ("compiled", lambda: engine.predict(rows)),
+                    ("interval", lambda: predict_with_interval(model, frame, engine=engine)))
+        for name, fn in variants:
+            timing = time_call(fn)
+            results[f"predict.{name}.batch_{batch_size}"] = {
+                "value": timing["median_s"] * 1000, "unit": "ms",
+                "rows_per_s": batch_size / timing["median_s"], "repeats": timing["repeats"],
+            }
+    frame = sample_rows(model, INTERVAL_RATIO_BATCH)
+    point_s = time_call(lambda: model.predict(frame))["median_s"]
+    interval_s = time_call(lambda: predict_with_interval(model, frame, engine=engine))["median_s"]
+    results[f"predict.interval_ratio.batch_{INTERVAL_RATIO_BATCH}"] = {"value": interval_s / point_s, "unit": "x"}
+    return results
+
+
+def bench_load(model_path: Union[str, Path] = MODEL_PATH) -> Dict[str, Dict[str, Any]]:
+    """Load time and resident memory of the pipeline and compiled artifacts, each in a fresh interpreter"""
+    from compact_model import measure_load
+    from fast_inference import CompiledForest
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_path = Path(tmp) / "compiled.joblib"
+        CompiledForest.from_pipeline(load_model(model_path)).save(compiled_path)
+        for kind, path in (("pipeline", Path(model_path)), ("compiled", compiled_path)):
+            measured = measure_load(kind, path)
+            results[f"load.{kind}.seconds"] = {"value": measured["load_s"], "unit": "s",
+                                               "size_mb": path.stat().st_size / 1e6}
+            if measured["rss_mb"] is not None:
+                results[f"load.{kind}.rss"] = {"value": measured["rss_mb"], "unit": "MB"}
+    return results
+
+
+def synthetic_raw_data(n: int, seed: int = 0, duplicate_fraction: float = 0.05) -> pd.DataFrame:
+    """Raw rows with the Electric_Vehicle_Population_Data schema the notebook cleans
+
+    Includes what the cleaning has to handle: duplicate rows, missing ranges
+    and counties, and Make spellings that differ in case and whitespace.
+    """
+    rng = np.random.default_rng(seed)
+    makes = {"TESLA": ["MODEL 3", "MODEL Y", "MODEL S"], "NISSAN": ["LEAF", "ARIYA"],
+             "CHEVROLET": ["BOLT EV", "VOLT"], "KIA": ["NIRO", "EV6"], "FORD": ["MUSTANG MACH-E"],
+             "HYUNDAI": ["KONA ELECTRIC", "IONIQ 5"], "TOYOTA": ["RAV4 PRIME"], "BMW": ["I3", "X5"]}
+    make = rng.choice(list(makes), n)
+    model_index = rng.integers(0, 3, n)
+    model = [makes[m][i % len(makes[m])] for m, i in zip(make, model_index)]
+    year = rng.integers(2011, 2025, n)
+    ev_type = rng.choice(["Battery Electric Vehicle (BEV)", "Plug-in Hybrid Electric Vehicle (PHEV)"], n,
+                         p=[.75, .25])
+    battery = np.char.startswith(ev_type.astype(str), "Battery")
+    electric_range = np.where(battery, 80 + (year - 2011) * 15 + rng.integers(0, 40, n),
+                              20 + rng.integers(0, 30, n)).astype(float)
+    electric_range[rng.random(n) < 0.01] = np.nan
+    frame = pd.DataFrame({
+        "VIN (1-10)": [f"5YJ3E1EA{i % 100:02d}" for i in range(n)],
+        "County": rng.choice(np.array(["King", "Pierce", "Snohomish", None], dtype=object), n,
+                             p=[.5, .2, .29, .01]),
+        "City": rng.choice(["Seattle", "Tacoma", "Everett"], n),
+        "State": rng.choice(["WA", "CA", "OR", "TX"], n, p=[.94, .03, .02, .01]),
+        "Postal Code": rng.choice([98101.0, 98402.0, 98201.0], n),
+        "Model Year": year.astype(float),
+        "Make": [f" {m.lower()}" if flip else m.title() for m, flip in zip(make, rng.random(n) < 0.05)],
+        "Model": model,
+        "Electric Vehicle Type": ev_type,
+        "Clean Alternative Fuel Vehicle (CAFV) Eligibility": "Clean Alternative Fuel Vehicle Eligible",
+        "Electric Range": electric_range,
+        "Base MSRP": np.where(rng.random(n) < 0.9, 0.0, rng.choice([31950.0, 46990.0, 69900.0], n)),
+        "Legislative District": rng.integers(1, 49, n).astype(float),
+        "DOL Vehicle ID": rng.integers(1, 10**9, n).astype(float),
+        "Vehicle Location": "POINT (-122.3 47.6)",
+        "Electric Utility": rng.choice(["PUGET SOUND ENERGY INC", "CITY OF SEATTLE - (WA)"], n),
+        "2020 Census Tract": rng.choice([53033000100.0, 53053000200.0], n),
+    })
+    duplicates = frame.sample(frac=duplicate_fraction, random_state=seed)
+    return pd.concat([frame, duplicates], ignore_index=True)
+
+
+def bench_cleaning(rows: int = 200_000, chunk_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """Rows per second through data_pipeline.clean_dataset on a synthetic raw CSV"""
+    from data_pipeline import DEFAULT_CHUNK_SIZE, clean_dataset
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, destination = Path(tmp) / "raw.csv", Path(tmp) / "clean.parquet"
+        synthetic_raw_data(rows).to_csv(source, index=False)
+        summary = clean_dataset(source, destination, chunk_size or DEFAULT_CHUNK_SIZE)
+    return {
+        "cleaning.rows_per_s": {"value": summary["rows_per_second"], "unit": "rows/s", "higher_is_better": True,
+                                "rows": summary["rows"], "seconds": summary["seconds"]},
+    }
+
+
+def bench_assistant(calls: int = 200) -> Dict[str, Dict[str, Any]]:
+    """Per-call cost of EVAIAssistant on top of a bare client call to an instant local mock endpoint
+
+    The mock answers with no latency, so the difference is the assistant's
+    own work: cache key, rate limiter, retries wrapper, telemetry.
+    """
+    from AIapi import EVAIAssistant, _request_kwargs, get_shared_client
+    from llm_cache import LLMCache
+    from llm_calls import CallLayer
+    from mock_llm_server import MockConfig, MockLLMServer
+
+    server = MockLLMServer(MockConfig(latency_ms=0.0, latency_dist="fixed", tokens_per_second=1e9,
+                                      completion_tokens=20, seed=0)).start()
+    try:
+        client = get_shared_client("mock", server.base_url)
+        layer = CallLayer(requests_per_minute=1e9, tokens_per_minute=1e12, max_attempts=1)
+        prompt = "What is the difference between BEV and PHEV?"
+        kwargs = _request_kwargs("mock", prompt, 50, None)
+
+        def per_call(fn: Callable[[], Any]) -> float:
+            fn()
+            start = time.perf_counter()
+            for _ in range(calls):
+                fn()
+            return (time.perf_counter() - start) / calls * 1000
+
+        bare_ms = per_call(lambda: client.chat.completions.create(**kwargs))
+        live = EVAIAssistant("mock", server.base_url, model="mock", use_cache=False, call_layer=layer)
+        live_ms = per_call(lambda: live.complete(prompt, max_tokens=50))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LLMCache(Path(tmp) / "bench.sqlite3")
+            cached = EVAIAssistant("mock", server.base_url, model="mock", cache=cache, call_layer=layer)
+            cached_ms = per_call(lambda: cached.complete(prompt, max_tokens=50))
+    finally:
+        server.stop()
+    return {
+        "assistant.bare_client": {"value": bare_ms, "unit": "ms"},
+        "assistant.complete": {"value": live_ms, "unit": "ms"},
+        "assistant.overhead": {"value": live_ms - bare_ms, "unit": "ms"},
+        "assistant.cached": {"value": cached_ms, "unit": "ms"},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    import sklearn
+
+    return {"python": platform.python_version(), "sklearn": sklearn.__version__, "numpy": np.__version__,
+            "pandas": pd.__version__, "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def run_benchmarks(suites: Sequence[str] = SUITES, model_path: Union[str, Path] = MODEL_PATH,
+                   batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES, cleaning_rows: int = 200_000,
+                   assistant_calls: int = 200) -> Dict[str, Any]:
+    runners = {
+        "predict": lambda: bench_predict(model_path, batch_sizes),
+        "load": lambda: bench_load(model_path),
+        "cleaning": lambda: bench_cleaning(cleaning_rows),
+        "assistant": lambda: bench_assistant(assistant_calls),
+    }
+    results: Dict[str, Dict[str, Any]] = {}
+    for suite in suites:
+        start = time.perf_counter()
+        results.update(runners[suite]())
+        print(f"✅ {suite} ({time.perf_counter() - start:.1f}s)")
+    return {"commit": git_commit(), "created_at": time.time(), "environment": environment(),
+            "benchmarks": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Relative change of every benchmark present in both runs, flagged when worse by more than ``threshold``"""
+    rows = []
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or not before["value"]:
+            continue
+        change = result["value"] / before["value"] - 1
+        worse = -change if result.get("higher_is_better") else change
+        rows.append({"name": name, "baseline": before["value"], "current": result["value"],
+                     "unit": result["unit"], "change": change, "regression": worse > threshold})
+    return rows
+
+
+def _parse_sizes(text: str) -> List[int]:
+    return [int(float(size)) for size in text.split(",")]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the speed benchmarks and compare against a baseline")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma separated: {','.join(SUITES)}")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)),
+                        help="Comma separated predict batch sizes")
+    parser.add_argument("--cleaning-rows", type=int, default=200_000, help="Synthetic raw rows to clean")
+    parser.add_argument("--assistant-calls", type=int, default=200, help="Calls per assistant benchmark")
+    parser.add_argument("--output", help=f"Results JSON (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    # Benchmark traffic should not end up in the app's request log. telemetry reads this when it is
+    # first imported, which happens in the suites (via AIapi, batch_predict, ...), so it is still in time
+    os.environ.setdefault("EV_TELEMETRY_LOG", str(Path(tempfile.gettempdir()) / "ev_benchmarks_telemetry.jsonl"))
+    results = run_benchmarks(args.suites.split(","), args.model, _parse_sizes(args.batch_sizes),
+                             args.cleaning_rows, args.assistant_calls)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{(results['commit'] or 'local')[:12]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n{'benchmark':<36} {'value':>12} {'unit':<7}")
+    for name, result in results["benchmarks"].items():
+        print(f"{name:<36} {result['value']:>12,.3f} {result['unit']:<7}")
+    print(f"→ Results: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            rows = compare(results, json.load(f), args.threshold)
+        print(f"\n{'benchmark':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+        for row in rows:
+            flag = "  ⚠️ regression" if row["regression"] else ""
+            print(f"{row['name']:<36} {row['baseline']:>12,.3f} {row['current']:>12,.3f} "
+                  f"{row['change'] * 100:>+7.1f}%{flag}")
+        regressions = sum(row["regression"] for row in rows)
+        if regressions:
+            print(f"⚠️ {regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+            raise SystemExit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Chat Store Module for EV Range Predictor
+Bounded chat history (older turns spilled to disk) and the token-budgeted
+conversation context sent with each question to the assistant
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from llm_calls import estimate_tokens
+
+# EV_CHAT_DIR moves the spilled transcripts (one JSON-lines file per session)
+DEFAULT_CHAT_DIR = Path(os.getenv("EV_CHAT_DIR", ".cache/chat"))
+DEFAULT_MAX_TURNS = 40
+DEFAULT_CONTEXT_TOKENS = 600
+DEFAULT_RENDER_TURNS = 10
+# Share of the context budget reserved for the summary of older turns
+SUMMARY_SHARE = 0.25
+SUMMARY_CHARS = 100
+MAX_SUMMARY_ITEMS = 50
+SUMMARY_HEADER = "Earlier the user asked about:"
+WINDOW_HEADER = "Recent conversation:"
+
+
+def count_tokens(text: str) -> int:
+    """Same ~4 characters per token estimate the call layer budgets with"""
+    return estimate_tokens(text, 0) + 1
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def describe_prediction(vehicle_info: Dict[str, Any], predicted_range: float) -> str:
+    """One line describing the last predicted vehicle, e.g. for the assistant's prompt"""
+    line = (f"{vehicle_info.get('Model Year', '')} {vehicle_info.get('Make', '')} {vehicle_info.get('Model', '')} "
+            f"({vehicle_info.get('Electric Vehicle Type', '')}, {vehicle_info.get('State', '')}")
+    if vehicle_info.get("Base MSRP"):
+        line += f", MSRP ${float(vehicle_info['Base MSRP']):,.0f}"
+    return " ".join(line.split()) + f"), predicted range {predicted_range:.0f} miles"
+
+
+class ChatSession:
+    """One conversation with the assistant, bounded in memory and in prompt size
+
+    Only the newest ``max_turns`` turns stay in memory; older turns are
+    appended to ``<directory>/<session_id>.jsonl`` and kept as one short
+    line each (the user's question) for the summary. :meth:`context` builds
+    what is sent with the next question: the last prediction, a summary of
+    older questions and as many recent turns as fit in ``context_tokens``.
+    """
+
+    def __init__(self, session_id: Optional[str] = None, directory: Union[str, Path] = DEFAULT_CHAT_DIR,
+                 max_turns: int = DEFAULT_MAX_TURNS, context_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.directory = Path(directory)
+        self.max_turns = max_turns
+        self.context_tokens = context_tokens
+        self.turns: Deque[Dict[str, Any]] = deque()
+        self.spilled = 0
+        self.last_prediction: Optional[Dict[str, Any]] = None
+        self._older_questions: Deque[str] = deque(maxlen=MAX_SUMMARY_ITEMS)
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.session_id}.jsonl"
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.turns)
+
+    def add(self, role: str, content: str) -> None:
+        """Append a turn ("user" or "assistant"), spilling the oldest ones past ``max_turns``"""
+        self.turns.append({"role": role, "content": content, "ts": time.time()})
+        if len(self.turns) > self.max_turns:
+            overflow = [self.turns.popleft() for _ in range(len(self.turns) - self.max_turns)]
+            self._spill(overflow)
+
+    def _spill(self, turns: List[Dict[str, Any]]) -> None:
+        for turn in turns:
+            if turn["role"] == "user":
+                self._older_questions.append(_shorten(turn["content"], SUMMARY_CHARS))
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(turn) + "\n" for turn in turns))
+        except OSError:
+            pass  # the transcript is a convenience; the chat keeps working without it
+        self.spilled += len(turns)
+
+    def set_prediction(self, vehicle_info: Dict[str, Any], predicted_range: float) -> None:
+        self.last_prediction = {"vehicle": dict(vehicle_info), "predicted_range": float(predicted_range)}
+
+    def recent(self, n: int = DEFAULT_RENDER_TURNS) -> List[Dict[str, Any]]:
+        """The newest ``n`` turns, oldest first, for rendering"""
+        return list(self.turns)[-n:] if n > 0 else []
+
+    def history(self) -> List[Dict[str, Any]]:
+        """Every turn of the session, reading the spilled ones back from disk"""
+        spilled = []
+        if self.spilled and self.path.exists():
+            with open(self.path) as f:
+                spilled = [json.loads(line) for line in f if line.strip()]
+        return spilled + list(self.turns)
+
+    def context(self, max_tokens: Optional[int] = None) -> str:
+        """Conversation context for the next question, within ``max_tokens`` (estimated)
+
+        Recent turns are added newest first until the budget, less the share
+        kept for the summary, is used up; the turns that did not fit and the
+        spilled ones are summarized by their questions, newest first.
+        """
+        budget = self.context_tokens if max_tokens is None else max_tokens
+        sections = []
+        if self.last_prediction is not None:
+            line = "Vehicle under discussion: " + describe_prediction(self.last_prediction["vehicle"],
+                                                                      self.last_prediction["predicted_range"])
+            sections.append(line)
+            budget -= count_tokens(line)
+
+        budget -= count_tokens(SUMMARY_HEADER) + count_tokens(WINDOW_HEADER)
+        window_budget = int(budget * (1 - SUMMARY_SHARE))
+        window: List[str] = []
+        older = list(self.turns)
+        while older:
+            turn = older[-1]
+            line = f"{'User' if turn['role'] == 'user' else 'Assistant'}: {' '.join(turn['content'].split())}"
+            if count_tokens(line) > window_budget:
+                break
+            window_budget -= count_tokens(line)
+            window.append(line)
+            older.pop()
+
+        questions = list(self._older_questions) + [_shorten(turn["content"], SUMMARY_CHARS)
+                                                   for turn in older if turn["role"] == "user"]
+        summary_budget = budget - sum(count_tokens(line) for line in window)
+        summary: List[str] = []
+        for question in reversed(questions):
+            line = f"- {question}"
+            if count_tokens(line) > summary_budget:
+                break
+            summary_budget -= count_tokens(line)
+            summary.append(line)
+
+        if summary:
+            sections.append(SUMMARY_HEADER + "\n" + "\n".join(reversed(summary)))
+        if window:
+            sections.append(WINDOW_HEADER + "\n" + "\n".join(reversed(window)))
+        return "\n\n".join(sections)
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self._older_questions.clear()
+        self.spilled = 0
+        if self.path.exists():
+            self.path.unlink()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Show a spilled chat transcript and the context it would send")
+    parser.add_argument("session_id", help="Session id (file name under the chat directory, without .jsonl)")
+    parser.add_argument("--dir", default=str(DEFAULT_CHAT_DIR), help="Chat transcript directory")
+    parser.add_argument("--tokens", type=int, default=DEFAULT_CONTEXT_TOKENS, help="Context token budget")
+    args = parser.parse_args(argv)
+
+    path = Path(args.dir) / f"{args.session_id}.jsonl"
+    if not path.exists():
+        parser.error(f"No transcript at {path}")
+    session = ChatSession(directory=args.dir, context_tokens=args.tokens, max_turns=1_000_000)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                turn = json.loads(line)
+                session.add(turn["role"], turn["content"])
+    print(f"📊 {len(session)} turns in {path}\n")
+    context = session.context()
+    print(context)
+    print(f"\n→ ~{count_tokens(context)} tokens of context")
+
+
+if __name__ == "__main__":
+    main()
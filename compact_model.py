@@ -0,0 +1,326 @@
+"""
+Compact Model Module for EV Range Predictor
+Exports a small, memory-mappable version of the range model: ordinal
+categorical encoding instead of one-hot, float32 node arrays and optional
+tree / depth pruning within an MAE budget, with a side-by-side report
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+
+from data_pipeline import CLEANED_DATA_PATH
+from ev_model import (CATEGORICAL_FEATURES, COMPACT_MODEL_PATH, COMPILED_MODEL_PATH, FEATURES, METRICS_PATH,
+                      MODEL_PATH, NUMERIC_FEATURES, atomic_path, load_compiled_model, load_metrics, load_model)
+from fast_inference import CompiledForest, _time_call
+from train import RANDOM_STATE, split_training_data
+
+# Rows used when searching for a pruning; the final MAE uses the whole test split
+_PRUNE_SEARCH_ROWS = 20_000
+
+
+def target_ordered_categories(X: pd.DataFrame, y: pd.Series) -> List[List[Any]]:
+    """Categories of each categorical feature sorted by their mean range
+
+    With categories in this order, a single ``<=`` split can separate
+    low-range from high-range makes and models. For squared-error
+    regression that is the best partition of a categorical feature, so the
+    ordinal forest needs no one-hot columns to find the splits it needs.
+    """
+    orders = []
+    for column in CATEGORICAL_FEATURES:
+        values = X[column].fillna(X[column].mode()[0])
+        orders.append(y.groupby(values).mean().sort_values(kind="stable").index.tolist())
+    return orders
+
+
+def build_compact_pipeline(categories: List[List[Any]], n_estimators: int = 200,
+                           max_depth: Optional[int] = None, n_jobs: Optional[int] = None) -> Pipeline:
+    """The notebook's imputers with ordinal categories; trees need no scaling"""
+    preprocess = ColumnTransformer([
+        ("num", Pipeline([("imputer", SimpleImputer(strategy="median"))]), NUMERIC_FEATURES),
+        ("cat", Pipeline([
+            ("imputer", SimpleImputer(strategy="most_frequent")),
+            ("ordinal", OrdinalEncoder(categories=categories, handle_unknown="use_encoded_value",
+                                       unknown_value=-1))
+        ]), CATEGORICAL_FEATURES)
+    ])
+    return Pipeline([
+        ("preprocess", preprocess),
+        ("model", RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth,
+                                        random_state=RANDOM_STATE, n_jobs=n_jobs))
+    ])
+
+
+def to_float32(engine: CompiledForest) -> CompiledForest:
+    """Store thresholds and leaf values as float32 and node indices as int32
+
+    Inputs are already float32, so rounding each threshold down to the
+    nearest float32 keeps every ``x <= threshold`` decision unchanged; only
+    the leaf values lose precision (about 1e-5 miles).
+    """
+    threshold = engine.threshold.astype(np.float32)
+    rounded_up = threshold.astype(np.float64) > engine.threshold
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+    index_dtype = np.int32 if len(engine.left) < np.iinfo(np.int32).max else np.int64
+    arrays = {
+        "feature": engine.feature.astype(np.int16),
+        "threshold": threshold,
+        "left": engine.left.astype(index_dtype),
+        "right": engine.right.astype(index_dtype),
+        "value": engine.value.astype(np.float32),
+        "is_leaf": engine.is_leaf,
+        "roots": engine.roots.astype(index_dtype),
+        "max_depth": np.asarray(engine.max_depth),
+    }
+    return CompiledForest(arrays, engine.numeric, engine.categorical, engine.n_features)
+
+
+def node_depths(engine: CompiledForest) -> np.ndarray:
+    """Depth of every node, walking all trees one level at a time"""
+    depth = np.zeros(len(engine.feature), dtype=np.int32)
+    frontier = np.asarray(engine.roots)
+    level = 0
+    while frontier.size:
+        frontier = frontier[~engine.is_leaf[frontier]]
+        frontier = np.concatenate([engine.left[frontier], engine.right[frontier]])
+        level += 1
+        depth[frontier] = level
+    return depth
+
+
+def prune(engine: CompiledForest, n_trees: Optional[int] = None,
+          max_depth: Optional[int] = None) -> CompiledForest:
+    """Keep the first ``n_trees`` trees and turn nodes at ``max_depth`` into leaves
+
+    A forest's internal nodes store the mean target of their samples, so a
+    truncated node predicts exactly what a tree grown to that depth would.
+    """
+    n_trees = min(n_trees or engine.n_trees, engine.n_trees)
+    end = int(engine.roots[n_trees]) if n_trees < engine.n_trees else len(engine.feature)
+    ids = np.arange(end)
+    depth = node_depths(engine)[:end]
+    leaf = engine.is_leaf[:end].copy()
+    keep = np.ones(end, dtype=bool)
+    if max_depth is not None:
+        leaf |= depth == max_depth
+        keep = depth <= max_depth
+
+    new_id = (np.cumsum(keep) - 1).astype(engine.left.dtype)
+    left = np.where(leaf, ids, engine.left[:end])
+    right = np.where(leaf, ids, engine.right[:end])
+    arrays = {
+        "feature": np.where(leaf, 0, engine.feature[:end]).astype(engine.feature.dtype)[keep],
+        "threshold": engine.threshold[:end][keep],
+        "left": new_id[left][keep],
+        "right": new_id[right][keep],
+        "value": engine.value[:end][keep],
+        "is_leaf": leaf[keep],
+        "roots": new_id[engine.roots[:n_trees]],
+        "max_depth": np.asarray(min(engine.max_depth, max_depth) if max_depth is not None else engine.max_depth),
+    }
+    return CompiledForest(arrays, engine.numeric, engine.categorical, engine.n_features)
+
+
+def search_pruning(engine: CompiledForest, X_encoded: np.ndarray, y: np.ndarray,
+                   max_mae: float) -> Tuple[int, Optional[int], float]:
+    """Smallest (n_trees, max_depth) whose MAE stays within ``max_mae``
+
+    One level-by-level traversal yields every tree's prediction at every
+    depth; a running sum over trees then gives the MAE of all tree-count /
+    depth combinations without re-traversing the forest.
+    """
+    depth = node_depths(engine)
+    tree_of_node = np.searchsorted(engine.roots, np.arange(len(depth)), side="right") - 1
+    # nodes[d, k] = nodes kept by pruning to depth d and the first k + 1 trees
+    counts = np.zeros((engine.max_depth + 1, engine.n_trees), dtype=np.int64)
+    np.add.at(counts, (depth, tree_of_node), 1)
+    nodes = counts.cumsum(axis=0).cumsum(axis=1)
+
+    row_index = np.arange(len(X_encoded))[:, None]
+    node = np.broadcast_to(engine.roots, (len(X_encoded), engine.n_trees)).copy()
+    tree_counts = np.arange(1, engine.n_trees + 1)
+    best = (engine.n_trees, None, float("inf"), nodes[-1, -1])
+    for level in range(engine.max_depth + 1):
+        per_tree = engine.value[node].astype(np.float64)
+        mae = np.abs(np.cumsum(per_tree, axis=1) / tree_counts - y[:, None]).mean(axis=0)
+        ok = np.flatnonzero(mae <= max_mae)
+        if ok.size:
+            k = ok[np.argmin(nodes[level, ok])]
+            if nodes[level, k] < best[3]:
+                best = (int(k + 1), level if level < engine.max_depth else None, float(mae[k]), nodes[level, k])
+        go_left = X_encoded[row_index, engine.feature[node]] <= engine.threshold[node]
+        node = np.where(go_left, engine.left[node], engine.right[node])
+    return best[:3]
+
+
+def _mae(engine: CompiledForest, X_encoded: np.ndarray, y: np.ndarray) -> float:
+    return float(np.abs(engine.predict_encoded(X_encoded) - y).mean())
+
+
+_MEASURE_SNIPPET = """
+import json, os, sys, time
+kind, path = sys.argv[1], sys.argv[2]
+import numpy, pandas, sklearn.ensemble
+
+def rss_mb():
+    try:  # current resident set on Linux; mapped pages count once touched
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+sample = {"Model Year": 2022, "Base MSRP": 0.0, "Make": "Tesla", "Model": "MODEL 3",
+          "Electric Vehicle Type": "BEV", "State": "WA"}
+before = rss_mb()
+start = time.perf_counter()
+if kind == "pipeline":
+    from ev_model import load_model
+    model = load_model(path)
+    load_s = time.perf_counter() - start
+    model.predict(pandas.DataFrame([sample]))
+else:
+    from fast_inference import CompiledForest
+    model = CompiledForest.load(path, mmap_mode="r")
+    load_s = time.perf_counter() - start
+    model.predict(sample)
+after = rss_mb()
+print(json.dumps({"load_s": load_s, "rss_mb": after - before if after is not None else None}))
+"""
+
+
+def measure_load(kind: str, path: Union[str, Path]) -> Dict[str, Any]:
+    """Load time and resident memory added by one artifact (after a first predict), in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent),
+                                                                    os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", _MEASURE_SNIPPET, kind, str(Path(path).resolve())],
+                            capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(variants: Dict[str, Tuple[str, Path, Any]], X_test: pd.DataFrame, y_test: pd.Series,
+            repeats: int = 20) -> List[Dict[str, Any]]:
+    """Size, load time, RSS, latency and MAE for each ``name -> (kind, path, predictor)``"""
+    one_row = X_test.iloc[:1]
+    batch = X_test.iloc[:1000]
+    batch_rows = batch.to_dict("records")
+    results = []
+    for name, (kind, path, predictor) in variants.items():
+        if kind == "pipeline":
+            single = lambda: predictor.predict(pd.DataFrame(one_row.to_dict("records"), columns=FEATURES))
+            many = lambda: predictor.predict(batch)
+        else:
+            single = lambda: predictor.predict(one_row.iloc[0].to_dict())
+            many = lambda: predictor.predict(batch_rows)
+        results.append({
+            "variant": name,
+            "size_mb": Path(path).stat().st_size / 1e6,
+            **measure_load(kind, path),
+            "predict_1_ms": _time_call(single, repeats) * 1000,
+            "predict_1000_ms": _time_call(many, max(3, repeats // 5)) * 1000,
+            "MAE": float(np.abs(predictor.predict(X_test) - y_test.to_numpy()).mean()),
+        })
+    return results
+
+
+def export_compact(data_path: Union[str, Path] = CLEANED_DATA_PATH, model_path: Union[str, Path] = MODEL_PATH,
+                   output: Union[str, Path] = COMPACT_MODEL_PATH, metrics_path: Union[str, Path] = METRICS_PATH,
+                   max_mae_regression: Optional[float] = None, n_estimators: Optional[int] = None,
+                   max_depth: Optional[int] = None, n_jobs: Optional[int] = None,
+                   report: bool = True) -> Dict[str, Any]:
+    """Train the ordinal forest, shrink it and write the compact engine to ``output``
+
+    Forest size defaults to the best parameters recorded by ``train.py``.
+    With ``max_mae_regression`` (e.g. 0.02 for +2%) trees and depth are
+    pruned as far as the test MAE stays within that margin of metrics.json.
+    """
+    metrics = load_metrics(metrics_path)
+    best_params = metrics.get("training", {}).get("best_params", {})
+    n_estimators = n_estimators or best_params.get("model__n_estimators", 200)
+    max_depth = max_depth if max_depth is not None else best_params.get("model__max_depth")
+
+    X_train, X_test, y_train, y_test = split_training_data(data_path)
+    start = time.perf_counter()
+    pipeline = build_compact_pipeline(target_ordered_categories(X_train, y_train), n_estimators, max_depth, n_jobs)
+    pipeline.fit(X_train, y_train)
+    engine = to_float32(CompiledForest.from_pipeline(pipeline))
+    fit_s = time.perf_counter() - start
+
+    X_encoded = engine.transform(X_test.to_dict("records"))
+    y = y_test.to_numpy()
+    summary: Dict[str, Any] = {"n_estimators": engine.n_trees, "max_depth": engine.max_depth,
+                               "fit_s": fit_s, "unpruned_MAE": _mae(engine, X_encoded, y)}
+    if max_mae_regression is not None:
+        baseline = metrics.get("MAE", summary["unpruned_MAE"])
+        allowed = baseline * (1 + max_mae_regression)
+        n_trees, depth, _ = search_pruning(engine, X_encoded[:_PRUNE_SEARCH_ROWS], y[:_PRUNE_SEARCH_ROWS], allowed)
+        if n_trees < engine.n_trees or depth is not None:
+            engine = prune(engine, n_trees, depth)
+        summary.update(baseline_MAE=baseline, allowed_MAE=allowed, pruned_trees=n_trees, pruned_depth=depth)
+    summary.update(n_estimators=engine.n_trees, max_depth=engine.max_depth, nodes=len(engine.feature),
+                   MAE=_mae(engine, X_encoded, y))
+
+    with atomic_path(output) as tmp_path:
+        engine.save(tmp_path)
+    summary["output"] = str(output)
+
+    if report:
+        model = load_model(model_path)
+        compiled = load_compiled_model(model, model_path, COMPILED_MODEL_PATH)
+        compact = CompiledForest.load(output, mmap_mode="r")
+        summary["report"] = compare({
+            "sklearn pipeline": ("pipeline", Path(model_path), model),
+            "compiled one-hot": ("engine", COMPILED_MODEL_PATH, compiled),
+            "compact ordinal": ("engine", Path(output), compact),
+        }, X_test, y_test)
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Export a compact, pruned float32 range model")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset (Parquet or CSV)")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Current model to compare against")
+    parser.add_argument("--metrics", default=str(METRICS_PATH), help="Metrics with the MAE baseline")
+    parser.add_argument("--output", default=str(COMPACT_MODEL_PATH), help="Where to write the compact engine")
+    parser.add_argument("--max-mae-regression", type=float,
+                        help="Prune while test MAE stays within this fraction of metrics.json (e.g. 0.02)")
+    parser.add_argument("--n-estimators", type=int, help="Trees (default: best from metrics.json)")
+    parser.add_argument("--max-depth", type=int, help="Depth limit (default: best from metrics.json)")
+    parser.add_argument("--jobs", type=int, help="Threads for fitting the forest")
+    parser.add_argument("--no-report", action="store_true", help="Skip the side-by-side comparison")
+    args = parser.parse_args(argv)
+
+    summary = export_compact(args.data, args.model, args.output, args.metrics, args.max_mae_regression,
+                             args.n_estimators, args.max_depth, args.jobs, report=not args.no_report)
+    print(f"✅ Compact model: {summary['n_estimators']} trees, {summary['nodes']:,} nodes, "
+          f"test MAE {summary['MAE']:.3f} (unpruned {summary['unpruned_MAE']:.3f})")
+    if "allowed_MAE" in summary and summary["MAE"] > summary["allowed_MAE"]:
+        print(f"⚠️ Test MAE is already above the budget of {summary['allowed_MAE']:.3f}; nothing was pruned")
+    elif "pruned_trees" in summary:
+        print(f"   pruned to {summary['pruned_trees']} trees, depth {summary['pruned_depth'] or 'unlimited'} "
+              f"(MAE budget {summary['allowed_MAE']:.3f})")
+    for row in summary.get("report", []):
+        if row is summary["report"][0]:
+            print(f"\n{'variant':<18} {'size MB':>9} {'load ms':>9} {'RSS MB':>8} {'1 row ms':>9} "
+                  f"{'1000 ms':>9} {'MAE':>8}")
+        print(f"{row['variant']:<18} {row['size_mb']:>9.2f} {row['load_s'] * 1000:>9.1f} "
+              f"{row['rss_mb'] or 0:>8.1f} {row['predict_1_ms']:>9.3f} {row['predict_1000_ms']:>9.1f} "
+              f"{row['MAE']:>8.3f}")
+    print(f"→ Compact engine: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Data Pipeline Module for EV Range Predictor
+Streaming, typed version of the notebook's cleaning steps: reads the raw
+population CSV in chunks, drops duplicates across chunks by row hash,
+fills missing values from two-pass statistics and writes Parquet
+"""
+
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ev_model import TARGET
+
+DEFAULT_CHUNK_SIZE = 100_000
+CLEANED_DATA_PATH = Path("cleaned_ev_data.parquet")
+
+# Explicit dtypes for the Electric_Vehicle_Population_Data schema. Columns
+# that become categoricals are read as strings first: their categories are
+# only known after the statistics pass.
+RAW_DTYPES = {
+    "VIN (1-10)": "object",
+    "County": "object",
+    "City": "object",
+    "State": "object",
+    "Postal Code": "float64",
+    "Model Year": "float64",
+    "Make": "object",
+    "Model": "object",
+    "Electric Vehicle Type": "object",
+    "Clean Alternative Fuel Vehicle (CAFV) Eligibility": "object",
+    "Electric Range": "float64",
+    "Base MSRP": "float64",
+    "Legislative District": "float64",
+    "DOL Vehicle ID": "float64",
+    "Vehicle Location": "object",
+    "Electric Utility": "object",
+    "2020 Census Tract": "float64",
+}
+CATEGORICAL_COLUMNS = ["County", "State", "Make", "Model", "Electric Vehicle Type",
+                       "Clean Alternative Fuel Vehicle (CAFV) Eligibility"]
+
+# Same fills as the notebook: mean for the range, mode for the rest
+MEAN_FILL_COLUMNS = [TARGET]
+MODE_FILL_COLUMNS = ["Model Year", "County", "City", "Postal Code", "Vehicle Location",
+                     "Electric Utility", "2020 Census Tract"]
+
+
+def read_chunks(source: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read the raw CSV in chunks with explicit dtypes for every known column"""
+    columns = pd.read_csv(source, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in RAW_DTYPES.items() if col in columns}
+    yield from pd.read_csv(source, dtype=dtypes, chunksize=chunk_size)
+
+
+def sorted_contains(haystack: np.ndarray, needles: np.ndarray) -> np.ndarray:
+    """Membership of ``needles`` in the sorted array ``haystack`` by binary search"""
+    if not len(haystack):
+        return np.zeros(len(needles), dtype=bool)
+    positions = np.searchsorted(haystack, needles)
+    positions[positions == len(haystack)] = 0
+    return haystack[positions] == needles
+
+
+class RowDeduplicator:
+    """Drops rows already seen in this or an earlier chunk, like ``drop_duplicates``
+
+    Each row is reduced to a 64-bit hash of its values; the hashes seen so
+    far are kept in one sorted NumPy array (8 bytes per unique row) instead
+    of holding the rows themselves.
+    """
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def unique_mask(self, chunk: pd.DataFrame) -> np.ndarray:
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        first_in_chunk = ~pd.Series(hashes).duplicated().to_numpy()
+        mask = first_in_chunk & ~sorted_contains(self._seen, hashes)
+        self._seen = np.union1d(self._seen, hashes[mask])
+        return mask
+
+
+def _clean_names(chunk: pd.DataFrame) -> pd.DataFrame:
+    if "Make" in chunk:
+        chunk["Make"] = chunk["Make"].str.strip().str.title()
+    if "Model" in chunk:
+        chunk["Model"] = chunk["Model"].str.strip()
+    return chunk
+
+
+def _mode(counter: Counter) -> Any:
+    """Most frequent value; ties go to the smallest value, like ``Series.mode()[0]``"""
+    if not counter:
+        return np.nan
+    top = max(counter.values())
+    return min(value for value, count in counter.items() if count == top)
+
+
+def compute_statistics(source: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """First pass: fill values and category sets over the de-duplicated rows"""
+    dedup = RowDeduplicator()
+    sums = {col: 0.0 for col in MEAN_FILL_COLUMNS}
+    counts = {col: 0 for col in MEAN_FILL_COLUMNS}
+    value_counts = {col: Counter() for col in MODE_FILL_COLUMNS}
+    categories: Dict[str, set] = {col: set() for col in CATEGORICAL_COLUMNS}
+    rows = unique_rows = 0
+
+    for chunk in read_chunks(source, chunk_size):
+        rows += len(chunk)
+        chunk = chunk[dedup.unique_mask(chunk)]
+        unique_rows += len(chunk)
+        for col in MEAN_FILL_COLUMNS:
+            if col in chunk:
+                sums[col] += float(chunk[col].sum())
+                counts[col] += int(chunk[col].count())
+        for col in MODE_FILL_COLUMNS:
+            if col in chunk:
+                value_counts[col].update(chunk[col].value_counts(dropna=True).to_dict())
+        chunk = _clean_names(chunk)
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk:
+                categories[col].update(chunk[col].dropna().unique())
+
+    fills = {col: sums[col] / counts[col] for col in MEAN_FILL_COLUMNS if counts[col]}
+    fills.update({col: _mode(value_counts[col]) for col in MODE_FILL_COLUMNS if value_counts[col]})
+    for col, value in fills.items():
+        if col in categories:
+            categories[col].add(value)
+    return {
+        "rows": rows,
+        "unique_rows": unique_rows,
+        "fills": fills,
+        "categories": {col: sorted(values) for col, values in categories.items() if values},
+    }
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], destination: Union[str, Path]) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def clean_dataset(source: Union[str, Path], destination: Union[str, Path] = CLEANED_DATA_PATH,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Clean the raw population CSV into a typed Parquet file, one chunk at a time
+
+    Pass one computes the mean/mode fills and category sets over the
+    de-duplicated data; pass two re-reads the file, drops the same
+    duplicates, fills, normalizes Make/Model and appends each chunk to the
+    Parquet output. Peak memory is bounded by the chunk size plus 8 bytes
+    per unique row for the duplicate hashes.
+    """
+    start = time.perf_counter()
+    stats = compute_statistics(source, chunk_size)
+    fills = stats["fills"]
+    dtypes = {col: pd.CategoricalDtype(values) for col, values in stats["categories"].items()}
+
+    def cleaned_chunks() -> Iterator[pd.DataFrame]:
+        dedup = RowDeduplicator()
+        for chunk in read_chunks(source, chunk_size):
+            chunk = chunk[dedup.unique_mask(chunk)]
+            chunk = chunk.fillna({col: value for col, value in fills.items() if col in chunk})
+            chunk = _clean_names(chunk)
+            if "Model Year" in chunk and not chunk["Model Year"].isna().any():
+                chunk["Model Year"] = chunk["Model Year"].astype("int64")
+            yield chunk.astype({col: dtype for col, dtype in dtypes.items() if col in chunk})
+
+    written = _write_parquet(cleaned_chunks(), destination)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": stats["rows"],
+        "unique_rows": written,
+        "duplicates_dropped": stats["rows"] - written,
+        "seconds": elapsed,
+        "rows_per_second": stats["rows"] / elapsed if elapsed > 0 else 0.0,
+        "fills": fills,
+        "output": str(destination),
+    }
+
+
+def load_cleaned(path: Union[str, Path] = CLEANED_DATA_PATH,
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load cleaned data written by :func:`clean_dataset` (or the notebook's CSV)"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        return pd.read_csv(path, usecols=columns, low_memory=False)
+    return pd.read_parquet(path, columns=columns)
+
+
+def iter_cleaned(path: Union[str, Path] = CLEANED_DATA_PATH, batch_size: int = DEFAULT_CHUNK_SIZE,
+                 columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Stream cleaned data in batches instead of loading the whole file"""
+    path = Path(path)
+    if path.suffix == ".csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=batch_size, low_memory=False)
+        return
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Clean the EV population dataset out of core")
+    parser.add_argument("input", help="Raw Electric_Vehicle_Population_Data CSV")
+    parser.add_argument("--output", default=str(CLEANED_DATA_PATH), help="Cleaned Parquet output")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    args = parser.parse_args(argv)
+
+    summary = clean_dataset(args.input, args.output, args.chunk_size)
+    print(f"✅ Cleaned {summary['rows']:,} rows → {summary['unique_rows']:,} unique "
+          f"({summary['duplicates_dropped']:,} duplicates dropped) in {summary['seconds']:.2f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s)")
+    print(f"→ Cleaned dataset: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
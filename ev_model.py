@@ -0,0 +1,227 @@
+"""
+Model Module for EV Range Predictor
+Shared feature schema and model loading used by the app and the batch tools
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import joblib
+
+MODEL_PATH = Path("ev_range_model.joblib")
+COMPILED_MODEL_PATH = Path("ev_range_model.compiled.joblib")
+COMPACT_MODEL_PATH = Path("ev_range_model.compact.joblib")
+SIMILAR_INDEX_PATH = Path("ev_range_model.similar.joblib")
+VOCABULARY_PATH = Path("ev_range_model.vocab.json")
+WARMUP_PATH = Path("ev_range_model.warmup.json")
+METRICS_PATH = Path("metrics.json")
+MANIFEST_PATH = Path("ev_range_model.manifest.npy")
+
+TARGET = "Electric Range"
+NUMERIC_FEATURES = ["Model Year", "Base MSRP"]
+CATEGORICAL_FEATURES = ["Make", "Model", "Electric Vehicle Type", "State"]
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+
+
+def is_memory_mappable(path: Union[str, Path]) -> bool:
+    """True when a joblib artifact was saved uncompressed (it starts with a raw pickle header)"""
+    with open(path, "rb") as f:
+        return f.read(1) == b"\x80"
+
+
+def load_model(path: Union[str, Path] = MODEL_PATH, mmap_mode: Optional[str] = "r"):
+    """Load the trained range prediction pipeline
+
+    Uncompressed artifacts are memory-mapped read-only so the OS page cache
+    backs the arrays instead of a private read buffer; compressed artifacts
+    cannot be mapped and are loaded normally.
+    """
+    if mmap_mode and not is_memory_mappable(path):
+        mmap_mode = None
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def _umask() -> int:
+    """The process umask, read without changing it where Linux allows (os.umask sets it process-wide)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+@contextmanager
+def atomic_path(path: Union[str, Path]) -> Iterator[Path]:
+    """Yield a fresh temporary path next to ``path``, moved over ``path`` when the block succeeds
+
+    The temporary name is unique (``mkstemp``), so processes writing the
+    same artifact at once never write into each other's file; readers only
+    ever see the old or the new complete file. The file keeps the target's
+    permissions, so an app running as another user can still read it.
+    """
+    path = Path(path)
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    os.close(fd)
+    tmp_path = Path(name)
+    try:
+        yield tmp_path
+        # mkstemp files are owner-only; keep the target's mode, or a new file's usual one
+        os.chmod(tmp_path, path.stat().st_mode & 0o7777 if path.exists() else 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def save_uncompressed(model, path: Union[str, Path] = MODEL_PATH) -> None:
+    """Atomically write a model artifact without compression so it can be memory-mapped"""
+    with atomic_path(path) as tmp_path:
+        joblib.dump(model, tmp_path, compress=0)
+
+
+def load_metrics(path: Union[str, Path] = METRICS_PATH) -> Dict[str, Any]:
+    """Read metrics.json, or an empty dict when no model has been evaluated yet"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_metrics(metrics: Dict[str, Any], path: Union[str, Path] = METRICS_PATH) -> None:
+    """Atomically write metrics.json so readers never see a half-written file"""
+    with atomic_path(path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+
+
+def load_compiled_model(model=None, model_path: Union[str, Path] = MODEL_PATH,
+                        compiled_path: Union[str, Path] = COMPILED_MODEL_PATH):
+    """Load the fast-path engine memory-mapped, rebuilding it when the model file is newer
+
+    sklearn copies tree nodes into private buffers when it unpickles a
+    forest, so only the compiled engine's plain NumPy arrays stay in the
+    page cache and are shared by every app process on the machine.
+    """
+    from fast_inference import CompiledForest
+
+    model_path, compiled_path = Path(model_path), Path(compiled_path)
+    if not compiled_path.exists() or compiled_path.stat().st_mtime_ns < model_path.stat().st_mtime_ns:
+        if model is None:
+            model = load_model(model_path)
+        with atomic_path(compiled_path) as tmp_path:
+            CompiledForest.from_pipeline(model).save(tmp_path)
+    return CompiledForest.load(compiled_path, mmap_mode="r")
+
+
+def normalize_vehicle(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean user input the same way the notebook cleaned the training data"""
+    return {
+        "Model Year": int(vehicle["Model Year"]),
+        "Base MSRP": float(vehicle["Base MSRP"]),
+        "Make": str(vehicle["Make"]).strip().title(),
+        "Model": str(vehicle["Model"]).strip(),
+        "Electric Vehicle Type": str(vehicle["Electric Vehicle Type"]).strip(),
+        "State": str(vehicle["State"]).strip().upper(),
+    }
+
+
+def normalize_frame(frame: "pd.DataFrame") -> "pd.DataFrame":
+    """Vectorized :func:`normalize_vehicle` for a batch of rows
+
+    Missing values, None included, become NaN so the pipeline's imputers fill them,
+    exactly as they did for the training data.
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = frame[FEATURES].copy()
+    for column in NUMERIC_FEATURES:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    for column in CATEGORICAL_FEATURES:
+        values = frame[column].astype(object)
+        present = values.notna()
+        cleaned = values[present].astype(str).str.strip()
+        if column == "Make":
+            cleaned = cleaned.str.title()
+        elif column == "State":
+            cleaned = cleaned.str.upper()
+        # None (e.g. Parquet nulls) must become NaN: SimpleImputer only fills NaN on
+        # object columns and would pass None on to the encoder as an unknown category
+        column_values = pd.Series(np.nan, index=values.index, dtype=object)
+        column_values[present] = cleaned.astype(object)
+        frame[column] = column_values
+    return frame
+
+
+def startup_report(model_path: Union[str, Path] = MODEL_PATH) -> Dict[str, Any]:
+    """Time the cold-start phases: heavy imports, model load and the first prediction"""
+    start = time.perf_counter()
+    import pandas as pd
+    import sklearn.ensemble  # noqa: F401
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = load_model(model_path)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = load_compiled_model(model, model_path)
+    compiled_load_s = time.perf_counter() - start
+
+    sample = {"Model Year": 2022, "Base MSRP": 46990, "Make": "Tesla", "Model": "Model 3",
+              "Electric Vehicle Type": "BEV", "State": "WA"}
+    start = time.perf_counter()
+    model.predict(pd.DataFrame([sample]))
+    first_predict_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.predict(sample)
+    first_compiled_predict_s = time.perf_counter() - start
+
+    return {
+        "timestamp": time.time(),
+        "model_path": str(model_path),
+        "memory_mapped": is_memory_mappable(model_path),
+        "import_s": import_s,
+        "load_s": load_s,
+        "compiled_load_s": compiled_load_s,
+        "first_predict_s": first_predict_s,
+        "first_compiled_predict_s": first_compiled_predict_s,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Model artifact utilities")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--uncompress", action="store_true",
+                        help="Rewrite the model artifact uncompressed so it can be memory-mapped")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Time import, load and first predict (run in a fresh process)")
+    parser.add_argument("--log", help="Append the startup report as a JSON line to this file")
+    args = parser.parse_args(argv)
+
+    if args.uncompress:
+        save_uncompressed(load_model(args.model, mmap_mode=None), args.model)
+        print(f"✅ Rewrote {args.model} uncompressed")
+
+    if args.startup_report:
+        report = startup_report(args.model)
+        for key in ("import_s", "load_s", "compiled_load_s", "first_predict_s", "first_compiled_predict_s"):
+            print(f"{key:>26}: {report[key] * 1000:9.1f} ms")
+        if args.log:
+            with open(args.log, "a") as f:
+                f.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Fast Inference Module for EV Range Predictor
+Compiles the fitted preprocessing + RandomForest pipeline into flat NumPy
+arrays and evaluates single rows and small batches without pandas or
+sklearn dispatch
+"""
+
+import argparse
+import math
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+import joblib
+import numpy as np
+
+from ev_model import FEATURES, MODEL_PATH, load_model
+
+# Traversal works on an (n_rows x n_trees) block of node indices; larger
+# batches are split so the block never grows past this many cells
+_MAX_BLOCK_CELLS = 1 << 20
+
+# predict_with_interval reduces leaf ids in blocks of at most this many cells
+_INTERVAL_BLOCK_CELLS = 1 << 23
+
+# Default prediction interval: the 5th to 95th percentile of the trees
+DEFAULT_QUANTILES = (0.05, 0.95)
+
+
+def _is_nan(value: Any) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+class CompiledForest:
+    """Flat-array copy of the fitted range pipeline
+
+    Every tree of the forest is concatenated into shared ``feature``,
+    ``threshold``, ``left``, ``right`` and ``value`` arrays (leaves point to
+    themselves), and the ColumnTransformer is reduced to imputer fill values,
+    scaler parameters and a category lookup per categorical feature: the
+    one-hot output column, or for ordinal-encoded pipelines the code written
+    into the feature's single column. Predictions are bit-for-bit identical
+    to ``pipeline.predict``.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], numeric: List[Dict[str, Any]],
+                 categorical: List[Dict[str, Any]], n_features: int):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.is_leaf = arrays["is_leaf"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        self.numeric = numeric
+        self.categorical = categorical
+        self.n_features = n_features
+        self.n_trees = len(self.roots)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompiledForest":
+        """Export a fitted ``Pipeline([("preprocess", ...), ("model", RandomForestRegressor)])``"""
+        preprocess = pipeline.named_steps["preprocess"]
+        forest = pipeline.named_steps["model"]
+
+        numeric, categorical, n_features = _export_preprocess(preprocess)
+        arrays = _export_trees(forest.estimators_)
+        return cls(arrays, numeric, categorical, n_features)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the compiled arrays uncompressed so they can be memory-mapped"""
+        state = {
+            "arrays": {
+                "feature": self.feature, "threshold": self.threshold, "left": self.left,
+                "right": self.right, "value": self.value, "is_leaf": self.is_leaf,
+                "roots": self.roots, "max_depth": np.asarray(self.max_depth),
+            },
+            "numeric": self.numeric,
+            "categorical": self.categorical,
+            "n_features": self.n_features,
+        }
+        joblib.dump(state, path, compress=0)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap_mode: Optional[str] = None) -> "CompiledForest":
+        """Load a compiled engine saved with :meth:`save`"""
+        state = joblib.load(path, mmap_mode=mmap_mode)
+        return cls(state["arrays"], state["numeric"], state["categorical"], state["n_features"])
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def transform(self, rows: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Encode input rows into the float32 matrix the trees were fitted on"""
+        rows = list(rows)
+        X = np.zeros((len(rows), self.n_features), dtype=np.float32)
+
+        for spec in self.numeric:
+            column, col_index = spec["column"], spec["index"]
+            fill, mean, scale = spec["fill"], spec["mean"], spec["scale"]
+            for i, row in enumerate(rows):
+                value = row.get(column)
+                value = fill if value is None or _is_nan(value) else float(value)
+                X[i, col_index] = (value - mean) / scale
+
+        for spec in self.categorical:
+            column, fill, lookup = spec["column"], spec["fill"], spec["lookup"]
+            ordinal_index = spec.get("index")
+            for i, row in enumerate(rows):
+                value = row.get(column)
+                # Like SimpleImputer on object columns, only NaN counts as
+                # missing here; None falls through as an unknown category
+                code = lookup.get(fill if _is_nan(value) else value)
+                if ordinal_index is not None:
+                    X[i, ordinal_index] = spec["unknown"] if code is None else code
+                elif code is not None:
+                    X[i, code] = 1.0
+        return X
+
+    def predict_trees(self, X: np.ndarray) -> np.ndarray:
+        """Return every tree's prediction for every row as an (n_rows x n_trees) array
+
+        All (row, tree) cells descend one level per step; cells that reach a
+        leaf drop out of the active set, so the work follows the actual path
+        lengths rather than the deepest tree.
+        """
+        n_rows = X.shape[0]
+        block = max(1, _MAX_BLOCK_CELLS // max(self.n_trees, 1))
+        out = np.empty((n_rows, self.n_trees), dtype=np.float64)
+
+        for start in range(0, n_rows, block):
+            X_block = np.ascontiguousarray(X[start:start + block])
+            n_block, n_columns = X_block.shape
+            X_flat = X_block.ravel()
+            node = np.tile(self.roots, n_block)
+            active = np.flatnonzero(~self.is_leaf[node])
+            while active.size:
+                current = node[active]
+                values = X_flat[(active // self.n_trees) * n_columns + self.feature[current]]
+                current = np.where(values <= self.threshold[current], self.left[current], self.right[current])
+                node[active] = current
+                active = active[~self.is_leaf[current]]
+            out[start:start + n_block] = self.value[node].reshape(n_block, self.n_trees)
+        return out
+
+    def predict_encoded(self, X: np.ndarray) -> np.ndarray:
+        """Average the per-tree predictions of an already encoded matrix"""
+        per_tree = self.predict_trees(X)
+        # cumsum adds the trees strictly in order, exactly like the forest's
+        # own accumulation, so the mean is bit-for-bit identical to sklearn
+        return np.cumsum(per_tree, axis=1)[:, -1] / self.n_trees
+
+    def predict(self, X: Union[Mapping[str, Any], Iterable[Mapping[str, Any]], Any]) -> np.ndarray:
+        """Predict the range for one row (a dict), a list of dicts or a DataFrame"""
+        return self.predict_encoded(self.transform(_as_rows(X)))
+
+    def predict_with_interval(self, X: Union[Mapping[str, Any], Iterable[Mapping[str, Any]], Any],
+                              quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, np.ndarray]:
+        """Mean prediction and the spread of the trees around it, from the same single traversal"""
+        return interval_summary(self.predict_trees(self.transform(_as_rows(X))), quantiles)
+
+
+def quantile_label(q: float) -> str:
+    """Result key of a quantile: 0.05 -> "q5", 0.975 -> "q97.5" """
+    return f"q{q * 100:g}"
+
+
+def interval_summary(per_tree: np.ndarray,
+                     quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, np.ndarray]:
+    """Reduce an (n_rows x n_trees) prediction array to ``mean``, ``std`` and one array per quantile
+
+    ``mean`` is accumulated exactly like :meth:`CompiledForest.predict_encoded`,
+    so it equals the point prediction bit for bit.
+    """
+    quantiles = list(quantiles)
+    result = {"mean": np.cumsum(per_tree, axis=1)[:, -1] / per_tree.shape[1], "std": per_tree.std(axis=1)}
+    if quantiles:
+        for q, band in zip(quantiles, np.quantile(per_tree, quantiles, axis=1)):
+            result[quantile_label(q)] = band
+    return result
+
+
+_engines: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def predict_with_interval(pipeline, X, quantiles: Iterable[float] = DEFAULT_QUANTILES,
+                          engine: Optional[CompiledForest] = None) -> Dict[str, np.ndarray]:
+    """Point prediction plus per-tree quantile bands for a DataFrame, on top of the fitted pipeline
+
+    The pipeline's preprocessing encodes the whole batch once (vectorized,
+    sparse one-hot output included) and ``forest.apply`` finds every row's
+    leaf in every tree with sklearn's compiled traversal, so there is no
+    Python loop over ``estimators_`` here. Leaf ids are per tree, so the
+    per-tree values are a single gather from the compiled engine's flat
+    value array. Rows are processed in blocks so the (n_rows x n_trees)
+    arrays stay bounded. The compiled engine is built on first use and kept
+    while the pipeline lives; pass ``engine`` to reuse one that is already loaded.
+    """
+    if engine is None:
+        engine = _engines.get(pipeline)
+        if engine is None:
+            engine = _engines[pipeline] = CompiledForest.from_pipeline(pipeline)
+    quantiles = list(quantiles)
+    forest = pipeline.named_steps["model"]
+    encoded = pipeline.named_steps["preprocess"].transform(X)
+    block = max(1, _INTERVAL_BLOCK_CELLS // max(engine.n_trees, 1))
+    parts = []
+    for start in range(0, encoded.shape[0], block):
+        leaves = forest.apply(encoded[start:start + block])
+        # Leaf ids are per tree; each tree's nodes start at its root in the flat arrays
+        parts.append(interval_summary(engine.value[engine.roots + leaves], quantiles))
+    if not parts:
+        return interval_summary(np.empty((0, engine.n_trees)), quantiles)
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _as_rows(X) -> List[Mapping[str, Any]]:
+    if isinstance(X, Mapping):
+        return [X]
+    if hasattr(X, "to_dict"):
+        return X.to_dict("records")
+    return list(X)
+
+
+def _export_preprocess(preprocess):
+    """Reduce a fitted ColumnTransformer to fill values, scaler stats and category lookups"""
+    numeric: List[Dict[str, Any]] = []
+    categorical: List[Dict[str, Any]] = []
+    offset = 0
+
+    for name, transformer, columns in preprocess.transformers_:
+        if name == "remainder":
+            if transformer != "drop":
+                raise ValueError("Only ColumnTransformers with remainder='drop' can be compiled")
+            continue
+        steps = dict(transformer.steps)
+        imputer = steps.get("imputer")
+
+        if "onehot" in steps:
+            encoder = steps["onehot"]
+            if encoder.drop is not None:
+                raise ValueError("OneHotEncoder with drop= is not supported")
+            for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+                lookup = {category: offset + j for j, category in enumerate(categories)}
+                fill = imputer.statistics_[i] if imputer is not None else None
+                categorical.append({"column": column, "fill": fill, "lookup": lookup})
+                offset += len(categories)
+        elif "ordinal" in steps:
+            encoder = steps["ordinal"]
+            unknown = encoder.unknown_value if encoder.handle_unknown == "use_encoded_value" else float("nan")
+            for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+                categorical.append({
+                    "column": column,
+                    "index": offset,
+                    "fill": imputer.statistics_[i] if imputer is not None else None,
+                    "lookup": {category: float(j) for j, category in enumerate(categories)},
+                    "unknown": float(unknown),
+                })
+                offset += 1
+        elif "scaler" in steps or list(steps) == ["imputer"]:
+            scaler = steps.get("scaler")
+            for i, column in enumerate(columns):
+                numeric.append({
+                    "column": column,
+                    "index": offset,
+                    "fill": float(imputer.statistics_[i]) if imputer is not None else float("nan"),
+                    "mean": float(scaler.mean_[i]) if scaler is not None and scaler.with_mean else 0.0,
+                    "scale": float(scaler.scale_[i]) if scaler is not None and scaler.with_std else 1.0,
+                })
+                offset += 1
+        else:
+            raise ValueError(f"Unsupported transformer in preprocess step: {name}")
+
+    return numeric, categorical, offset
+
+
+def _export_trees(estimators) -> Dict[str, np.ndarray]:
+    """Concatenate fitted decision trees into flat node arrays"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    max_depth = 0
+    offset = 0
+
+    for estimator in estimators:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes, dtype=np.int64) + offset
+        leaf = tree.children_left == -1
+
+        left = np.where(leaf, node_ids, tree.children_left + offset)
+        right = np.where(leaf, node_ids, tree.children_right + offset)
+        feature = np.where(leaf, 0, tree.feature)
+
+        features.append(feature.astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(left)
+        rights.append(right)
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n_nodes
+
+    feature = np.concatenate(features)
+    left = np.concatenate(lefts)
+    return {
+        "feature": feature,
+        "threshold": np.concatenate(thresholds),
+        "left": left,
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "is_leaf": left == np.arange(len(left)),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "max_depth": np.asarray(max_depth),
+    }
+
+
+def _sample_rows(engine: CompiledForest, n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Draw synthetic input rows from the categories the encoder was fitted on"""
+    rng = np.random.default_rng(seed)
+    rows = [{} for _ in range(n)]
+    for spec in engine.numeric:
+        values = rng.normal(spec["mean"], spec["scale"], n)
+        if spec["column"] == "Model Year":
+            values = np.round(values)
+        for row, value in zip(rows, values):
+            row[spec["column"]] = float(value)
+    for spec in engine.categorical:
+        categories = list(spec["lookup"])
+        for row, index in zip(rows, rng.integers(0, len(categories), n)):
+            row[spec["column"]] = categories[index]
+    return rows
+
+
+def _time_call(fn, repeats: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def benchmark(pipeline, batch_sizes=(1, 10, 100), repeats: int = 20) -> List[Dict[str, Any]]:
+    """Compare ``pipeline.predict`` with the compiled engine and check they agree exactly"""
+    import pandas as pd
+
+    engine = CompiledForest.from_pipeline(pipeline)
+    results = []
+    for batch_size in batch_sizes:
+        rows = _sample_rows(engine, batch_size)
+        frame = pd.DataFrame(rows, columns=FEATURES)
+        expected = pipeline.predict(frame)
+        actual = engine.predict(rows)
+
+        sklearn_s = _time_call(lambda: pipeline.predict(pd.DataFrame(rows, columns=FEATURES)), repeats)
+        compiled_s = _time_call(lambda: engine.predict(rows), repeats)
+        results.append({
+            "batch_size": batch_size,
+            "exact_match": bool(np.array_equal(expected, actual)),
+            "sklearn_ms": sklearn_s * 1000,
+            "compiled_ms": compiled_s * 1000,
+            "speedup": sklearn_s / compiled_s if compiled_s > 0 else float("inf"),
+        })
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compile the range model and benchmark the fast path")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--output", help="Optional path to save the compiled engine")
+    parser.add_argument("--batch-sizes", default="1,10,100", help="Comma separated batch sizes")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed repetitions per batch size")
+    args = parser.parse_args(argv)
+
+    pipeline = load_model(args.model)
+    if args.output:
+        CompiledForest.from_pipeline(pipeline).save(args.output)
+        print(f"→ Compiled engine: {args.output}")
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    print(f"{'batch':>7} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>9}  exact")
+    for result in benchmark(pipeline, batch_sizes, args.repeats):
+        print(f"{result['batch_size']:>7} {result['sklearn_ms']:>12.3f} {result['compiled_ms']:>12.3f} "
+              f"{result['speedup']:>8.1f}x  {'✅' if result['exact_match'] else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
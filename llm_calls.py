@@ -0,0 +1,299 @@
+"""
+LLM Call Layer Module for EV Range Predictor
+Client-side rate limiting, retries with backoff, per-call timeouts and
+request hedging shared by every AI assistant call
+"""
+
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``
+
+    ``reserve`` always succeeds and returns how long the caller must wait
+    before using its reservation; letting the balance go negative queues
+    callers fairly without holding a lock while they sleep, so the same
+    bucket serves threads and coroutines.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def try_reserve(self, amount: float = 1.0) -> bool:
+        """Take ``amount`` only if it is available right now"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def refund(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits applied together"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def _reserve(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: int) -> None:
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int) -> None:
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Take a request and ``tokens`` without waiting; False (and nothing taken) when either is short"""
+        if not self.requests.try_reserve(1):
+            return False
+        if not self.tokens.try_reserve(tokens):
+            self.requests.refund(1)
+            return False
+        return True
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After / retry-after-ms header from an API error, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None  # malformed header: fall back to the normal backoff
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx, request timeouts and connection failures are worth retrying"""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return isinstance(error, (openai.APITimeoutError, openai.APIConnectionError))
+
+
+class CallLayer:
+    """Wraps one LLM request with rate limiting, retries, a timeout and hedging
+
+    Calls are passed in as ``fn(timeout)`` so the layer can set the
+    per-attempt timeout. Retries use full-jitter exponential backoff and
+    wait at least as long as the provider's Retry-After header asks, up to
+    ``max_delay``. When hedging is enabled and enough latencies have been
+    seen, a duplicate request is fired once the primary is slower than the
+    observed p95 and whichever finishes first wins; the duplicate needs its
+    own rate-limiter budget and is skipped when none is available right now.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 100_000,
+                 timeout: float = 30.0, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 20.0, hedge: bool = False, hedge_percentile: float = 95.0,
+                 hedge_min_delay: float = 0.5):
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = LatencyTracker()
+        self.retries = 0
+        self.hedged = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = retry_after_seconds(error)
+        return min(self.max_delay, max(delay, retry_after)) if retry_after is not None else delay
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge:
+            return None
+        p = self.latency.percentile(self.hedge_percentile)
+        return max(p, self.hedge_min_delay) if p is not None else None
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="ev-llm-hedge")
+            return self._executor
+
+    def _timed(self, fn: Callable[[float], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn(self.timeout)
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    def _attempt(self, fn: Callable[[float], Any], tokens: int = 0) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._timed(fn)
+
+        pool = self._pool()
+        pending = {pool.submit(self._timed, fn)}
+        done, pending = wait(pending, timeout=delay)
+        if not done and self.limiter.try_acquire(tokens):
+            self.hedged += 1
+            pending.add(pool.submit(self._timed, fn))
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def call(self, fn: Callable[[float], Any], tokens: int = 0, hedge: bool = True) -> Any:
+        """Run ``fn(timeout)`` under the limiter with retries (and hedging if allowed)"""
+        for attempt in range(self.max_attempts):
+            self.limiter.acquire(tokens)
+            try:
+                return self._attempt(fn, tokens) if hedge else self._timed(fn)
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not is_retryable(e):
+                    raise
+                self.retries += 1
+                time.sleep(self.backoff_delay(attempt, e))
+
+    # ------------------------------------------------------------------
+    # Async
+    # ------------------------------------------------------------------
+    async def _timed_async(self, fn: Callable[[float], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await fn(self.timeout)
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    async def _attempt_async(self, fn: Callable[[float], Awaitable[Any]], tokens: int = 0) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._timed_async(fn)
+
+        pending = {asyncio.ensure_future(self._timed_async(fn))}
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done and self.limiter.try_acquire(tokens):
+            self.hedged += 1
+            pending.add(asyncio.ensure_future(self._timed_async(fn)))
+        error = None
+        try:
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acall(self, fn: Callable[[float], Awaitable[Any]], tokens: int = 0, hedge: bool = True) -> Any:
+        """Async counterpart of :meth:`call`"""
+        for attempt in range(self.max_attempts):
+            await self.limiter.acquire_async(tokens)
+            try:
+                return await (self._attempt_async(fn, tokens) if hedge else self._timed_async(fn))
+            except Exception as e:
+                if attempt + 1 >= self.max_attempts or not is_retryable(e):
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff_delay(attempt, e))
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token budget of a request: ~4 characters per prompt token plus the completion cap"""
+    return len(prompt) // 4 + (max_tokens or 0)
+
+
+_default_layer: Optional[CallLayer] = None
+_default_layer_lock = threading.Lock()
+
+
+def get_default_call_layer() -> CallLayer:
+    """Process-wide call layer configured from EV_LLM_* environment variables"""
+    global _default_layer
+    with _default_layer_lock:
+        if _default_layer is None:
+            _default_layer = CallLayer(
+                requests_per_minute=float(os.getenv("EV_LLM_RPM", "60")),
+                tokens_per_minute=float(os.getenv("EV_LLM_TPM", "100000")),
+                timeout=float(os.getenv("EV_LLM_TIMEOUT", "30")),
+                max_attempts=int(os.getenv("EV_LLM_MAX_ATTEMPTS", "4")),
+                hedge=os.getenv("EV_LLM_HEDGE", "0") == "1",
+            )
+        return _default_layer
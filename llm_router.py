@@ -0,0 +1,329 @@
+"""
+LLM Router Module for EV Range Predictor
+Registry of OpenAI-compatible LLM backends, each with its own latency and
+health tracking, routing every call to the fastest healthy one
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_calls import retry_after_seconds
+
+# EV_LLM_BACKENDS: a JSON list of backends, or the path of a JSON file holding one
+BACKENDS_ENV = "EV_LLM_BACKENDS"
+
+DEFAULT_ALPHA = 0.2
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30.0
+# A backend whose latency estimate is older than this is probed again
+DEFAULT_PROBE_INTERVAL = 60.0
+# A probe without a verdict after this long (e.g. a cancelled call) no longer blocks the next one
+PROBE_TIMEOUT = 30.0
+# How long a rate-limited backend waits behind the others when its reply had no Retry-After
+DEFAULT_THROTTLE_COOLDOWN = 5.0
+
+# Streaming and precompute variants use the model configured for the method they mirror
+OPERATION_METHODS = {
+    "stream_ai_insights": "get_ai_insights",
+    "stream_vehicle_recommendation": "get_vehicle_recommendation",
+    "stream_maintenance_tips": "get_maintenance_tips",
+    "stream_charging_strategy": "get_charging_strategy",
+    "stream_ev_answer": "answer_ev_question",
+    "stream_vehicle_comparison": "compare_vehicles",
+    "precompute_insight": "get_ai_insights",
+    "precompute_recommendation": "get_vehicle_recommendation",
+    "precompute_maintenance_tips": "get_maintenance_tips",
+    "precompute_charging_strategy": "get_charging_strategy",
+}
+# Load shedding rather than ill health: timeout / conflict / rate-limit statuses
+THROTTLE_STATUSES = (408, 409, 429)
+
+
+class NoBackendAvailable(RuntimeError):
+    """Every backend's circuit breaker is open"""
+
+
+def is_health_failure(error: Exception) -> bool:
+    """Whether an error says the backend is unhealthy, as opposed to asking the caller to slow down
+
+    Rate limiting (429), 408 / 409 and any error carrying a Retry-After
+    header mean the backend is up but busy; they must not trip its breaker.
+    """
+    return getattr(error, "status_code", None) not in THROTTLE_STATUSES and retry_after_seconds(error) is None
+
+
+class CircuitBreaker:
+    """Stop sending calls to a backend after ``failure_threshold`` consecutive failures
+
+    The breaker opens for ``reset_timeout`` seconds, then lets one trial
+    call through (half-open): a success closes it, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through; claims the single trial call when half-open"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self, trip: bool = True) -> None:
+        """Count a failure; with ``trip=False`` the breaker never opens (a half-open one stays half-open)"""
+        with self._lock:
+            self.failures += 1
+            if trip and (self.trial_in_flight or self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def release(self) -> None:
+        """Give back a claimed trial call without a verdict, e.g. when it was rate limited"""
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class Backend:
+    """One OpenAI-compatible endpoint and model, with its latency and health
+
+    ``models`` maps an assistant operation (the method name, e.g.
+    ``get_maintenance_tips``) to a different model on the same endpoint,
+    such as a smaller one for short answers; streaming and precompute
+    variants use their method's entry (``OPERATION_METHODS``). ``ewma_s`` is
+    the exponentially weighted moving average of successful call latencies.
+    A rate-limited backend cools down until ``throttled_until``.
+    """
+
+    def __init__(self, name: str, base_url: str, model: str, api_key_env: str = "HF_TOK",
+                 models: Optional[Dict[str, str]] = None, alpha: float = DEFAULT_ALPHA,
+                 breaker: Optional[CircuitBreaker] = None, api_key: Optional[str] = None):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.api_key_env = api_key_env
+        self._api_key = api_key
+        self.models = models or {}
+        self.alpha = alpha
+        self.breaker = breaker or CircuitBreaker()
+        self.ewma_s: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.throttled_until = 0.0
+        self.probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """An explicit key, else the one in ``api_key_env``, read per call so a key set later still applies"""
+        return self._api_key or os.getenv(self.api_key_env)
+
+    def model_for(self, operation: str) -> str:
+        if operation in self.models:
+            return self.models[operation]
+        return self.models.get(OPERATION_METHODS.get(operation, operation), self.model)
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.ewma_s = seconds if self.ewma_s is None else self.alpha * seconds + (1 - self.alpha) * self.ewma_s
+            self.last_success = time.monotonic()
+            self.probe_started = None
+        self.breaker.record_success()
+
+    def record_failure(self, trip: bool = True) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.probe_started = None
+        self.breaker.record_failure(trip)
+
+    def record_throttled(self, retry_after: Optional[float] = None) -> None:
+        """A rate-limited call: not held against the backend's health, but it cools down
+        for ``retry_after`` seconds (``DEFAULT_THROTTLE_COOLDOWN`` when the reply gave none)"""
+        cooldown = DEFAULT_THROTTLE_COOLDOWN if retry_after is None else retry_after
+        with self._lock:
+            self.calls += 1
+            self.throttled += 1
+            self.throttled_until = time.monotonic() + cooldown
+            self.probe_started = None
+        self.breaker.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"name": self.name, "base_url": self.base_url, "model": self.model,
+                    "state": self.breaker.state, "ewma_ms": None if self.ewma_s is None else self.ewma_s * 1000,
+                    "calls": self.calls, "errors": self.errors, "throttled": self.throttled}
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "Backend":
+        breaker = CircuitBreaker(config.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+                                 config.get("reset_timeout", DEFAULT_RESET_TIMEOUT))
+        return cls(config.get("name", config["base_url"]), config["base_url"], config["model"],
+                   config.get("api_key_env", "HF_TOK"), config.get("models"), breaker=breaker)
+
+
+class LLMRouter:
+    """Orders the backends for each call: fastest healthy first, the rest as fail-over
+
+    Backends without a recent latency estimate (never called, or not called
+    successfully for ``probe_interval`` seconds) are probed so they get
+    measured; otherwise a backend that was slow once would never be retried.
+    Only one probe per backend is in flight at a time: meanwhile the rest of
+    the traffic keeps going to the fastest measured backend. A backend that
+    was rate limited ranks behind every other one until its cooldown ends.
+    Backends with an open circuit breaker are skipped.
+    """
+
+    def __init__(self, backends: List[Backend], probe_interval: float = DEFAULT_PROBE_INTERVAL):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.probe_interval = probe_interval
+
+    @property
+    def primary(self) -> Backend:
+        return self.backends[0]
+
+    def _rank(self, backend: Backend, now: float) -> Tuple[int, float]:
+        """Sort key: (0) due for a probe, (1) measured, fastest first, (2) unmeasured with a probe
+        already out, (3) cooling down after rate limiting"""
+        with backend._lock:
+            ewma_s, last_success = backend.ewma_s, backend.last_success
+            throttled_until, probe_started = backend.throttled_until, backend.probe_started
+        if now < throttled_until:
+            return 3, ewma_s if ewma_s is not None else float("inf")
+        if ewma_s is None or now - last_success > self.probe_interval:
+            if probe_started is None or now - probe_started > PROBE_TIMEOUT:
+                return 0, 0.0
+            if ewma_s is None:
+                return 2, 0.0
+        return 1, ewma_s
+
+    def _ranked(self) -> List[Tuple[Tuple[int, float], Backend]]:
+        now = time.monotonic()
+        return sorted(((self._rank(backend, now), backend) for backend in self.backends), key=lambda r: r[0])
+
+    def preferred(self) -> Backend:
+        """The backend the next call will most likely go to, without claiming a half-open trial or a probe"""
+        ranked = [backend for _, backend in self._ranked()]
+        return next((backend for backend in ranked if backend.breaker.state != "open"), ranked[0])
+
+    def candidates(self) -> List[Backend]:
+        """Healthy backends, fastest first; raises NoBackendAvailable when all breakers are open
+
+        Calling ``allow`` claims a half-open breaker's single trial call, so it
+        is only asked of the first candidate; fail-over candidates must be closed.
+        A first candidate that is due for a probe is marked as being probed.
+        """
+        ranked = self._ranked()
+        for i, (rank, backend) in enumerate(ranked):
+            if backend.breaker.allow():
+                if rank[0] == 0:
+                    with backend._lock:
+                        backend.probe_started = time.monotonic()
+                return [backend] + [other for _, other in ranked[i + 1:] if other.breaker.state == "closed"]
+        raise NoBackendAvailable("All LLM backends are unavailable (circuit breakers open)")
+
+    def record_failure(self, backend: Backend, error: Exception) -> None:
+        """Charge ``error`` to ``backend``: throttling never trips its breaker, and neither
+        does anything else while it is the last backend with a closed breaker"""
+        if not is_health_failure(error):
+            backend.record_throttled(retry_after_seconds(error))
+            return
+        others_healthy = any(other.breaker.state == "closed" for other in self.backends if other is not backend)
+        backend.record_failure(trip=others_healthy)
+
+    def has_credentials(self) -> bool:
+        return any(backend.api_key for backend in self.backends)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.stats() for backend in self.backends]
+
+    @classmethod
+    def single(cls, base_url: str, model: str, api_key: Optional[str] = None) -> "LLMRouter":
+        return cls([Backend("default", base_url, model, api_key=api_key)])
+
+    @classmethod
+    def from_config(cls, config: Any) -> "LLMRouter":
+        """From a list of backend dicts, or ``{"backends": [...], "probe_interval": ...}``"""
+        if isinstance(config, dict):
+            return cls([Backend.from_dict(item) for item in config["backends"]],
+                       config.get("probe_interval", DEFAULT_PROBE_INTERVAL))
+        return cls([Backend.from_dict(item) for item in config])
+
+
+def load_router_config(value: Optional[str] = None) -> Optional[Any]:
+    """Parse ``EV_LLM_BACKENDS``: inline JSON or a path to a JSON file"""
+    value = os.getenv(BACKENDS_ENV) if value is None else value
+    if not value:
+        return None
+    if value.lstrip().startswith(("[", "{")):
+        return json.loads(value)
+    with open(Path(value)) as f:
+        return json.load(f)
+
+
+_default_router: Optional[LLMRouter] = None
+_default_router_lock = threading.Lock()
+
+
+def get_default_router(base_url: str, model: str) -> LLMRouter:
+    """Process-wide router from EV_LLM_BACKENDS, else a single backend at ``base_url`` / ``model``
+
+    AIapi passes its EV_LLM_BASE_URL / EV_LLM_MODEL defaults; the arguments
+    only matter for the first call, which creates the router.
+    """
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            config = load_router_config()
+            _default_router = LLMRouter.from_config(config) if config else LLMRouter.single(base_url, model)
+        return _default_router
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Show the configured LLM backends")
+    parser.parse_args(argv)
+
+    from AIapi import DEFAULT_BASE_URL, DEFAULT_MODEL
+
+    router = get_default_router(DEFAULT_BASE_URL, DEFAULT_MODEL)
+    print(f"📊 {len(router.backends)} LLM backend(s)")
+    for backend in router.backends:
+        overrides = ", ".join(f"{op}={model}" for op, model in backend.models.items())
+        key = "✅" if backend.api_key else f"⚠️ ${backend.api_key_env} not set"
+        print(f"→ {backend.name}: {backend.base_url} [{backend.model}] {key}"
+              + (f" (per-method: {overrides})" if overrides else ""))
+
+
+if __name__ == "__main__":
+    main()
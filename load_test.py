@@ -0,0 +1,187 @@
+"""
+Load Test Module for EV Range Predictor
+Replays JSONL traffic against the AI assistant at a target QPS and reports
+throughput, latency percentiles and error rates for the sync, async and
+cached code paths
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from AIapi import AsyncEVAIAssistant, EVAIAssistant, _question_prompt
+from llm_cache import LLMCache
+from llm_calls import CallLayer
+from mock_llm_server import MockLLMServer, add_mock_arguments, config_from_args
+
+PATHS = ("sync", "async", "cached")
+_TEXT_FIELDS = ("prompt", "question", "body", "title")
+
+
+def load_traffic(path: Optional[str], limit: Optional[int] = None) -> List[str]:
+    """Read questions from a JSONL file (first of prompt/question/body/title per line)"""
+    questions: List[str] = []
+    if path and Path(path).exists():
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                text = next((record[field] for field in _TEXT_FIELDS if record.get(field)), None)
+                if text:
+                    questions.append(str(text))
+    if not questions:
+        questions = ["What is the difference between BEV and PHEV?",
+                     "How much range do EVs lose in cold weather?",
+                     "Is level 2 home charging worth installing?"]
+    return questions[:limit] if limit else questions
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+def summarize(path: str, latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    total = len(latencies) + errors
+    return {
+        "path": path,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_sync(assistant: EVAIAssistant, questions: List[str], qps: float, n_requests: int,
+             concurrency: int, path: str = "sync") -> Dict[str, Any]:
+    """Open-loop replay: requests are started on schedule whether or not earlier ones finished"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(question: str) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            assistant.complete(_question_prompt(question), max_tokens=300, temperature=0.7)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(n_requests):
+            delay = start + i / qps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, questions[i % len(questions)])
+    return summarize(path, latencies, errors, time.perf_counter() - start)
+
+
+async def _run_async(assistant: AsyncEVAIAssistant, questions: List[str], qps: float,
+                     n_requests: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(question: str) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await assistant.complete(_question_prompt(question), max_tokens=300, temperature=0.7)
+        except Exception:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(n_requests):
+        delay = start + i / qps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(questions[i % len(questions)])))
+    await asyncio.gather(*tasks)
+    return summarize("async", latencies, errors, time.perf_counter() - start)
+
+
+def run_load_test(base_url: str, questions: List[str], qps: float, n_requests: int,
+                  paths=PATHS, concurrency: int = 64, call_layer: Optional[CallLayer] = None,
+                  api_key: str = "mock") -> List[Dict[str, Any]]:
+    """Replay ``n_requests`` questions at ``qps`` through each requested code path"""
+    # A generous limiter by default so the test measures the endpoint, not our throttle
+    call_layer = call_layer or CallLayer(requests_per_minute=qps * 600, tokens_per_minute=1e9, max_attempts=1)
+    results = []
+    for path in paths:
+        if path == "sync":
+            assistant = EVAIAssistant(api_key, base_url, use_cache=False, call_layer=call_layer)
+            results.append(run_sync(assistant, questions, qps, n_requests, concurrency))
+        elif path == "async":
+            assistant = AsyncEVAIAssistant(api_key, base_url, use_cache=False, call_layer=call_layer)
+            results.append(asyncio.run(_run_async(assistant, questions, qps, n_requests)))
+        elif path == "cached":
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = LLMCache(Path(tmp) / "load_test.sqlite3")
+                assistant = EVAIAssistant(api_key, base_url, cache=cache, call_layer=call_layer)
+                result = run_sync(assistant, questions, qps, n_requests, concurrency, path="cached")
+                result["cache_hit_rate"] = cache.stats()["hit_rate"]
+                results.append(result)
+        else:
+            raise ValueError(f"Unknown path: {path}")
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the EV AI assistant")
+    parser.add_argument("--traffic", default="requests.jsonl", help="JSONL file of prompts to replay")
+    parser.add_argument("--qps", type=float, default=20.0, help="Target requests per second")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per code path")
+    parser.add_argument("--paths", default=",".join(PATHS), help="Comma separated: sync,async,cached")
+    parser.add_argument("--concurrency", type=int, default=64, help="Worker threads for the sync paths")
+    parser.add_argument("--base-url", help="Endpoint to test; a local mock server is started when omitted")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = MockLLMServer(config_from_args(args)).start()
+        base_url = server.base_url
+        print(f"🚀 Started mock LLM server on {base_url}")
+
+    try:
+        questions = load_traffic(args.traffic)
+        results = run_load_test(base_url, questions, args.qps, args.requests,
+                                paths=args.paths.split(","), concurrency=args.concurrency)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(f"\n{'path':<8} {'reqs':>6} {'err %':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(f"{r['path']:<8} {r['requests']:>6} {r['error_rate'] * 100:>6.1f}% {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Mock LLM Server Module for EV Range Predictor
+Local OpenAI-compatible chat completions endpoint with configurable latency,
+token rate, error / 429 injection and streaming, for benchmarking the AI
+assistant without the live router
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Optional
+
+_WORDS = ("battery range charging efficiency winter preconditioning commute highway regenerative "
+          "braking kilowatt level two charger thermal management degradation warranty tires "
+          "home public fast charging schedule off-peak").split()
+
+
+class MockConfig:
+    """Behaviour of the mock endpoint
+
+    ``latency_ms`` is the median time before the first token, drawn from a
+    ``fixed``, ``uniform`` (0.5x-1.5x) or ``lognormal`` distribution;
+    completion tokens are then produced at ``tokens_per_second``.
+    ``error_rate`` and ``rate_limit_rate`` are the probabilities of
+    answering with a 500 or a 429 (with ``Retry-After``).
+    """
+
+    def __init__(self, latency_ms: float = 200.0, latency_dist: str = "lognormal",
+                 latency_sigma: float = 0.5, tokens_per_second: float = 200.0,
+                 completion_tokens: int = 120, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = 1.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+    def first_token_delay(self) -> float:
+        median = self.latency_ms / 1000.0
+        if self.latency_dist == "fixed":
+            return median
+        if self.latency_dist == "uniform":
+            return self.random.uniform(0.5 * median, 1.5 * median)
+        return median * math.exp(self.random.gauss(0.0, self.latency_sigma))
+
+    def outcome(self) -> str:
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return "rate_limited"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return "error"
+        return "ok"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockLLMServer"
+
+    def log_message(self, format, *args):  # keep load tests quiet
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        elif self.path.rstrip("/").endswith("/health"):
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        self.server.count("requests")
+        self.server.received.append(request)
+
+        outcome = config.outcome()
+        if outcome == "rate_limited":
+            self.server.count("rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                            {"Retry-After": f"{config.retry_after:g}"})
+            return
+
+        time.sleep(config.first_token_delay())
+        if outcome == "error":
+            self.server.count("errors")
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        n_tokens = min(config.completion_tokens, int(request.get("max_tokens") or config.completion_tokens))
+        words = [config.random.choice(_WORDS) for _ in range(n_tokens)]
+        usage = {"prompt_tokens": max(1, len(prompt) // 4), "completion_tokens": n_tokens,
+                 "total_tokens": max(1, len(prompt) // 4) + n_tokens}
+        model = request.get("model", "mock-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        per_token = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if request.get("stream"):
+            self._stream(completion_id, model, words, per_token)
+        else:
+            time.sleep(per_token * n_tokens)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage,
+            })
+
+    def _stream(self, completion_id: str, model: str, words, per_token: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i, word in enumerate(words):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"content": word if i == 0 else " " + word}}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(per_token)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Threaded mock server; use ``start()``/``stop()`` to run it in the background
+
+    ``received`` holds the bodies of the most recent requests, for tests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self.counters = {"requests": 0, "rate_limited": 0, "errors": 0}
+        self.received: Deque[Dict[str, Any]] = deque(maxlen=1000)
+        self._counter_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name: str) -> None:
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the MockConfig options on an argument parser"""
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median time to first token")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(latency_ms=args.latency_ms, latency_dist=args.latency_dist,
+                      latency_sigma=args.latency_sigma, tokens_per_second=args.tokens_per_second,
+                      completion_tokens=args.completion_tokens, error_rate=args.error_rate,
+                      rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=args.seed)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = MockLLMServer(config_from_args(args), args.host, args.port)
+    print(f"🚀 Mock LLM server on {server.base_url}")
+    print(f"   Point the assistant at it with: EV_LLM_BASE_URL={server.base_url} HF_TOK=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Prediction Cache Module for EV Range Predictor
+Bounded LRU/TTL cache of range predictions keyed on the six input features
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from ev_model import FEATURES, MODEL_PATH, normalize_vehicle
+
+
+def file_hash(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe LRU/TTL cache in front of ``model.predict``
+
+    Keys are the normalized (Model Year, Base MSRP, Make, Model, Electric
+    Vehicle Type, State) tuple. The cache remembers the hash of the model
+    file it was filled from and clears itself as soon as that file changes.
+    """
+
+    def __init__(self, model_path: Union[str, Path] = MODEL_PATH, max_entries: int = 4096,
+                 ttl_seconds: Optional[float] = 3600):
+        self.model_path = Path(model_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.model_hash: Optional[str] = None
+        self._entries: "OrderedDict[Tuple, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_stat: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def make_key(vehicle: Dict[str, Any]) -> Tuple:
+        normalized = normalize_vehicle(vehicle)
+        return tuple(normalized[feature] for feature in FEATURES)
+
+    def _check_model(self) -> None:
+        """Clear the cache if the model file changed (called with the lock held)"""
+        try:
+            stat = os.stat(self.model_path)
+        except FileNotFoundError:
+            return
+        # Hashing a large artifact is slow, so only re-hash when its size or
+        # modification time moved
+        current = (stat.st_mtime_ns, stat.st_size)
+        if current == self._model_stat:
+            return
+        new_hash = file_hash(self.model_path)
+        if self.model_hash is not None and new_hash != self.model_hash:
+            self._entries.clear()
+            self.invalidations += 1
+        self.model_hash = new_hash
+        self._model_stat = current
+
+    def get(self, vehicle: Dict[str, Any]) -> Optional[float]:
+        """Return the cached prediction for a vehicle, or None on a miss"""
+        key = self.make_key(vehicle)
+        with self._lock:
+            self._check_model()
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, vehicle: Dict[str, Any], prediction: float) -> None:
+        key = self.make_key(vehicle)
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (float(prediction), expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_predict(self, vehicle: Dict[str, Any],
+                       predict_fn: Callable[[Dict[str, Any]], float]) -> float:
+        """Return the cached prediction or compute it with ``predict_fn`` and store it"""
+        cached = self.get(vehicle)
+        if cached is not None:
+            return cached
+        prediction = float(predict_fn(normalize_vehicle(vehicle)))
+        self.put(vehicle, prediction)
+        return prediction
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "model_hash": self.model_hash,
+            }
@@ -0,0 +1,260 @@
+"""
+Prediction Server Module for EV Range Predictor
+HTTP API around the range model that coalesces concurrent single-row
+requests into micro-batches before calling predict
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI
+from pydantic import BaseModel, ConfigDict, Field
+
+from ev_model import FEATURES, MODEL_PATH, load_model, normalize_frame
+from telemetry import span
+from vocabulary import Vocabulary, vocabulary_path_for
+
+
+class MicroBatcher:
+    """Collects concurrent prediction requests into one ``model.predict`` call
+
+    A batch is flushed as soon as it holds ``max_batch_size`` rows or the
+    oldest row has waited ``max_wait_ms``. Forest inference costs far less
+    per row in a batch than one row at a time, so under concurrency this
+    trades a few milliseconds of queueing for much higher throughput. Each
+    batch is normalized like the app's input (``normalize_frame``) first.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def predict(self, vehicle: Dict[str, Any]) -> float:
+        if self._worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((vehicle, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                # A row that cannot be normalized fails its batch, not the worker
+                frame = normalize_frame(pd.DataFrame([vehicle for vehicle, _ in batch], columns=FEATURES))
+                # predict runs in a worker thread so the loop keeps accepting requests
+                with span("predict", "micro_batch", rows=len(batch)):
+                    predictions = await loop.run_in_executor(None, self.model.predict, frame)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(float(prediction))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class VehicleRequest(BaseModel):
+    """Request body using the dataset's column names
+
+    MSRP and type are optional: when left out they reach the model as
+    missing values and its imputers fill them, as for the training data.
+    """
+
+    model_config = ConfigDict(populate_by_name=True, protected_namespaces=())
+
+    model_year: int = Field(alias="Model Year")
+    base_msrp: Optional[float] = Field(None, alias="Base MSRP")
+    make: str = Field(alias="Make")
+    model: str = Field(alias="Model")
+    ev_type: Optional[str] = Field(None, alias="Electric Vehicle Type")
+    state: str = Field(alias="State")
+
+    def as_row(self, vocabulary: Optional[Vocabulary] = None) -> Dict[str, Any]:
+        """The row to predict; spelling variants map onto the trained labels when a vocabulary is loaded
+
+        Fields left out become NaN, the only missing marker the pipeline's imputers fill.
+        """
+        row = self.model_dump(by_alias=True)
+        if vocabulary is not None:
+            row = vocabulary.canonicalize(row)
+        return {column: np.nan if value is None else value for column, value in row.items()}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_path = os.getenv("EV_MODEL_PATH", str(MODEL_PATH))
+    model = load_model(model_path)
+    vocabulary_path = vocabulary_path_for(model_path)
+    app.state.vocabulary = Vocabulary.load(vocabulary_path) if vocabulary_path.exists() else None
+    app.state.batcher = MicroBatcher(
+        model,
+        max_batch_size=int(os.getenv("EV_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.getenv("EV_BATCH_MAX_WAIT_MS", "5")),
+    )
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="EV Range Prediction Service", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/stats")
+async def stats() -> Dict[str, Any]:
+    return app.state.batcher.stats()
+
+
+@app.post("/predict")
+async def predict(vehicle: VehicleRequest) -> Dict[str, float]:
+    return {"predicted_range": await app.state.batcher.predict(vehicle.as_row(app.state.vocabulary))}
+
+
+@app.post("/predict/batch")
+async def predict_batch(vehicles: List[VehicleRequest]) -> Dict[str, List[float]]:
+    predictions = await asyncio.gather(*(app.state.batcher.predict(v.as_row(app.state.vocabulary))
+                                         for v in vehicles))
+    return {"predicted_range": list(predictions)}
+
+
+async def _benchmark_path(predict_one, rows: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Drive ``predict_one`` with ``concurrency`` concurrent clients over ``rows``"""
+    latencies: List[float] = []
+    index = 0
+
+    async def client():
+        nonlocal index
+        while index < len(rows):
+            row = rows[index]
+            index += 1
+            start = time.perf_counter()
+            await predict_one(row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+async def benchmark(model, n_requests: int = 2000, concurrency: int = 64,
+                    max_batch_size: int = 64, max_wait_ms: float = 5.0) -> Dict[str, Dict[str, Any]]:
+    """Compare one-row-at-a-time prediction with micro-batching under concurrent load"""
+    sample = {"Model Year": 2022, "Base MSRP": 0, "Make": "Tesla", "Model": "Model 3",
+              "Electric Vehicle Type": "BEV", "State": "WA"}
+    rows = [dict(sample, **{"Model Year": 2012 + i % 12}) for i in range(n_requests)]
+    loop = asyncio.get_running_loop()
+
+    async def single(row):
+        frame = normalize_frame(pd.DataFrame([row], columns=FEATURES))
+        return (await loop.run_in_executor(None, model.predict, frame))[0]
+
+    batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    batcher.start()
+    try:
+        results = {
+            "one_row": await _benchmark_path(single, rows, concurrency),
+            "micro_batch": await _benchmark_path(batcher.predict, rows, concurrency),
+        }
+    finally:
+        await batcher.stop()
+    results["micro_batch"].update(batcher.stats())
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Micro-batching EV range prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare one-row-at-a-time and micro-batched prediction instead of serving")
+    parser.add_argument("--requests", type=int, default=2000, help="Benchmark requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="Benchmark concurrent clients")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        results = asyncio.run(benchmark(load_model(args.model), args.requests, args.concurrency,
+                                        args.max_batch_size, args.max_wait_ms))
+        print(f"{'path':<12} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, r in results.items():
+            print(f"{name:<12} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+        print(f"mean batch size: {results['micro_batch']['mean_batch_size']:.1f}")
+        return
+
+    import uvicorn
+
+    # Settings reach every worker process through the environment
+    os.environ["EV_MODEL_PATH"] = args.model
+    os.environ["EV_BATCH_MAX_SIZE"] = str(args.max_batch_size)
+    os.environ["EV_BATCH_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    uvicorn.run("prediction_server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Presets Module for EV Range Predictor
+Example vehicles offered in the app, shared with the insight warm-up job
+"""
+
+DEFAULT_DAILY_COMMUTE = 40
+
+PRESETS = {
+    "🚗 Tesla Model 3 (2022)": {
+        "Make": "Tesla", "Model": "Model 3", "Model Year": 2022,
+        "Electric Vehicle Type": "BEV", "Base MSRP": 46990, "State": "CA"
+    },
+    "🚙 Tata Nexon EV (2021)": {
+        "Make": "Tata", "Model": "Nexon EV", "Model Year": 2021,
+        "Electric Vehicle Type": "BEV", "Base MSRP": 18500, "State": "MH"
+    },
+    "🏎️ Hyundai Kona Electric (2023)": {
+        "Make": "Hyundai", "Model": "Kona Electric", "Model Year": 2023,
+        "Electric Vehicle Type": "BEV", "Base MSRP": 37400, "State": "WA"
+    },
+    "🔋 MG ZS EV (2022)": {
+        "Make": "MG", "Model": "ZS EV", "Model Year": 2022,
+        "Electric Vehicle Type": "BEV", "Base MSRP": 26900, "State": "DL"
+    },
+    "⚡ Nissan Leaf (2020)": {
+        "Make": "Nissan", "Model": "Leaf", "Model Year": 2020,
+        "Electric Vehicle Type": "BEV", "Base MSRP": 31999, "State": "NY"
+    }
+}
@@ -0,0 +1,171 @@
+"""
+Refresh Module for EV Range Predictor
+Incremental model refresh: finds rows added or changed since the last
+training snapshot, grows the forest on them with warm_start and falls back
+to a full retrain when accuracy on the new rows has drifted
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline import CLEANED_DATA_PATH, DEFAULT_CHUNK_SIZE, iter_cleaned, sorted_contains
+from ev_model import (CATEGORICAL_FEATURES, FEATURES, METRICS_PATH, MODEL_PATH, TARGET, load_metrics,
+                      load_model, save_metrics, save_uncompressed)
+from train import evaluate, load_manifest, manifest_path_for, row_hashes, save_manifest, train
+from vocabulary import save_vocabulary
+
+DEFAULT_MAX_MAE_INCREASE = 0.25
+DEFAULT_MAX_RMSE_INCREASE = 0.25
+MIN_DRIFT_ROWS = 100
+MIN_EXTRA_TREES = 5
+
+
+def find_delta(data_path: Union[str, Path], manifest: np.ndarray,
+               batch_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Rows whose hash is not in the manifest, plus their hashes
+
+    The dataset is streamed batch by batch and only unseen rows are kept,
+    so memory follows the size of the delta rather than the history.
+    """
+    frames, hashes = [], []
+    for batch in iter_cleaned(data_path, batch_size):
+        batch_hashes = row_hashes(batch)
+        new = ~sorted_contains(manifest, batch_hashes)
+        if new.any():
+            frames.append(batch.loc[new, FEATURES + [TARGET]])
+            hashes.append(batch_hashes[new])
+    if not frames:
+        return pd.DataFrame(columns=FEATURES + [TARGET]), np.empty(0, dtype=np.uint64)
+    delta = pd.concat(frames, ignore_index=True)
+    return delta, np.concatenate(hashes)
+
+
+def check_drift(model, X: pd.DataFrame, y: pd.Series, baseline: Dict[str, Any],
+                max_mae_increase: float = DEFAULT_MAX_MAE_INCREASE,
+                max_rmse_increase: float = DEFAULT_MAX_RMSE_INCREASE,
+                min_rows: int = MIN_DRIFT_ROWS) -> Dict[str, Any]:
+    """Score the current model on the new rows against the MAE/RMSE in metrics.json
+
+    Drift is declared when either error exceeds the baseline by more than
+    the allowed relative increase; deltas smaller than ``min_rows`` are too
+    noisy to judge and never trigger a retrain.
+    """
+    scores = evaluate(model, X, y)
+    drifted = []
+    if len(X) >= min_rows:
+        if "MAE" in baseline and scores["MAE"] > baseline["MAE"] * (1 + max_mae_increase):
+            drifted.append("MAE")
+        if "RMSE" in baseline and scores["RMSE"] > baseline["RMSE"] * (1 + max_rmse_increase):
+            drifted.append("RMSE")
+    return {"delta_MAE": scores["MAE"], "delta_RMSE": scores["RMSE"], "drifted": drifted}
+
+
+def grow_forest(model, X: pd.DataFrame, y: pd.Series, extra_trees: int):
+    """Add ``extra_trees`` trees fitted only on the new rows (``warm_start``)
+
+    The fitted preprocessing is reused as-is; categories it has never seen
+    are encoded as all zeros, exactly as at prediction time.
+    """
+    forest = model.named_steps["model"]
+    X_encoded = model.named_steps["preprocess"].transform(X)
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + extra_trees)
+    forest.fit(X_encoded, y)
+    forest.set_params(warm_start=False)
+    return model
+
+
+def refresh(data_path: Union[str, Path] = CLEANED_DATA_PATH, model_path: Union[str, Path] = MODEL_PATH,
+            metrics_path: Union[str, Path] = METRICS_PATH, extra_trees: Optional[int] = None,
+            max_mae_increase: float = DEFAULT_MAX_MAE_INCREASE,
+            max_rmse_increase: float = DEFAULT_MAX_RMSE_INCREASE, force_retrain: bool = False,
+            search: str = "grid", n_jobs: int = -1, param_grid: Optional[Dict[str, List[Any]]] = None,
+            batch_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Bring the model up to date with the cleaned dataset
+
+    Without ``extra_trees`` the number of new trees is proportional to the
+    delta's share of all rows, so new rows carry about the same weight as
+    the old ones. The model file is replaced atomically; the app notices
+    the new modification time and reloads it without a restart.
+    """
+    start = time.perf_counter()
+    manifest_path = manifest_path_for(model_path)
+    manifest = load_manifest(manifest_path)
+    summary: Dict[str, Any] = {"refreshed_at": time.time()}
+
+    if manifest is None or force_retrain or not Path(model_path).exists():
+        summary["mode"] = "retrain"
+        summary["reason"] = "forced" if force_retrain else "no training snapshot"
+    else:
+        delta, delta_hashes = find_delta(data_path, manifest, batch_size)
+        delta = delta.dropna(subset=[TARGET])
+        summary["delta_rows"] = len(delta)
+        if delta.empty:
+            summary.update(mode="up_to_date", seconds=time.perf_counter() - start)
+            return summary
+
+        model = load_model(model_path, mmap_mode=None)
+        X = delta[FEATURES].astype({col: object for col in CATEGORICAL_FEATURES})
+        y = delta[TARGET]
+        metrics = load_metrics(metrics_path)
+        summary.update(check_drift(model, X, y, metrics, max_mae_increase, max_rmse_increase))
+
+        if summary["drifted"]:
+            summary["mode"] = "retrain"
+            summary["reason"] = f"{', '.join(summary['drifted'])} drifted on new rows"
+        else:
+            n_trees = len(model.named_steps["model"].estimators_)
+            if extra_trees is None:
+                extra_trees = max(MIN_EXTRA_TREES, math.ceil(n_trees * len(delta) / max(len(manifest), 1)))
+            grow_forest(model, X, y, extra_trees)
+            save_uncompressed(model, model_path)
+            save_manifest(np.union1d(manifest, delta_hashes), manifest_path)
+            save_vocabulary(model, model_path, data_path)  # new rows may add model years
+            summary.update(mode="warm_start", trees_added=extra_trees, n_estimators=n_trees + extra_trees,
+                           seconds=time.perf_counter() - start)
+            metrics["refresh"] = summary
+            save_metrics(metrics, metrics_path)
+            return summary
+
+    metrics = train(data_path, model_path, metrics_path, search=search, n_jobs=n_jobs, param_grid=param_grid)
+    summary["seconds"] = time.perf_counter() - start
+    metrics["refresh"] = summary
+    save_metrics(metrics, metrics_path)
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally refresh the EV range model")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset (Parquet or CSV)")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Model to refresh in place")
+    parser.add_argument("--metrics", default=str(METRICS_PATH), help="Metrics with the drift baseline")
+    parser.add_argument("--extra-trees", type=int, help="Trees to add (default: proportional to the delta)")
+    parser.add_argument("--max-mae-increase", type=float, default=DEFAULT_MAX_MAE_INCREASE,
+                        help="Relative MAE increase on new rows that triggers a full retrain")
+    parser.add_argument("--max-rmse-increase", type=float, default=DEFAULT_MAX_RMSE_INCREASE,
+                        help="Relative RMSE increase on new rows that triggers a full retrain")
+    parser.add_argument("--force-retrain", action="store_true", help="Skip the delta and retrain fully")
+    parser.add_argument("--search", choices=["grid", "halving"], default="grid", help="Search for full retrains")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel CV workers for full retrains")
+    args = parser.parse_args(argv)
+
+    summary = refresh(args.data, args.model, args.metrics, args.extra_trees, args.max_mae_increase,
+                      args.max_rmse_increase, args.force_retrain, args.search, args.jobs)
+    if summary["mode"] == "up_to_date":
+        print(f"✅ Model is up to date ({summary['seconds']:.1f}s)")
+    elif summary["mode"] == "warm_start":
+        print(f"✅ Added {summary['trees_added']} trees for {summary['delta_rows']:,} new rows "
+              f"(now {summary['n_estimators']}) in {summary['seconds']:.1f}s")
+        print(f"   MAE on new rows before refresh: {summary['delta_MAE']:.3f}")
+    else:
+        print(f"✅ Full retrain ({summary['reason']}) in {summary['seconds']:.1f}s")
+    print(f"→ Model: {args.model}")
+
+
+if __name__ == "__main__":
+    main()
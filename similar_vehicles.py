@@ -0,0 +1,208 @@
+"""
+Similar Vehicles Module for EV Range Predictor
+Ball-tree index over the unique Make / Model / Year / Type rows of the
+cleaned dataset, returning the most similar real vehicles with their
+actual Electric Range
+"""
+
+import argparse
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from data_pipeline import CLEANED_DATA_PATH, load_cleaned
+from ev_model import SIMILAR_INDEX_PATH, TARGET, atomic_path
+
+KEY_COLUMNS = ["Make", "Model", "Model Year", "Electric Vehicle Type"]
+
+# Relative importance of each feature in the distance; a shared model name
+# counts most, then make and powertrain, then one standard deviation of
+# model year or price
+DEFAULT_WEIGHTS = {"Model": 2.0, "Make": 1.5, "Electric Vehicle Type": 1.0, "Model Year": 1.0, "Base MSRP": 0.5}
+
+
+def _alias_keys(value: Any) -> List[str]:
+    """Case-insensitive keys for a label; "Battery Electric Vehicle (BEV)" also answers to "bev" """
+    key = str(value).strip().casefold()
+    if key.endswith(")") and "(" in key:
+        return [key, key[key.rindex("(") + 1:-1]]
+    return [key]
+
+
+def _category_lookup(categories: Sequence[str]) -> Dict[str, str]:
+    lookup = {}
+    for category in categories:
+        for key in _alias_keys(category):
+            lookup.setdefault(key, category)
+    return lookup
+
+
+class SimilarVehicleIndex:
+    """Nearest-neighbour lookup of comparable real vehicles
+
+    Vehicles are embedded as z-scored Model Year and Base MSRP (clipped to
+    three standard deviations, so an unusual price cannot outweigh the make
+    and model) plus weighted one-hot Make, Model and vehicle type, and
+    stored in a BallTree. Rows whose range is 0 (not yet researched in the
+    registration data) are left out so every neighbour has a real range to
+    compare against.
+    """
+
+    def __init__(self, vehicles: pd.DataFrame, categories: Dict[str, List[str]],
+                 numeric: Dict[str, Dict[str, float]], weights: Dict[str, float], tree: BallTree):
+        self.vehicles = vehicles
+        self.categories = categories
+        self.numeric = numeric
+        self.weights = weights
+        self.tree = tree
+        self._records = vehicles.to_dict("records")
+        self._aliases = {column: _category_lookup(values) for column, values in categories.items()}
+        self._columns = {}
+        offset = len(numeric)
+        for column, values in categories.items():
+            self._columns[column] = {value: offset + i for i, value in enumerate(values)}
+            offset += len(values)
+        self.n_dims = offset
+
+    @classmethod
+    def build(cls, data: pd.DataFrame, weights: Optional[Dict[str, float]] = None) -> "SimilarVehicleIndex":
+        """Deduplicate the cleaned data to unique vehicles and index them"""
+        weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        data = data[data[TARGET] > 0].copy()
+        for column in ("Make", "Model", "Electric Vehicle Type"):
+            data[column] = data[column].astype(str)
+        vehicles = (data.groupby(KEY_COLUMNS, observed=True)
+                    .agg(**{TARGET: (TARGET, "median"), "Base MSRP": ("Base MSRP", "median"),
+                            "Registrations": (TARGET, "size")})
+                    .reset_index())
+        numeric = {}
+        for column in ("Model Year", "Base MSRP"):
+            std = float(vehicles[column].std(ddof=0))
+            # A constant column (e.g. MSRP 0 throughout) carries no similarity signal
+            numeric[column] = {"mean": float(vehicles[column].mean()), "scale": 1.0 / std if std > 0 else 0.0}
+        categories = {column: sorted(vehicles[column].unique().tolist())
+                      for column in ("Make", "Model", "Electric Vehicle Type")}
+        index = cls(vehicles, categories, numeric, weights, tree=None)
+        index.tree = BallTree(index.encode(vehicles.to_dict("records")))
+        return index
+
+    def encode(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        X = np.zeros((len(rows), self.n_dims))
+        for i, row in enumerate(rows):
+            for j, (column, stats) in enumerate(self.numeric.items()):
+                value = row.get(column)
+                value = stats["mean"] if value is None or pd.isna(value) else float(value)
+                X[i, j] = self.weights[column] * np.clip((value - stats["mean"]) * stats["scale"], -3, 3)
+            for column, lookup in self._columns.items():
+                aliases = self._aliases[column]
+                category = next((aliases[key] for key in _alias_keys(row.get(column)) if key in aliases), None)
+                if category is not None:
+                    X[i, lookup[category]] = self.weights[column]
+        return X
+
+    def query(self, vehicle: Dict[str, Any], k: int = 5) -> List[Dict[str, Any]]:
+        """The ``k`` most similar indexed vehicles, nearest first, with their actual range"""
+        distances, indices = self.tree.query(self.encode([vehicle]), k=min(k, len(self._records)))
+        return [dict(self._records[i], Distance=float(d)) for i, d in zip(indices[0], distances[0])]
+
+    def query_many(self, vehicles: Sequence[Dict[str, Any]], k: int = 3) -> List[Dict[str, Any]]:
+        """The ``k`` nearest to each of ``vehicles``, without repeating a vehicle"""
+        matches: Dict[tuple, Dict[str, Any]] = {}
+        for vehicle in vehicles:
+            for match in self.query(vehicle, k):
+                matches.setdefault(tuple(match[column] for column in KEY_COLUMNS), match)
+        return list(matches.values())
+
+    def save(self, path: Union[str, Path] = SIMILAR_INDEX_PATH) -> None:
+        with atomic_path(path) as tmp_path:
+            joblib.dump({"vehicles": self.vehicles, "categories": self.categories, "numeric": self.numeric,
+                         "weights": self.weights, "tree": self.tree}, tmp_path, compress=0)
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = SIMILAR_INDEX_PATH) -> "SimilarVehicleIndex":
+        state = joblib.load(path)
+        return cls(state["vehicles"], state["categories"], state["numeric"], state["weights"], state["tree"])
+
+
+def load_similar_index(path: Union[str, Path] = SIMILAR_INDEX_PATH,
+                       data_path: Union[str, Path] = CLEANED_DATA_PATH) -> Optional[SimilarVehicleIndex]:
+    """Load the persisted index, (re)building it when the cleaned data is newer
+
+    Returns None when neither an index nor cleaned data is available, so
+    callers can simply skip the similar-vehicles feature.
+    """
+    path, data_path = Path(path), Path(data_path)
+    if not data_path.exists() and data_path.suffix == ".parquet":
+        data_path = data_path.with_suffix(".csv")  # the notebook's cleaned CSV
+    if path.exists() and (not data_path.exists() or path.stat().st_mtime_ns >= data_path.stat().st_mtime_ns):
+        return SimilarVehicleIndex.load(path)
+    if not data_path.exists():
+        return None
+    index = SimilarVehicleIndex.build(load_cleaned(data_path, columns=KEY_COLUMNS + ["Base MSRP", TARGET]))
+    index.save(path)
+    return index
+
+
+_default_index: Optional[SimilarVehicleIndex] = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+
+def get_default_similar_index() -> Optional[SimilarVehicleIndex]:
+    """Process-wide index from :func:`load_similar_index`, loaded on first use (None when unavailable)"""
+    global _default_index, _default_index_loaded
+    with _default_index_lock:
+        if not _default_index_loaded:
+            _default_index = load_similar_index()
+            _default_index_loaded = True
+        return _default_index
+
+
+def format_similar(vehicles: Sequence[Dict[str, Any]]) -> str:
+    """One line per vehicle, for prompts and captions"""
+    return "\n".join(
+        f"- {v['Model Year']} {v['Make']} {v['Model']} ({v['Electric Vehicle Type']}): "
+        f"{v[TARGET]:.0f} miles actual range"
+        for v in vehicles
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build or query the similar-vehicles index")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset (Parquet or CSV)")
+    parser.add_argument("--index", default=str(SIMILAR_INDEX_PATH), help="Index file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if the index is up to date")
+    parser.add_argument("--make", help="Query: vehicle make")
+    parser.add_argument("--model-name", help="Query: vehicle model")
+    parser.add_argument("--year", type=int, help="Query: model year")
+    parser.add_argument("--type", help="Query: Electric Vehicle Type (BEV/PHEV or full label)")
+    parser.add_argument("--msrp", type=float, help="Query: base MSRP")
+    parser.add_argument("-k", type=int, default=5, help="Neighbours to return")
+    args = parser.parse_args(argv)
+
+    if args.rebuild and Path(args.index).exists():
+        os.remove(args.index)
+    start = time.perf_counter()
+    index = load_similar_index(args.index, args.data)
+    if index is None:
+        parser.error(f"No index at {args.index} and no cleaned data at {args.data}")
+    print(f"✅ {len(index.vehicles):,} unique vehicles indexed (ready in {time.perf_counter() - start:.2f}s)")
+
+    if args.make or args.model_name:
+        vehicle = {"Make": args.make, "Model": args.model_name, "Model Year": args.year,
+                   "Electric Vehicle Type": args.type, "Base MSRP": args.msrp}
+        start = time.perf_counter()
+        matches = index.query(vehicle, args.k)
+        print(f"→ {len(matches)} nearest in {(time.perf_counter() - start) * 1000:.2f} ms")
+        print(format_similar(matches))
+
+
+if __name__ == "__main__":
+    main()
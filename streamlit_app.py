@@ -1,15 +1,30 @@
+import time
+_APP_START = time.perf_counter()
+
 import streamlit as st
+import altair as alt
 import pandas as pd
-import joblib
 from pathlib import Path
 import os
-from openai import OpenAI
 import json
-from AIapi import EVAIAssistant
+import tempfile
+from AIapi import AsyncEVAIAssistant, EVAIAssistant, build_insight_prompt, submit_async
+from batch_predict import predict_file
+from chat_store import ChatSession
+from ev_model import MODEL_PATH, load_compiled_model, load_model, normalize_vehicle
+from prediction_cache import PredictionCache, file_hash
+from presets import DEFAULT_DAILY_COMMUTE, PRESETS
+from similar_vehicles import get_default_similar_index
+from telemetry import annotate, record, span
+from vocabulary import VALIDATED_FIELDS, Vocabulary, vocabulary_path_for
+from warmup import WarmStore, warmup_path_for
+from what_if import linspace_grid, sweep
 from dotenv import load_dotenv
 
 load_dotenv()
 
+_IMPORT_SECONDS = time.perf_counter() - _APP_START
+
 
 # PAGE CONFIGURATION
 st.set_page_config(
@@ -121,59 +136,151 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# INITIALIZE AI CLIENT
+# SHARED AI ASSISTANT (one pooled client per process instead of one per click)
 @st.cache_resource
-def get_ai_client():
-    api_key = os.getenv("HF_TOK")
-    if not api_key:
-        raise ValueError("HuggingFace API key not found. Please set HF_TOKEN in environment variables.")
-    return OpenAI(
-        base_url="https://router.huggingface.co/v1",
-        api_key=api_key,
-    )
+def get_assistant():
+    return EVAIAssistant()
 
 # GET AI INSIGHTS
-@st.cache_data
+# Not wrapped in st.cache_data: replies are memoized in the persistent LLM
+# cache shared with AIapi, which never stores the error message below
 def get_ai_insights(vehicle_info, predicted_range):
     """Get AI-powered insights about the vehicle and range"""
     try:
-        client = get_ai_client()
-        prompt = f"""You are an expert electric vehicle consultant. Provide a brief, professional insight about this vehicle's range prediction.
-
-Vehicle Details:
-- Make: {vehicle_info.get('Make', 'Unknown')}
-- Model: {vehicle_info.get('Model', 'Unknown')}
-- Year: {vehicle_info.get('Model Year', 'Unknown')}
-- Type: {vehicle_info.get('Electric Vehicle Type', 'Unknown')}
-- Price: ${vehicle_info.get('Base MSRP', 0):,.0f}
-- Predicted Range: {predicted_range:.1f} miles
-
-Provide a 2-3 sentence professional insight about:
-1. Whether this range is competitive for this vehicle class
-2. Real-world usage recommendations
-Keep it concise and user-friendly."""
-
-        response = client.chat.completions.create(
-            model="deepseek-ai/DeepSeek-V3.2-Exp:novita",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200,
-        )
-        return response.choices[0].message.content
+        if not get_assistant().router.has_credentials():
+            raise ValueError("No LLM API key found. Please set HF_TOK (or the keys named in EV_LLM_BACKENDS).")
+        return get_assistant().complete(build_insight_prompt(vehicle_info, predicted_range), max_tokens=200,
+                                        operation="get_ai_insights")
     except Exception as e:
+        record("llm", "get_ai_insights", error=f"{type(e).__name__}: {str(e)[:100]}")
         return f"AI insights unavailable: {str(e)[:50]}..."
 
+def stream_ai_insights(vehicle_info, predicted_range, stats=None):
+    """Streaming variant of get_ai_insights that yields text deltas"""
+    try:
+        if not get_assistant().router.has_credentials():
+            raise ValueError("No LLM API key found. Please set HF_TOK (or the keys named in EV_LLM_BACKENDS).")
+        yield from get_assistant().stream_complete(build_insight_prompt(vehicle_info, predicted_range),
+                                                   max_tokens=200, error_prefix="AI insights unavailable",
+                                                   stats=stats, operation="stream_ai_insights")
+    except Exception as e:
+        record("llm", "stream_ai_insights", error=f"{type(e).__name__}: {str(e)[:100]}")
+        yield f"AI insights unavailable: {str(e)[:50]}..."
+
+def stream_vehicle_comparison(vehicle_info, predicted_range, other_info, other_range, stats=None):
+    """Stream a comparison; the assistant grounds it in similar real vehicles from the index itself"""
+    try:
+        if not get_assistant().router.has_credentials():
+            raise ValueError("No LLM API key found. Please set HF_TOK (or the keys named in EV_LLM_BACKENDS).")
+        yield from get_assistant().stream_vehicle_comparison(vehicle_info, predicted_range, other_info,
+                                                             other_range, stats=stats)
+    except Exception as e:
+        record("llm", "stream_vehicle_comparison", error=f"{type(e).__name__}: {str(e)[:100]}")
+        yield f"Unable to compare vehicles: {str(e)[:50]}..."
+
+def render_stream(placeholder, deltas, template="{}"):
+    """Write streamed deltas into a placeholder as they arrive and return the full text"""
+    text = ""
+    for delta in deltas:
+        text += delta
+        placeholder.markdown(template.format(text), unsafe_allow_html=True)
+    return text
+
+def format_stream_stats(stats):
+    if stats.get("ttft_s") is None:
+        return ""
+    source = "cache" if stats.get("cached") else "live"
+    return f"First token {stats['ttft_s'] * 1000:.0f} ms · total {stats['total_s'] * 1000:.0f} ms ({source})"
+
 # LOAD MODEL
-model_path = Path("ev_range_model.joblib")
+model_path = MODEL_PATH
 
 if not model_path.exists():
     st.error("❌ Model file not found. Please train the model first.")
     st.stop()
 
-model = joblib.load(model_path)
 
-# Initialize chat history in session state
-if 'chat_history' not in st.session_state:
-    st.session_state['chat_history'] = []
+# STARTUP TIMINGS (kept for the life of the server process)
+@st.cache_resource
+def get_startup_report():
+    return {"import_s": _IMPORT_SECONDS}
+
+
+# Loaded once per process; the compiled fast-path arrays are memory-mapped
+# so every app process on the machine shares them through the page cache.
+# Keyed on the file's modification time so a model swapped in by refresh.py
+# is picked up on the next rerun without restarting the app.
+@st.cache_resource(max_entries=1)
+def get_model(model_mtime):
+    start = time.perf_counter()
+    loaded_model = load_model(model_path, mmap_mode="r")
+    fast_model = load_compiled_model(loaded_model, model_path)
+    get_startup_report()["load_s"] = time.perf_counter() - start
+    return loaded_model, fast_model
+
+startup_report = get_startup_report()
+model, fast_model = get_model(model_path.stat().st_mtime_ns)
+
+
+def predict_single(vehicle):
+    annotate(cache_hit=False)
+    start = time.perf_counter()
+    prediction = fast_model.predict(vehicle)[0]
+    startup_report.setdefault("first_predict_s", time.perf_counter() - start)
+    return prediction
+
+
+# PREDICTION CACHE (shared across sessions, cleared when the model file changes)
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(model_path)
+
+prediction_cache = get_prediction_cache()
+
+
+# SIMILAR VEHICLES INDEX (loaded on first use; None when no cleaned data is available).
+# The same process-wide index grounds the assistant's vehicle comparisons
+def get_similar_index():
+    return get_default_similar_index()
+
+
+# WARM STORE (precomputed by warmup.py; only used while it matches the loaded model)
+@st.cache_resource(max_entries=1)
+def get_warm_store(warm_mtime, model_mtime):
+    store = WarmStore.load(warm_path)
+    return store if store.valid_for(file_hash(model_path)) else None
+
+warm_path = warmup_path_for(model_path)
+warm_store = (get_warm_store(warm_path.stat().st_mtime_ns, model_path.stat().st_mtime_ns)
+              if warm_path.exists() else None)
+
+
+# INPUT VOCABULARY (written next to the model at training time, reloaded when it changes)
+@st.cache_resource(max_entries=1)
+def get_vocabulary(vocabulary_mtime):
+    return Vocabulary.load(vocabulary_path)
+
+vocabulary_path = vocabulary_path_for(model_path)
+vocabulary = get_vocabulary(vocabulary_path.stat().st_mtime_ns) if vocabulary_path.exists() else None
+
+
+def vocabulary_input(label, field, preset_value, placeholder, make=None):
+    """Select box over the values the model was trained on (new values are still accepted);
+    a plain text input when no vocabulary has been built"""
+    if vocabulary is None:
+        return st.text_input(label, value=preset_value, placeholder=placeholder)
+    preset_value = vocabulary.resolve(field, preset_value) or preset_value
+    options = vocabulary.values(field, make)
+    if preset_value and preset_value not in options:
+        options = [preset_value] + options
+    value = st.selectbox(label, options, index=options.index(preset_value) if preset_value else None,
+                         placeholder=placeholder, accept_new_options=True)
+    return value or ""
+
+# Chat session per browser session: bounded history, older turns spilled to disk
+if 'chat_session' not in st.session_state:
+    st.session_state['chat_session'] = ChatSession()
+chat_session = st.session_state['chat_session']
 
 # HEADER SECTION
 col1, col2 = st.columns([3, 1])
@@ -202,29 +309,7 @@ with st.sidebar:
     st.write("**Status:** Trained and Deployed")
 
 # PRESET EXAMPLES
-presets = {
-    "Select Example (Optional)": {},
-    "🚗 Tesla Model 3 (2022)": {
-        "Make": "Tesla", "Model": "Model 3", "Model Year": 2022,
-        "Electric Vehicle Type": "BEV", "Base MSRP": 46990, "State": "CA"
-    },
-    "🚙 Tata Nexon EV (2021)": {
-        "Make": "Tata", "Model": "Nexon EV", "Model Year": 2021,
-        "Electric Vehicle Type": "BEV", "Base MSRP": 18500, "State": "MH"
-    },
-    "🏎️ Hyundai Kona Electric (2023)": {
-        "Make": "Hyundai", "Model": "Kona Electric", "Model Year": 2023,
-        "Electric Vehicle Type": "BEV", "Base MSRP": 37400, "State": "WA"
-    },
-    "🔋 MG ZS EV (2022)": {
-        "Make": "MG", "Model": "ZS EV", "Model Year": 2022,
-        "Electric Vehicle Type": "BEV", "Base MSRP": 26900, "State": "DL"
-    },
-    "⚡ Nissan Leaf (2020)": {
-        "Make": "Nissan", "Model": "Leaf", "Model Year": 2020,
-        "Electric Vehicle Type": "BEV", "Base MSRP": 31999, "State": "NY"
-    }
-}
+presets = {"Select Example (Optional)": {}, **PRESETS}
 
 st.markdown('<div class="section-title">🎯 Vehicle Specifications</div>', unsafe_allow_html=True)
 
@@ -236,13 +321,13 @@ col1, col2, col3 = st.columns(3)
 
 with col1:
     st.markdown('<div class="subsection-title">Basic Information</div>', unsafe_allow_html=True)
-    make = st.text_input("Manufacturer", value=preset.get("Make", ""), placeholder="e.g., Tesla")
+    make = vocabulary_input("Manufacturer", "Make", preset.get("Make", ""), "e.g., Tesla")
     year = st.number_input("Model Year", min_value=1995, max_value=2035,
                            value=preset.get("Model Year", 2023))
 
 with col2:
     st.markdown('<div class="subsection-title">Model Details</div>', unsafe_allow_html=True)
-    model_name = st.text_input("Model Name", value=preset.get("Model", ""), placeholder="e.g., Model 3")
+    model_name = vocabulary_input("Model Name", "Model", preset.get("Model", ""), "e.g., Model 3", make=make)
     ev_type = st.selectbox("Vehicle Type", ["BEV", "PHEV"],
                            index=["BEV", "PHEV"].index(preset.get("Electric Vehicle Type", "BEV")))
 
@@ -250,7 +335,24 @@ with col3:
     st.markdown('<div class="subsection-title">Pricing & Location</div>', unsafe_allow_html=True)
     msrp = st.number_input("Base MSRP ($)", min_value=1000, max_value=200000,
                            value=preset.get("Base MSRP", 45000), step=1000)
-    state = st.text_input("State/Region", value=preset.get("State", ""), placeholder="e.g., CA")
+    state = vocabulary_input("State/Region", "State", preset.get("State", ""), "e.g., CA")
+    daily_commute = st.number_input("Daily Commute (miles)", min_value=1, max_value=500,
+                                    value=DEFAULT_DAILY_COMMUTE, step=5)
+
+# INPUT VALIDATION (values the model never saw are ignored by its encoder, so say so)
+if vocabulary is not None:
+    vehicle_input = {"Make": make, "Model": model_name, "Model Year": year,
+                     "Electric Vehicle Type": ev_type, "State": state}
+    for issue in vocabulary.check(vehicle_input):
+        hint = f" Did you mean {', '.join(map(str, issue['suggestions']))}?" if issue["suggestions"] else ""
+        if issue["field"] == "Model Year":
+            st.info(f"ℹ️ No {issue['value']} {make} {model_name} in the training data.{hint}")
+        else:
+            st.warning(f"⚠️ {issue['field']} '{issue['value']}' is not in the training data, "
+                       f"so the prediction cannot use it.{hint}")
+    # Spelling variants ("tesla ", "Model3", "BEV") map onto the labels the model was trained on
+    vehicle_input = vocabulary.canonicalize(vehicle_input)
+    make, model_name, ev_type, state = (vehicle_input[field] for field in VALIDATED_FIELDS)
 
 # PREDICTION SECTION
 st.markdown("---")
@@ -268,22 +370,33 @@ if predict_button:
         st.error("⚠️ Please fill in all required fields: Make, Model, and State")
     else:
         with st.spinner("⏳ Analyzing vehicle data and generating prediction..."):
-            # Create input dataframe
-            input_df = pd.DataFrame([{
-                "Model Year": year,
-                "Base MSRP": msrp,
+            vehicle_info = {
                 "Make": make,
                 "Model": model_name,
+                "Model Year": year,
                 "Electric Vehicle Type": ev_type,
+                "Base MSRP": msrp,
                 "State": state
-            }])
+            }
 
-            # Make prediction
-            predicted_range = model.predict(input_df)[0]
+            # Popular vehicles are precomputed by warmup.py; anything else is
+            # predicted live (served from the shared cache when possible)
+            warm = warm_store.get(vehicle_info) if warm_store is not None else None
+            with span("predict", "predict_range", cache_hit=True, warm=warm is not None):
+                if warm is not None:
+                    predicted_range = warm["predicted_range"]
+                else:
+                    predicted_range = prediction_cache.get_or_predict(vehicle_info, predict_single)
+            chat_session.set_prediction(vehicle_info, predicted_range)
+            # Spread of the forest's individual trees (one traversal, well under a millisecond)
+            interval = fast_model.predict_with_interval(normalize_vehicle(vehicle_info))
+            range_low, range_high = float(interval["q5"][0]), float(interval["q95"][0])
             
             # Display results
             st.markdown('<div class="result-box">⚡ ESTIMATED DRIVING RANGE: ' + 
                        f'{predicted_range:.1f} MILES</div>', unsafe_allow_html=True)
+            st.caption(f"Model interval: {range_low:.0f} to {range_high:.0f} miles "
+                       f"(5th to 95th percentile of {fast_model.n_trees} trees)")
             
             # Display vehicle summary
             summary_col1, summary_col2, summary_col3, summary_col4 = st.columns(4)
@@ -298,19 +411,46 @@ if predict_button:
             
             # AI INSIGHTS
             st.markdown('<div class="section-title">💡 AI Insights</div>', unsafe_allow_html=True)
-            
-            vehicle_info = {
-                "Make": make,
-                "Model": model_name,
-                "Model Year": year,
-                "Electric Vehicle Type": ev_type,
-                "Base MSRP": msrp,
-                "State": state
-            }
-            
-            ai_insight = get_ai_insights(vehicle_info, predicted_range)
-            st.markdown(f'<div class="ai-insight-box">{ai_insight}</div>', 
-                       unsafe_allow_html=True)
+
+            warm_insights = warm.get("insights") if warm is not None else None
+            # The precomputed charging strategy assumed the warm-up's daily commute
+            if warm_insights is not None and daily_commute == warm_store.daily_commute:
+                ownership_future = None
+            else:
+                # Start the ownership guide calls in the background so they run
+                # concurrently with each other and with the insight below
+                ownership_future = submit_async(
+                    AsyncEVAIAssistant().get_ownership_insights(vehicle_info, predicted_range, daily_commute)
+                )
+
+            if warm_insights is not None:
+                st.markdown(f'<div class="ai-insight-box">{warm_insights["insight"]}</div>', unsafe_allow_html=True)
+                st.caption("Precomputed insight")
+            else:
+                insight_stats = {}
+                render_stream(st.empty(), stream_ai_insights(vehicle_info, predicted_range, insight_stats),
+                              template='<div class="ai-insight-box">{}</div>')
+                if format_stream_stats(insight_stats):
+                    st.caption(format_stream_stats(insight_stats))
+
+            # OWNERSHIP GUIDE
+            st.markdown('<div class="section-title">🔧 Ownership Guide</div>', unsafe_allow_html=True)
+            try:
+                ownership = warm_insights if ownership_future is None else ownership_future.result()
+            except Exception as e:
+                ownership = dict.fromkeys(["recommendation", "maintenance_tips", "charging_strategy"],
+                                          f"AI error: {str(e)[:200]}")
+
+            guide_col1, guide_col2, guide_col3 = st.columns(3)
+            with guide_col1:
+                st.markdown("**Recommendation**")
+                st.write(ownership["recommendation"])
+            with guide_col2:
+                st.markdown("**Maintenance Tips**")
+                st.write(ownership["maintenance_tips"])
+            with guide_col3:
+                st.markdown("**Charging Strategy**")
+                st.write(ownership["charging_strategy"])
             
             # RANGE ANALYSIS
             st.markdown('<div class="section-title">📈 Range Analysis</div>', unsafe_allow_html=True)
@@ -332,14 +472,42 @@ if predict_button:
                 cost_per_mile = msrp / (predicted_range * 50)
                 st.write(f"Infrastructure cost: ${cost_per_mile:.2f}/mile")
             
+            # SIMILAR REAL VEHICLES
+            similar_index = get_similar_index()
+            if similar_index is not None:
+                st.markdown('<div class="section-title">🚗 Similar Real Vehicles</div>', unsafe_allow_html=True)
+                similar = pd.DataFrame(similar_index.query(vehicle_info, k=5))
+                st.dataframe(similar[["Model Year", "Make", "Model", "Electric Vehicle Type",
+                                      "Electric Range", "Registrations"]],
+                             hide_index=True, use_container_width=True)
+                st.caption("Actual ranges of the closest vehicles in the registration data")
+
+                # Compare against the closest real vehicle other than this one (often a neighbouring year)
+                rival = next((v for v in similar.to_dict("records")
+                              if (v["Make"], v["Model"], v["Model Year"]) != (make, model_name, year)), None)
+                if rival is not None:
+                    st.markdown(f"**Compared with the {rival['Model Year']} {rival['Make']} {rival['Model']}**")
+                    comparison_stats = {}
+                    render_stream(st.empty(), stream_vehicle_comparison(vehicle_info, predicted_range, rival,
+                                                                        rival["Electric Range"], comparison_stats),
+                                  template='<div class="ai-insight-box">{}</div>')
+                    if format_stream_stats(comparison_stats):
+                        st.caption(format_stream_stats(comparison_stats))
+
             # IMPORTANT NOTES
             st.markdown('<div class="section-title">📝 Important Considerations</div>', unsafe_allow_html=True)
             
-            st.markdown("""
+            spread = ""
+            if predicted_range > 0:
+                spread = (f" ({(range_low / predicted_range - 1) * 100:+.0f}% to "
+                          f"{(range_high / predicted_range - 1) * 100:+.0f}%)")
+            st.markdown(f"""
             <div class="info-box">
             <b>⚠️ Range Variance Factors:</b>
             
-            The estimated range can vary by ±15-25% based on:
+            For vehicles like this one the model's trees predict between
+            {range_low:.0f} and {range_high:.0f} miles{spread}.
+            Real-world range varies further based on:
             • **Temperature:** Cold weather reduces range by 20-40%
             • **Driving Style:** Aggressive acceleration decreases efficiency
             • **Terrain:** Highways are more efficient than city driving
@@ -355,6 +523,101 @@ if predict_button:
             </div>
             """, unsafe_allow_html=True)
 
+# -------------------- Batch Fleet Prediction --------------------
+st.markdown("---")
+st.markdown('<div class="section-title">📦 Batch Fleet Prediction</div>', unsafe_allow_html=True)
+with st.expander("Upload a fleet file (CSV or Parquet) to score every vehicle at once", expanded=False):
+    st.write("The file must contain the columns: Model Year, Base MSRP, Make, Model, "
+             "Electric Vehicle Type and State. It is scored in chunks, so large files are fine.")
+    fleet_file = st.file_uploader("Fleet file", type=["csv", "parquet"], key="fleet_file")
+    output_format = st.radio("Output format", ["csv", "parquet"], horizontal=True, key="fleet_output_format")
+
+    if fleet_file is not None and st.button("Score Fleet", key="score_fleet"):
+        # A file of its own per run, so concurrent sessions never overwrite each other's output
+        download_name = f"{Path(fleet_file.name).stem}_predictions.{output_format}"
+        fd, output_name = tempfile.mkstemp(suffix=f"_{download_name}")
+        os.close(fd)
+        output_path = Path(output_name)
+        with st.spinner("⏳ Scoring fleet in chunks..."):
+            try:
+                summary = predict_file(fleet_file, output_path, model=model)
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+                summary = None
+
+        if summary:
+            st.success(f"✅ Scored {summary['rows']:,} vehicles in {summary['seconds']:.1f}s "
+                       f"({summary['rows_per_second']:,.0f} rows/s)")
+            st.download_button("Download Predictions", output_path.read_bytes(), file_name=download_name,
+                               key="download_fleet")
+        output_path.unlink(missing_ok=True)
+
+# -------------------- What-If Sweep --------------------
+st.markdown("---")
+st.markdown('<div class="section-title">🧪 What-If Sweep</div>', unsafe_allow_html=True)
+with st.expander("See how the predicted range moves with price, model year and state", expanded=False):
+    st.write("Uses the Make, Model and Vehicle Type entered above and predicts every combination "
+             "of the grids below in one vectorized pass.")
+    sweep_col1, sweep_col2 = st.columns(2)
+    with sweep_col1:
+        msrp_range = st.slider("Base MSRP range ($)", 0, 200000, (20000, 100000), step=1000, key="sweep_msrp")
+        msrp_steps = st.slider("MSRP steps", 5, 100, 40, key="sweep_msrp_steps")
+    with sweep_col2:
+        year_range = st.slider("Model Year range", 1995, 2035, (2012, 2025), key="sweep_years")
+        sweep_states = st.text_input("States (comma separated)", value=state or "WA", key="sweep_states")
+
+    if st.button("Run Sweep", key="run_sweep"):
+        if not all([make, model_name]):
+            st.error("⚠️ Please fill in Make and Model above first")
+        else:
+            states = [s.strip().upper() for s in sweep_states.split(",") if s.strip()] or ["WA"]
+            start = time.perf_counter()
+            st.session_state["sweep_result"] = sweep(
+                model,
+                {"Model Year": year, "Base MSRP": msrp, "Make": make, "Model": model_name,
+                 "Electric Vehicle Type": ev_type, "State": states[0]},
+                msrp_values=linspace_grid(msrp_range[0], msrp_range[1], msrp_steps, integer=True),
+                year_values=list(range(year_range[0], year_range[1] + 1)),
+                states=states,
+            )
+            st.session_state["sweep_seconds"] = time.perf_counter() - start
+
+    sweep_result = st.session_state.get("sweep_result")
+    if sweep_result is not None:
+        st.caption(f"{len(sweep_result):,} scenarios predicted in "
+                   f"{st.session_state['sweep_seconds'] * 1000:.0f} ms")
+        shown_state = st.selectbox("State shown in the heatmap", sweep_result["State"].unique().tolist(),
+                                   key="sweep_state_shown")
+        heatmap = alt.Chart(sweep_result[sweep_result["State"] == shown_state]).mark_rect().encode(
+            x=alt.X("Base MSRP:O", axis=alt.Axis(format="$,.0f", labelOverlap=True)),
+            y=alt.Y("Model Year:O", sort="descending"),
+            color=alt.Color("Predicted Range:Q", scale=alt.Scale(scheme="viridis"), title="Range (mi)"),
+            tooltip=["Model Year", alt.Tooltip("Base MSRP", format="$,.0f"),
+                     alt.Tooltip("Predicted Range", format=".1f")],
+        )
+        st.altair_chart(heatmap, use_container_width=True)
+
+        st.markdown("**Average predicted range by model year**")
+        st.line_chart(sweep_result.pivot_table(index="Model Year", columns="State", values="Predicted Range"))
+
+# PREDICTION CACHE STATISTICS
+with st.sidebar:
+    st.markdown("### 🗄️ Prediction Cache")
+    cache_stats = prediction_cache.stats()
+    st.write(f"**Hits:** {cache_stats['hits']} | **Misses:** {cache_stats['misses']}")
+    st.write(f"**Hit Rate:** {cache_stats['hit_rate']:.0%} | **Entries:** {cache_stats['size']}")
+
+    st.markdown("### 🔀 LLM Backends")
+    for backend_stats in get_assistant().router.stats():
+        latency = "-" if backend_stats["ewma_ms"] is None else f"{backend_stats['ewma_ms']:.0f} ms"
+        st.write(f"**{backend_stats['name']}:** {backend_stats['state']} | {latency} | "
+                 f"{backend_stats['errors']}/{backend_stats['calls']} errors")
+
+    st.markdown("### ⏱️ Startup Timings")
+    for label, key in [("Imports", "import_s"), ("Model Load", "load_s"), ("First Predict", "first_predict_s")]:
+        if key in startup_report:
+            st.write(f"**{label}:** {startup_report[key] * 1000:.0f} ms")
+
 # FOOTER
 st.markdown("---")
 # -------------------- Chat Assistant --------------------
@@ -365,24 +628,32 @@ with st.expander("Ask the AI Assistant a question about EVs, charging, or this p
     send = st.button("Send", key="send_chat")
 
     if send and user_question:
-        assistant = EVAIAssistant()
-        with st.spinner("Getting answer from AI..."):
-            try:
-                answer = assistant.answer_ev_question(user_question)
-            except Exception as e:
-                answer = f"AI error: {str(e)[:200]}"
-
-        # Append to chat history and display
-        st.session_state['chat_history'].append(("You", user_question))
-        st.session_state['chat_history'].append(("Assistant", answer))
-
-    # Display chat history
-    if st.session_state['chat_history']:
-        for role, msg in st.session_state['chat_history']:
-            if role == 'You':
-                st.markdown(f"**You:** {msg}")
-            else:
-                st.markdown(f"**Assistant:** {msg}")
+        answer_stats = {}
+        answer_placeholder = st.empty()
+        context = chat_session.context()
+        try:
+            answer = render_stream(answer_placeholder,
+                                   get_assistant().stream_ev_answer(user_question, answer_stats, context=context),
+                                   template="**Assistant:** {}")
+        except Exception as e:
+            answer = f"AI error: {str(e)[:200]}"
+        # The finished answer is rendered with the rest of the history below
+        answer_placeholder.empty()
+        if format_stream_stats(answer_stats):
+            st.caption(format_stream_stats(answer_stats))
+
+        chat_session.add("user", user_question)
+        chat_session.add("assistant", answer)
+
+    # Only the newest turns are rendered, so reruns stay cheap in long conversations
+    hidden = len(chat_session) - len(chat_session.recent())
+    if hidden:
+        st.caption(f"{hidden} earlier messages not shown")
+    for turn in chat_session.recent():
+        if turn["role"] == "user":
+            st.markdown(f"**You:** {turn['content']}")
+        else:
+            st.markdown(f"**Assistant:** {turn['content']}")
 
 st.markdown("""
 <div style="text-align: center; color: #888; font-size: 12px; margin-top: 20px;">
@@ -0,0 +1,256 @@
+"""
+Telemetry Module for EV Range Predictor
+Structured per-call request log (predictions and LLM calls) written as JSON
+lines by a background batching thread, plus a latency / token cost report
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# EV_TELEMETRY_LOG moves the log; set it to an empty string to turn telemetry off
+DEFAULT_LOG_PATH = os.getenv("EV_TELEMETRY_LOG", "logs/requests.jsonl")
+
+_STOP = object()
+_current_event: ContextVar[Optional[Dict[str, Any]]] = ContextVar("telemetry_event", default=None)
+
+
+class TelemetryWriter:
+    """Append events to a JSON-lines file from a background thread
+
+    ``record`` only enqueues, so instrumented code never waits on disk. The
+    writer thread drains the queue in batches of up to ``batch_size`` events
+    (or whatever arrived within ``flush_interval`` seconds) and writes each
+    batch with a single append. When the queue is full, events are dropped
+    and counted rather than blocking the caller.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_LOG_PATH, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_queue: int = 10_000):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, event: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def _next_batch(self) -> List[Any]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            events = [event for event in batch if event is not _STOP]
+            try:
+                if events:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+                    with open(self.path, "a") as f:
+                        f.write(lines)
+                    self.written += len(events)
+                    self.batches += 1
+            except OSError:
+                self.dropped += len(events)  # telemetry must never take the app down
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(events) < len(batch):
+                return
+
+    def flush(self) -> None:
+        """Block until every event recorded so far is on disk"""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "written": self.written, "dropped": self.dropped,
+                "batches": self.batches, "queued": self._queue.qsize()}
+
+
+_default_writer: Optional[TelemetryWriter] = None
+_default_writer_lock = threading.Lock()
+
+
+def get_default_telemetry() -> Optional[TelemetryWriter]:
+    """Process-wide writer at ``EV_TELEMETRY_LOG``, or None when telemetry is turned off"""
+    global _default_writer
+    if not DEFAULT_LOG_PATH:
+        return None
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = TelemetryWriter(DEFAULT_LOG_PATH)
+            atexit.register(_default_writer.close)
+        return _default_writer
+
+
+def record(kind: str, operation: str, **fields: Any) -> None:
+    """Log one event; ``kind`` groups operations, e.g. "predict" or "llm" """
+    writer = get_default_telemetry()
+    if writer is not None:
+        writer.record({"ts": time.time(), "kind": kind, "operation": operation, **fields})
+
+
+@contextmanager
+def span(kind: str, operation: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Time the block and log it as one event
+
+    The yielded dict is the event: add fields to it (or call :func:`annotate`
+    further down the stack). An exception is logged as ``error`` and re-raised.
+    Works the same inside coroutines, since each asyncio task has its own context.
+    """
+    event: Dict[str, Any] = dict(fields, error=None)
+    token = _current_event.set(event)
+    start = time.perf_counter()
+    try:
+        yield event
+    except BaseException as e:
+        event["error"] = f"{type(e).__name__}: {str(e)[:100]}"
+        raise
+    finally:
+        _current_event.reset(token)
+        event["wall_ms"] = (time.perf_counter() - start) * 1000
+        record(kind, operation, **event)
+
+
+def annotate(**fields: Any) -> None:
+    """Add fields to the innermost open span, if any"""
+    event = _current_event.get()
+    if event is not None:
+        event.update(fields)
+
+
+def usage_fields(usage: Any) -> Dict[str, Any]:
+    """Token counts from an OpenAI-style ``response.usage`` (empty when the server sent none)"""
+    if usage is None:
+        return {}
+    return {name: getattr(usage, name, None) for name in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+def load_events(path: Union[str, Path] = DEFAULT_LOG_PATH) -> List[Dict[str, Any]]:
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+    return events
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (``q`` in 0-100) of already sorted values"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Latency percentiles, error and cache-hit rates and token totals per (kind, operation)"""
+    groups: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for event in events:
+        groups[(event.get("kind"), event.get("operation"))].append(event)
+    rows = []
+    for (kind, operation), group in sorted(groups.items(), key=lambda item: str(item[0])):
+        latencies = sorted(event["wall_ms"] for event in group if event.get("wall_ms") is not None)
+        with_cache = [event["cache_hit"] for event in group if event.get("cache_hit") is not None]
+        rows.append({
+            "kind": kind,
+            "operation": operation,
+            "calls": len(group),
+            "errors": sum(1 for event in group if event.get("error")),
+            "cache_hit_rate": sum(with_cache) / len(with_cache) if with_cache else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "total_tokens": sum(event.get("total_tokens") or 0 for event in group),
+        })
+    return rows
+
+
+def top_prompts(events: List[Dict[str, Any]], n: int = 5) -> List[Dict[str, Any]]:
+    """Prompts that consumed the most tokens in total (cache hits cost nothing)"""
+    prompts: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        key = event.get("prompt_key")
+        if key is None:
+            continue
+        entry = prompts.setdefault(key, {"prompt": event.get("prompt", ""), "operation": event.get("operation"),
+                                         "calls": 0, "total_tokens": 0, "wall_ms": 0.0})
+        entry["calls"] += 1
+        entry["total_tokens"] += event.get("total_tokens") or 0
+        entry["wall_ms"] += event.get("wall_ms") or 0.0
+    return sorted(prompts.values(), key=lambda entry: entry["total_tokens"], reverse=True)[:n]
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:,.1f}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Latency and token cost report from the telemetry log")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH or "logs/requests.jsonl",
+                        help="Telemetry JSON-lines log")
+    parser.add_argument("--top", type=int, default=5, help="How many top-cost prompts to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not Path(args.log).exists():
+        parser.error(f"No telemetry log at {args.log}")
+    events = load_events(args.log)
+    rows, prompts = summarize(events), top_prompts(events, args.top)
+    if args.json:
+        print(json.dumps({"events": len(events), "operations": rows, "top_prompts": prompts}, indent=2))
+        return
+
+    print(f"📊 {len(events):,} events in {args.log}\n")
+    print(f"{'operation':<34} {'calls':>7} {'errors':>6} {'hit %':>6} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'tokens':>9}")
+    for row in rows:
+        hit = "-" if row["cache_hit_rate"] is None else f"{row['cache_hit_rate'] * 100:.0f}"
+        print(f"{row['kind'] + ':' + str(row['operation']):<34} {row['calls']:>7,} {row['errors']:>6,} {hit:>6} "
+              f"{_ms(row['p50_ms']):>9} {_ms(row['p95_ms']):>9} {_ms(row['p99_ms']):>9} {row['total_tokens']:>9,}")
+    if prompts:
+        print("\n💸 Top-cost prompts")
+        for entry in prompts:
+            preview = " ".join(entry["prompt"].split())[:70]
+            print(f"→ {entry['total_tokens']:>7,} tokens over {entry['calls']:,} calls "
+                  f"[{entry['operation']}] {preview}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Keep test traffic out of the app's request log
+os.environ.setdefault("EV_TELEMETRY_LOG", "")
+
+
+@pytest.fixture(scope="session")
+def range_model():
+    """The training pipeline fitted on a small synthetic fleet where BEV is the most frequent type"""
+    from ev_model import FEATURES, TARGET
+    from train import build_pipeline
+
+    rng = np.random.default_rng(0)
+    n = 400
+    data = pd.DataFrame({
+        "Model Year": rng.integers(2012, 2025, n),
+        "Base MSRP": rng.choice([0.0, 40_000.0, 60_000.0], n),
+        "Make": rng.choice(["Tesla", "Nissan", "Kia"], n),
+        "Model": rng.choice(["MODEL 3", "LEAF", "NIRO"], n),
+        "Electric Vehicle Type": rng.choice(["BEV", "PHEV"], n, p=[0.75, 0.25]),
+        "State": rng.choice(["WA", "CA"], n),
+    })
+    data[TARGET] = np.where(data["Electric Vehicle Type"] == "BEV", 250.0, 30.0) + (data["Model Year"] - 2012)
+    pipeline = build_pipeline()
+    pipeline.set_params(model__n_estimators=10)
+    return pipeline.fit(data[FEATURES], data[TARGET])
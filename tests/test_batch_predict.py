@@ -0,0 +1,43 @@
+"""
+Batch prediction tests: file formats and input spellings must not change the predictions
+"""
+
+import numpy as np
+import pandas as pd
+
+from batch_predict import PREDICTION_COLUMN, predict_file
+
+VEHICLES = pd.DataFrame({
+    "Model Year": [2022, 2022, 2020],
+    "Base MSRP": [0.0, None, 40_000.0],
+    "Make": ["TESLA ", "Tesla", "nissan"],
+    "Model": ["MODEL 3", "MODEL 3", "LEAF"],
+    "Electric Vehicle Type": ["BEV", None, "PHEV"],
+    "State": ["wa", "WA", None],
+})
+
+
+def _predict(range_model, tmp_path, suffix):
+    source = tmp_path / f"fleet{suffix}"
+    if suffix == ".parquet":
+        VEHICLES.to_parquet(source, index=False)
+    else:
+        VEHICLES.to_csv(source, index=False)
+    destination = tmp_path / f"out{suffix}"
+    predict_file(source, destination, model=range_model)
+    output = pd.read_parquet(destination) if suffix == ".parquet" else pd.read_csv(destination)
+    return output[PREDICTION_COLUMN].to_numpy()
+
+
+def test_csv_and_parquet_inputs_predict_the_same(range_model, tmp_path):
+    np.testing.assert_array_equal(_predict(range_model, tmp_path, ".csv"),
+                                  _predict(range_model, tmp_path, ".parquet"))
+
+
+def test_missing_type_is_imputed_and_spelling_is_normalized(range_model, tmp_path):
+    predictions = _predict(range_model, tmp_path, ".parquet")
+    clean = VEHICLES.iloc[[0]].assign(Make="Tesla", State="WA")
+    # Row 1 only differs by missing MSRP (imputed to the median, 40k) and type (imputed to BEV)
+    expected = range_model.predict(clean.assign(**{"Base MSRP": 40_000.0}))[0]
+    assert predictions[0] == range_model.predict(clean)[0]
+    assert predictions[1] == expected
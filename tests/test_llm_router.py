@@ -0,0 +1,186 @@
+"""
+Router tests: real calls through EVAIAssistant to local mock servers, checking
+which backend and model each request actually reached
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from AIapi import AsyncEVAIAssistant, EVAIAssistant, _maintenance_prompt, vehicle_age
+from llm_cache import LLMCache
+from llm_calls import CallLayer
+from llm_router import Backend, CircuitBreaker, LLMRouter, NoBackendAvailable
+from mock_llm_server import MockConfig, MockLLMServer
+
+
+def _server(latency_ms=1, retry_after=0, **config):
+    return MockLLMServer(MockConfig(latency_ms=latency_ms, latency_dist="fixed", tokens_per_second=1e6,
+                                    completion_tokens=5, retry_after=retry_after, seed=1, **config)).start()
+
+
+def _backend(name, server, failure_threshold=2, reset_timeout=0.5, **kwargs):
+    return Backend(name, server.base_url, f"{name}-large", api_key="mock",
+                   breaker=CircuitBreaker(failure_threshold, reset_timeout), **kwargs)
+
+
+def _assistant(router, cache=None):
+    return EVAIAssistant(router=router, cache=cache, use_cache=cache is not None,
+                         call_layer=CallLayer(requests_per_minute=1e6, tokens_per_minute=1e9, max_attempts=1))
+
+
+@pytest.fixture
+def servers():
+    started = {}
+
+    def start(name, **config):
+        started[name] = _server(**config)
+        return started[name]
+
+    yield start
+    for server in started.values():
+        server.stop()
+
+
+def test_traffic_settles_on_fastest_and_failing_backend_is_ejected(servers):
+    fast = _backend("fast", servers("fast", latency_ms=5))
+    # Far enough apart that the process's first (cold) call to the fast one still measures faster
+    slow = _backend("slow", servers("slow", latency_ms=400))
+    broken = _backend("broken", servers("broken", error_rate=1.0))
+    assistant = _assistant(LLMRouter([fast, slow, broken]))
+
+    for i in range(20):
+        assert not assistant.answer_ev_question(f"Question {i}?").startswith("Unable")
+
+    assert slow.calls >= 1, "the slow backend was never probed"
+    assert broken.breaker.state == "open"
+    assert fast.calls > slow.calls
+    assert fast.ewma_s < slow.ewma_s
+
+
+def test_per_method_model_is_sent_for_plain_streaming_and_precompute_calls(servers):
+    server = servers("main")
+    backend = _backend("main", server, models={"get_maintenance_tips": "main-small"})
+    router = LLMRouter([backend])
+    assistant = _assistant(router)
+
+    assistant.answer_ev_question("Which model answers this?")
+    assert server.received[-1]["model"] == "main-large"
+
+    assistant.get_maintenance_tips("BEV", 3)
+    assert server.received[-1]["model"] == "main-small"
+
+    "".join(assistant.stream_maintenance_tips("BEV", 3))
+    assert server.received[-1]["model"] == "main-small"
+    assert server.received[-1]["stream"] is True
+
+    async_assistant = AsyncEVAIAssistant(router=router, use_cache=False, call_layer=assistant.calls)
+    vehicle = {"Make": "Tesla", "Model": "MODEL 3", "Model Year": 2022, "Electric Vehicle Type": "BEV",
+               "Base MSRP": 0, "State": "WA"}
+    asyncio.run(async_assistant.precompute_insights(vehicle, 260.0, 30.0))
+    tips_requests = [request for request in server.received
+                     if request["messages"][0]["content"] == _maintenance_prompt("BEV", vehicle_age(vehicle))]
+    assert tips_requests and all(request["model"] == "main-small" for request in tips_requests)
+
+
+def test_replies_are_cached_under_the_model_that_answered(servers, tmp_path):
+    backend = _backend("main", servers("main"), models={"get_maintenance_tips": "main-small"})
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    assistant = _assistant(LLMRouter([backend]), cache)
+
+    reply = assistant.get_maintenance_tips("BEV", 3)
+    assert cache.get(LLMCache.make_key("main-small", _maintenance_prompt("BEV", 3), 200, None)) == reply
+    assert cache.get(LLMCache.make_key("main-large", _maintenance_prompt("BEV", 3), 200, None)) is None
+
+
+def test_rate_limiting_does_not_eject_a_backend(servers):
+    server = servers("main", rate_limit_rate=1.0)
+    backend = _backend("main", server)
+    assistant = _assistant(LLMRouter([backend]))
+
+    for _ in range(5):
+        assert assistant.answer_ev_question("Busy?").startswith("Unable")
+    assert backend.breaker.state == "closed"
+    assert backend.throttled == 5 and backend.errors == 0
+
+    server.config.rate_limit_rate = 0.0
+    assert not assistant.answer_ev_question("Free again?").startswith("Unable")
+
+
+def test_rate_limited_backend_cools_down_behind_a_healthy_one(servers):
+    throttled_server = servers("throttled", rate_limit_rate=1.0, retry_after=5)
+    throttled = _backend("throttled", throttled_server)
+    ok = _backend("ok", servers("ok", latency_ms=5))
+    router = LLMRouter([throttled, ok])
+    assistant = _assistant(router)
+
+    for i in range(10):
+        assert not assistant.answer_ev_question(f"Question {i}?").startswith("Unable")
+    assert len(throttled_server.received) == 1, "only the first call tried the rate-limited backend"
+    assert ok.calls == 10
+    assert [backend.name for backend in router.candidates()] == ["ok", "throttled"]
+
+    # Once the cooldown is over it gets a single probe, and cools down again
+    throttled.throttled_until = 0.0
+    for i in range(3):
+        assert not assistant.answer_ev_question(f"Again {i}?").startswith("Unable")
+    assert len(throttled_server.received) == 2
+    assert throttled.throttled == 2 and throttled.breaker.state == "closed"
+
+
+def test_unmeasured_backend_gets_one_probe_at_a_time(servers):
+    measured = _backend("measured", servers("measured"))
+    fresh = _backend("fresh", servers("fresh"))
+    router = LLMRouter([measured, fresh])
+    measured.record_success(0.01)
+
+    assert router.candidates()[0] is fresh, "an unmeasured backend is probed"
+    assert router.candidates()[0] is measured, "other calls keep going to the measured one meanwhile"
+    fresh.record_success(0.005)
+    assert router.candidates()[0] is fresh
+
+
+def test_last_healthy_backend_is_never_ejected(servers):
+    server = servers("main", error_rate=1.0)
+    backend = _backend("main", server)
+    assistant = _assistant(LLMRouter([backend]))
+
+    for _ in range(5):
+        assert assistant.answer_ev_question("Failing?").startswith("Unable")
+    assert backend.errors == 5
+    assert backend.breaker.state == "closed"
+
+    server.config.error_rate = 0.0
+    assert not assistant.answer_ev_question("Recovered?").startswith("Unable")
+
+
+def test_recovered_backend_is_readmitted_after_its_trial_call(servers):
+    fast = _backend("fast", servers("fast", latency_ms=5))
+    broken_server = servers("broken", error_rate=1.0)
+    broken = _backend("broken", broken_server)
+    router = LLMRouter([fast, broken])
+    assistant = _assistant(router)
+
+    for i in range(6):
+        assistant.answer_ev_question(f"Question {i}?")
+    assert broken.breaker.state == "open"
+
+    broken_server.config.error_rate = 0.0
+    time.sleep(broken.breaker.reset_timeout)
+    fast.last_success = time.monotonic()
+    assert router.candidates()[0] is broken, "a recovering backend is probed first"
+    # Give back the trial and the probe claimed by candidates()
+    broken.breaker.release()
+    broken.probe_started = None
+    assert not assistant.answer_ev_question("Recovered?").startswith("Unable")
+    assert broken.breaker.state == "closed"
+    assert broken_server.received[-1]["model"] == "broken-large"
+
+
+def test_no_backend_available_when_every_breaker_is_open(servers):
+    backends = [_backend(name, servers(name)) for name in ("a", "b")]
+    for backend in backends:
+        backend.breaker.opened_at = time.monotonic()
+    with pytest.raises(NoBackendAvailable):
+        LLMRouter(backends).candidates()
@@ -0,0 +1,55 @@
+"""
+Prediction server tests: micro-batched requests must predict like the pipeline on clean input
+"""
+
+import asyncio
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import prediction_server
+from prediction_server import MicroBatcher
+
+TESLA = {"Model Year": 2022, "Base MSRP": 40_000.0, "Make": "Tesla", "Model": "MODEL 3",
+         "Electric Vehicle Type": "BEV", "State": "WA"}
+
+
+def _client(range_model, monkeypatch):
+    monkeypatch.setattr(prediction_server, "load_model", lambda path: range_model)
+    return TestClient(prediction_server.app)
+
+
+def test_missing_fields_are_imputed_not_unknown(range_model, monkeypatch):
+    request = {key: value for key, value in TESLA.items() if key not in ("Base MSRP", "Electric Vehicle Type")}
+    with _client(range_model, monkeypatch) as client:
+        predicted = client.post("/predict", json=request).json()["predicted_range"]
+        spelled = client.post("/predict", json=dict(TESLA, Make="TESLA ", State="wa")).json()["predicted_range"]
+    # MSRP imputes to the training median (40k) and the type to the most frequent one (BEV)
+    assert predicted == range_model.predict(pd.DataFrame([TESLA]))[0]
+    assert spelled == predicted
+
+
+def test_a_batch_that_fails_to_normalize_fails_alone_and_the_worker_keeps_serving(range_model, monkeypatch):
+    normalize_frame = prediction_server.normalize_frame
+
+    def fragile_normalize(frame):
+        if (frame["Make"] == "Broken").any():
+            raise TypeError("cannot normalize")
+        return normalize_frame(frame)
+
+    monkeypatch.setattr(prediction_server, "normalize_frame", fragile_normalize)
+
+    async def scenario():
+        batcher = MicroBatcher(range_model, max_wait_ms=1)
+        batcher.start()
+        try:
+            bad = await asyncio.gather(asyncio.wait_for(batcher.predict(dict(TESLA, Make="Broken")), timeout=5),
+                                       return_exceptions=True)
+            good = await asyncio.wait_for(batcher.predict(TESLA), timeout=5)
+        finally:
+            await batcher.stop()
+        return bad[0], good
+
+    bad, good = asyncio.run(scenario())
+    assert isinstance(bad, TypeError)
+    assert good == range_model.predict(pd.DataFrame([TESLA]))[0]
@@ -0,0 +1,230 @@
+"""
+Training Module for EV Range Predictor
+Reproducible training command: the notebook's preprocessing and random
+forest, searched in parallel with cached preprocessing and optional
+successive halving, saved atomically with its metrics
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from joblib.externals.loky import get_reusable_executor
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from data_pipeline import CLEANED_DATA_PATH, iter_cleaned, load_cleaned
+from ev_model import (CATEGORICAL_FEATURES, FEATURES, MANIFEST_PATH, METRICS_PATH, MODEL_PATH, NUMERIC_FEATURES,
+                      TARGET, atomic_path, save_metrics, save_uncompressed)
+from vocabulary import save_vocabulary
+
+DEFAULT_PARAM_GRID = {
+    "model__n_estimators": [200, 400],
+    "model__max_depth": [None, 15, 25],
+}
+DEFAULT_CACHE_DIR = Path(".cache/sklearn")
+RANDOM_STATE = 42
+
+
+def build_pipeline(memory: Optional[Union[str, Memory]] = None, random_state: int = RANDOM_STATE) -> Pipeline:
+    """The notebook's preprocessing + RandomForestRegressor pipeline
+
+    With ``memory`` set, the fitted ColumnTransformer is cached on disk per
+    training fold, so grid candidates that only change forest parameters
+    reuse the preprocessing instead of refitting it.
+    """
+    numeric_transform = Pipeline([
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler())
+    ])
+    categorical_transform = Pipeline([
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("onehot", OneHotEncoder(handle_unknown="ignore"))
+    ])
+    preprocess = ColumnTransformer([
+        ("num", numeric_transform, NUMERIC_FEATURES),
+        ("cat", categorical_transform, CATEGORICAL_FEATURES)
+    ])
+    return Pipeline([
+        ("preprocess", preprocess),
+        ("model", RandomForestRegressor(random_state=random_state))
+    ], memory=memory)
+
+
+def load_training_data(path: Union[str, Path] = CLEANED_DATA_PATH) -> Tuple[pd.DataFrame, pd.Series]:
+    """Features and target from the cleaned dataset (Parquet or the notebook's CSV)"""
+    df = load_cleaned(path, columns=FEATURES + [TARGET])
+    df = df.dropna(subset=[TARGET])  # ensure no target missing
+    # Parquet categoricals become plain strings so the encoder sees the same values as user input
+    X = df[FEATURES].astype({col: object for col in CATEGORICAL_FEATURES})
+    return X, df[TARGET]
+
+
+def split_training_data(path: Union[str, Path] = CLEANED_DATA_PATH):
+    """The notebook's 80/20 train/test split, shared by every tool that evaluates a model"""
+    X, y = load_training_data(path)
+    return train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE)
+
+
+def row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """64-bit hash per cleaned row, identical whether the row came from Parquet or CSV"""
+    normalized = pd.DataFrame({
+        col: series.astype("float64") if pd.api.types.is_numeric_dtype(series) else series.astype(object)
+        for col, series in frame.items()
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def dataset_hashes(path: Union[str, Path] = CLEANED_DATA_PATH) -> np.ndarray:
+    """Sorted unique row hashes of a cleaned dataset, read in batches"""
+    hashes = [row_hashes(batch) for batch in iter_cleaned(path)]
+    return np.unique(np.concatenate(hashes)) if hashes else np.empty(0, dtype=np.uint64)
+
+
+def manifest_path_for(model_path: Union[str, Path]) -> Path:
+    """ev_range_model.joblib -> ev_range_model.manifest.npy"""
+    return Path(model_path).with_suffix(".manifest.npy")
+
+
+def load_manifest(path: Union[str, Path] = MANIFEST_PATH) -> Optional[np.ndarray]:
+    """Row hashes the current model has been trained on, or None before the first snapshot"""
+    path = Path(path)
+    return np.load(path) if path.exists() else None
+
+
+def save_manifest(hashes: np.ndarray, path: Union[str, Path] = MANIFEST_PATH) -> None:
+    with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+        np.save(f, hashes)
+
+
+def evaluate(model, X_test: pd.DataFrame, y_test: pd.Series) -> Dict[str, float]:
+    y_pred = model.predict(X_test)
+    return {
+        "MAE": float(mean_absolute_error(y_test, y_pred)),
+        "RMSE": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "R2": float(r2_score(y_test, y_pred)),
+    }
+
+
+def peak_memory_mb() -> Dict[str, Optional[float]]:
+    """Peak resident memory of this process and of the largest search worker"""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return {"peak_rss_mb": None, "peak_worker_rss_mb": None}
+    # ru_maxrss is reported in kilobytes on Linux
+    return {
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_worker_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def make_search(pipeline: Pipeline, param_grid: Dict[str, List[Any]], search: str = "grid",
+                cv: int = 5, n_jobs: int = -1, random_state: int = RANDOM_STATE):
+    """GridSearchCV, or HalvingGridSearchCV which drops weak candidates on small samples first"""
+    if search == "grid":
+        return GridSearchCV(pipeline, param_grid, cv=cv, scoring="neg_mean_absolute_error", n_jobs=n_jobs)
+    if search == "halving":
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        return HalvingGridSearchCV(pipeline, param_grid, cv=cv, scoring="neg_mean_absolute_error",
+                                   factor=3, n_jobs=n_jobs, random_state=random_state)
+    raise ValueError(f"Unknown search strategy: {search}")
+
+
+def train(data_path: Union[str, Path] = CLEANED_DATA_PATH, model_path: Union[str, Path] = MODEL_PATH,
+          metrics_path: Union[str, Path] = METRICS_PATH, search: str = "grid", n_jobs: int = -1,
+          cv: int = 5, param_grid: Optional[Dict[str, List[Any]]] = None,
+          cache_dir: Optional[Union[str, Path]] = DEFAULT_CACHE_DIR,
+          manifest_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """Search, evaluate on a held-out split and atomically save the model and metrics
+
+    The row-hash manifest of the training data is written next to the
+    model so ``refresh.py`` can later find the rows the model has not seen,
+    along with the input vocabulary the app validates user input against.
+
+    CV folds run in joblib's process pool (``n_jobs`` workers); the forest
+    itself stays single-threaded so workers do not oversubscribe the CPUs.
+    """
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = split_training_data(data_path)
+
+    memory = Memory(str(cache_dir), verbose=0) if cache_dir else None
+    searcher = make_search(build_pipeline(memory), param_grid or DEFAULT_PARAM_GRID, search, cv, n_jobs)
+    search_start = time.perf_counter()
+    searcher.fit(X_train, y_train)
+    search_s = time.perf_counter() - search_start
+    # Reap the worker pool so their peak memory shows up in RUSAGE_CHILDREN
+    get_reusable_executor().shutdown(wait=True)
+
+    # The cache location is a training detail; the saved model should not depend on it
+    best_model = searcher.best_estimator_.set_params(memory=None)
+    metrics = evaluate(best_model, X_test, y_test)
+    metrics["training"] = {
+        "search": search,
+        "best_params": dict(searcher.best_params_),
+        "cv": cv,
+        "n_jobs": n_jobs,
+        "candidates": len(searcher.cv_results_["params"]),
+        "n_train": len(X_train),
+        "n_test": len(X_test),
+        "search_s": search_s,
+        "wall_clock_s": time.perf_counter() - start,
+        **peak_memory_mb(),
+        "trained_at": time.time(),
+    }
+
+    save_uncompressed(best_model, model_path)
+    save_metrics(metrics, metrics_path)
+    save_manifest(dataset_hashes(data_path), manifest_path or manifest_path_for(model_path))
+    save_vocabulary(best_model, model_path, data_path)
+    return metrics
+
+
+def _parse_grid_values(text: str) -> List[Optional[int]]:
+    return [None if value.strip().lower() == "none" else int(value) for value in text.split(",")]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Train the EV range model")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset (Parquet or CSV)")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Where to write the trained model")
+    parser.add_argument("--metrics", default=str(METRICS_PATH), help="Where to write the metrics")
+    parser.add_argument("--search", choices=["grid", "halving"], default="grid",
+                        help="Exhaustive grid search or successive halving")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel CV worker processes (-1 = all CPUs)")
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--n-estimators", default="200,400", help="Comma separated n_estimators values")
+    parser.add_argument("--max-depth", default="none,15,25", help="Comma separated max_depth values")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                        help="Preprocessing cache directory (empty string disables caching)")
+    args = parser.parse_args(argv)
+
+    param_grid = {
+        "model__n_estimators": _parse_grid_values(args.n_estimators),
+        "model__max_depth": _parse_grid_values(args.max_depth),
+    }
+    print(f"🚀 Training with {args.search} search over {param_grid} ({args.jobs} workers)")
+    metrics = train(args.data, args.model, args.metrics, args.search, args.jobs, args.cv, param_grid,
+                    args.cache_dir or None)
+    stats = metrics["training"]
+    print(f"✅ MAE {metrics['MAE']:.3f}  RMSE {metrics['RMSE']:.3f}  R2 {metrics['R2']:.4f}")
+    print(f"   best params: {stats['best_params']}")
+    print(f"   {stats['wall_clock_s']:.1f}s wall clock, search {stats['search_s']:.1f}s, "
+          f"peak RSS {stats['peak_rss_mb'] or 0:.0f} MB (workers {stats['peak_worker_rss_mb'] or 0:.0f} MB)")
+    print(f"→ Model: {args.model}")
+    print(f"→ Metrics: {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
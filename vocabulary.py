@@ -0,0 +1,210 @@
+"""
+Vocabulary Module for EV Range Predictor
+Valid Make / Model / Model Year / State values the trained model knows,
+with prefix and fuzzy lookups for validated autocomplete inputs
+"""
+
+import argparse
+import difflib
+import json
+import re
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from data_pipeline import CLEANED_DATA_PATH, load_cleaned
+from ev_model import CATEGORICAL_FEATURES, MODEL_PATH, VOCABULARY_PATH, atomic_path, load_model
+
+VALIDATED_FIELDS = ["Make", "Model", "Electric Vehicle Type", "State"]
+
+
+def normalize_key(value: Any) -> str:
+    """Lookup key: case, spaces and punctuation ignored, so "tesla " and "Model3" still match"""
+    return re.sub(r"[\W_]+", "", str(value).casefold())
+
+
+def _keys(value: str) -> List[str]:
+    """Lookup keys for a label; "Battery Electric Vehicle (BEV)" also answers to "BEV" """
+    keys = [normalize_key(value)]
+    match = re.search(r"\(([^)]+)\)\s*$", value)
+    if match:
+        keys.append(normalize_key(match.group(1)))
+    return keys
+
+
+def _sorted_index(values: List[str]) -> Tuple[List[str], List[str]]:
+    """Parallel sorted (key, label) lists for bisect prefix search"""
+    pairs = sorted((key, value) for value in values for key in _keys(value))
+    return [key for key, _ in pairs], [value for _, value in pairs]
+
+
+def encoder_categories(model) -> Dict[str, List[str]]:
+    """Categories the fitted pipeline's encoder knows, per categorical column"""
+    categories = {}
+    for name, transformer, columns in model.named_steps["preprocess"].transformers_:
+        if name == "remainder":
+            continue
+        steps = dict(transformer.steps)
+        encoder = steps.get("onehot", steps.get("ordinal"))
+        if encoder is not None:
+            for column, values in zip(columns, encoder.categories_):
+                categories[column] = sorted(str(value) for value in values)
+    return categories
+
+
+class Vocabulary:
+    """Valid input values with sorted-key prefix completion and fuzzy suggestions
+
+    Values are the categories the model was trained on, so anything outside
+    the vocabulary would be silently ignored by ``handle_unknown="ignore"``.
+    Make -> Model -> Model Years comes from the cleaned dataset, restricted
+    to makes and models the encoder knows.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], models: Dict[str, Dict[str, List[int]]]):
+        self.categories = categories
+        self.models = models
+        self._index = {field: _sorted_index(values) for field, values in categories.items()}
+        self._model_index = {make: _sorted_index(list(by_model)) for make, by_model in models.items()}
+        self._lookup = {field: dict(zip(*index)) for field, index in self._index.items()}
+
+    @classmethod
+    def build(cls, model, data_path: Optional[Union[str, Path]] = CLEANED_DATA_PATH) -> "Vocabulary":
+        categories = encoder_categories(model)
+        models: Dict[str, Dict[str, List[int]]] = {}
+        if data_path is not None and Path(data_path).exists():
+            data = load_cleaned(data_path, columns=["Make", "Model", "Model Year"]).dropna()
+            data = data.astype({"Make": str, "Model": str})
+            known_makes = set(categories.get("Make", []))
+            known_models = set(categories.get("Model", []))
+            data = data[data["Make"].isin(known_makes) & data["Model"].isin(known_models)]
+            years = data.groupby(["Make", "Model"], observed=True)["Model Year"].unique()
+            for (make, model_name), values in years.items():
+                models.setdefault(make, {})[model_name] = sorted(int(year) for year in values)
+        return cls(categories, models)
+
+    def _candidates(self, field: str, make: Optional[str]) -> Tuple[List[str], List[str]]:
+        if field == "Model" and make is not None:
+            make = self.resolve("Make", make)
+            if make in self._model_index:
+                return self._model_index[make]
+        return self._index.get(field, ([], []))
+
+    def values(self, field: str, make: Optional[str] = None) -> List[str]:
+        """All labels for ``field``; Models are limited to ``make`` when it is known"""
+        if field == "Model" and self.resolve("Make", make) in self.models:
+            return sorted(self.models[self.resolve("Make", make)])
+        return list(self.categories.get(field, []))
+
+    def complete(self, field: str, prefix: str = "", make: Optional[str] = None, limit: int = 10) -> List[str]:
+        """Labels whose normalized form starts with ``prefix``; Models are limited to ``make`` when given"""
+        keys, labels = self._candidates(field, make)
+        prefix = normalize_key(prefix)
+        matches: List[str] = []
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix) or len(matches) >= limit:
+                break
+            if labels[i] not in matches:
+                matches.append(labels[i])
+        return matches
+
+    def resolve(self, field: str, value: Any) -> Optional[str]:
+        """The trained label ``value`` refers to, ignoring case, spacing and punctuation"""
+        if value is None:
+            return None
+        return self._lookup.get(field, {}).get(normalize_key(value))
+
+    def suggest(self, field: str, value: Any, make: Optional[str] = None, n: int = 3) -> List[str]:
+        """Closest labels by edit similarity, for "did you mean" hints"""
+        keys, labels = self._candidates(field, make)
+        label_for = dict(zip(keys, labels))
+        matches = difflib.get_close_matches(normalize_key(value), keys, n=n * 2, cutoff=0.6)
+        return list(dict.fromkeys(label_for[key] for key in matches))[:n]
+
+    def model_years(self, make: str, model_name: str) -> List[int]:
+        return self.models.get(self.resolve("Make", make), {}).get(self.resolve("Model", model_name), [])
+
+    def canonicalize(self, vehicle: Dict[str, Any]) -> Dict[str, Any]:
+        """``vehicle`` with every recognisable categorical replaced by its trained label"""
+        vehicle = dict(vehicle)
+        for field in VALIDATED_FIELDS:
+            label = self.resolve(field, vehicle.get(field))
+            if label is not None:
+                vehicle[field] = label
+        return vehicle
+
+    def check(self, vehicle: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Inputs the model will not recognise, each with up to three suggestions"""
+        issues = []
+        make = self.resolve("Make", vehicle.get("Make"))
+        for field in VALIDATED_FIELDS:
+            value = vehicle.get(field)
+            if not value or field not in self.categories or self.resolve(field, value) is not None:
+                continue
+            issues.append({"field": field, "value": value,
+                           "suggestions": self.suggest(field, value, make if field == "Model" else None)})
+        years = self.model_years(vehicle.get("Make", ""), vehicle.get("Model", ""))
+        if years and vehicle.get("Model Year") is not None and int(vehicle["Model Year"]) not in years:
+            issues.append({"field": "Model Year", "value": vehicle["Model Year"], "suggestions": years[-3:]})
+        return issues
+
+    def save(self, path: Union[str, Path] = VOCABULARY_PATH) -> None:
+        with atomic_path(path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump({"categories": self.categories, "models": self.models}, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = VOCABULARY_PATH) -> "Vocabulary":
+        with open(path) as f:
+            state = json.load(f)
+        return cls(state["categories"], state["models"])
+
+
+def vocabulary_path_for(model_path: Union[str, Path]) -> Path:
+    """The vocabulary lives next to its model: ev_range_model.joblib -> ev_range_model.vocab.json"""
+    return Path(model_path).with_suffix(".vocab.json")
+
+
+def save_vocabulary(model, model_path: Union[str, Path] = MODEL_PATH,
+                    data_path: Optional[Union[str, Path]] = CLEANED_DATA_PATH) -> Vocabulary:
+    """Build the vocabulary for a freshly trained model and write it next to the model"""
+    vocabulary = Vocabulary.build(model, data_path)
+    vocabulary.save(vocabulary_path_for(model_path))
+    return vocabulary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build or query the input vocabulary of a trained model")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset (Parquet or CSV)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if the vocabulary exists")
+    parser.add_argument("--field", default="Make", choices=CATEGORICAL_FEATURES, help="Field to look up")
+    parser.add_argument("--make", help="Restrict Model lookups to this make")
+    parser.add_argument("--lookup", help="Prefix to complete and value to check")
+    args = parser.parse_args(argv)
+
+    path = vocabulary_path_for(args.model)
+    start = time.perf_counter()
+    if args.rebuild or not path.exists():
+        vocabulary = save_vocabulary(load_model(args.model), args.model, args.data)
+        print(f"✅ Vocabulary built in {time.perf_counter() - start:.2f}s → {path}")
+    else:
+        vocabulary = Vocabulary.load(path)
+        print(f"✅ Vocabulary loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    sizes = ", ".join(f"{len(values):,} {field}" for field, values in vocabulary.categories.items())
+    print(f"   {sizes}; {sum(len(m) for m in vocabulary.models.values()):,} make/model pairs")
+
+    if args.lookup is not None:
+        start = time.perf_counter()
+        completions = vocabulary.complete(args.field, args.lookup, args.make)
+        resolved = vocabulary.resolve(args.field, args.lookup)
+        suggestions = [] if resolved else vocabulary.suggest(args.field, args.lookup, args.make)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"→ Completions: {', '.join(completions) or '-'}")
+        print(f"→ Resolves to: {resolved or '-'}" + (f"  (did you mean {', '.join(suggestions)}?)"
+                                                     if suggestions else ""))
+        print(f"   lookup took {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Warm-up Module for EV Range Predictor
+Precomputes predictions and AI insights for the app's presets and the most
+registered vehicles, so popular requests are served without a model or LLM call
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from AIapi import AsyncEVAIAssistant, run_async
+from data_pipeline import CLEANED_DATA_PATH, load_cleaned
+from ev_model import FEATURES, atomic_path, MODEL_PATH, WARMUP_PATH, load_model, normalize_vehicle
+from prediction_cache import PredictionCache, file_hash
+from presets import DEFAULT_DAILY_COMMUTE, PRESETS
+from vocabulary import Vocabulary, vocabulary_path_for
+
+DEFAULT_TOP_N = 20
+DEFAULT_CONCURRENCY = 4
+
+
+def popular_vehicles(data_path: Union[str, Path] = CLEANED_DATA_PATH,
+                     n: int = DEFAULT_TOP_N) -> List[Dict[str, Any]]:
+    """The ``n`` most registered Make/Model pairs, each as its most common configuration
+
+    Model Year, vehicle type and State are the pair's most frequent values and
+    Base MSRP its median, i.e. the vehicle most visitors will actually enter.
+    """
+    data = load_cleaned(data_path, columns=FEATURES).dropna(subset=["Make", "Model"])
+    data = data.astype({"Make": str, "Model": str, "Electric Vehicle Type": str, "State": str})
+    vehicles = []
+    for (make, model_name), group in data.groupby(["Make", "Model"], sort=False):
+        vehicles.append((len(group), {
+            "Model Year": int(group["Model Year"].mode()[0]),
+            "Base MSRP": float(group["Base MSRP"].median()),
+            "Make": make,
+            "Model": model_name,
+            "Electric Vehicle Type": group["Electric Vehicle Type"].mode()[0],
+            "State": group["State"].mode()[0],
+        }))
+    vehicles.sort(key=lambda item: item[0], reverse=True)
+    return [vehicle for _, vehicle in vehicles[:n]]
+
+
+class WarmStore:
+    """Precomputed answers keyed like the prediction cache
+
+    Entries are only served for the model file they were computed with
+    (``model_hash``); the ownership guide also needs the same daily commute,
+    since the charging strategy depends on it.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], model_hash: str, daily_commute: float,
+                 generated_at: Optional[float] = None):
+        self.entries = entries
+        self.model_hash = model_hash
+        self.daily_commute = daily_commute
+        self.generated_at = generated_at or time.time()
+        self._index = {PredictionCache.make_key(entry["vehicle"]): entry for entry in entries}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, vehicle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return self._index.get(PredictionCache.make_key(vehicle))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def valid_for(self, model_hash: str) -> bool:
+        return model_hash == self.model_hash
+
+    def save(self, path: Union[str, Path] = WARMUP_PATH) -> None:
+        with atomic_path(path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump({"model_hash": self.model_hash, "daily_commute": self.daily_commute,
+                       "generated_at": self.generated_at, "entries": self.entries}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = WARMUP_PATH) -> "WarmStore":
+        with open(path) as f:
+            state = json.load(f)
+        return cls(state["entries"], state["model_hash"], state["daily_commute"], state["generated_at"])
+
+
+def warmup_path_for(model_path: Union[str, Path]) -> Path:
+    """The warm store lives next to its model: ev_range_model.joblib -> ev_range_model.warmup.json"""
+    return Path(model_path).with_suffix(".warmup.json")
+
+
+def collect_vehicles(data_path: Optional[Union[str, Path]], top_n: int,
+                     vocabulary: Optional[Vocabulary] = None) -> List[Dict[str, Any]]:
+    """Presets first, then the most popular vehicles, deduplicated on the prediction key
+
+    With a vocabulary, spellings are mapped onto the trained labels exactly
+    like the app does before predicting, so the keys match app requests.
+    """
+    candidates = list(PRESETS.values())
+    if data_path is not None and Path(data_path).exists() and top_n > 0:
+        candidates += popular_vehicles(data_path, top_n)
+    vehicles: Dict[Tuple, Dict[str, Any]] = {}
+    for vehicle in candidates:
+        if vocabulary is not None:
+            vehicle = vocabulary.canonicalize(vehicle)
+        vehicle = normalize_vehicle(vehicle)
+        vehicles.setdefault(PredictionCache.make_key(vehicle), vehicle)
+    return list(vehicles.values())
+
+
+async def _precompute_all(assistant: AsyncEVAIAssistant, entries: List[Dict[str, Any]],
+                          daily_commute: float, concurrency: int) -> int:
+    """Fill each entry's insights; the call layer's rate limiter paces the requests"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(entry: Dict[str, Any]) -> bool:
+        async with semaphore:
+            try:
+                entry["insights"] = await assistant.precompute_insights(
+                    entry["vehicle"], entry["predicted_range"], daily_commute)
+                return True
+            except Exception as e:
+                entry["insights_error"] = str(e)[:100]
+                return False
+
+    return sum(await asyncio.gather(*(one(entry) for entry in entries)))
+
+
+def run_warmup(model_path: Union[str, Path] = MODEL_PATH,
+               data_path: Optional[Union[str, Path]] = CLEANED_DATA_PATH,
+               output: Optional[Union[str, Path]] = None, top_n: int = DEFAULT_TOP_N,
+               daily_commute: float = DEFAULT_DAILY_COMMUTE, concurrency: int = DEFAULT_CONCURRENCY,
+               insights: bool = True) -> Dict[str, Any]:
+    """Batch-predict the warm set, precompute its insights and write the warm store"""
+    start = time.perf_counter()
+    vocabulary_path = vocabulary_path_for(model_path)
+    vocabulary = Vocabulary.load(vocabulary_path) if vocabulary_path.exists() else None
+    vehicles = collect_vehicles(data_path, top_n, vocabulary)
+
+    model = load_model(model_path)
+    predict_start = time.perf_counter()
+    predictions = model.predict(pd.DataFrame(vehicles, columns=FEATURES))
+    predict_s = time.perf_counter() - predict_start
+    entries = [{"vehicle": vehicle, "predicted_range": float(prediction)}
+               for vehicle, prediction in zip(vehicles, predictions)]
+
+    warmed = 0
+    llm_s = 0.0
+    if insights:
+        llm_start = time.perf_counter()
+        warmed = run_async(_precompute_all(AsyncEVAIAssistant(), entries, daily_commute, concurrency))
+        llm_s = time.perf_counter() - llm_start
+
+    output = Path(output) if output else warmup_path_for(model_path)
+    WarmStore(entries, file_hash(model_path), daily_commute).save(output)
+    return {"vehicles": len(entries), "insights": warmed, "predict_s": predict_s, "llm_s": llm_s,
+            "seconds": time.perf_counter() - start, "output": str(output)}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute predictions and AI insights for popular vehicles")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--data", default=str(CLEANED_DATA_PATH), help="Cleaned dataset for the top-N vehicles")
+    parser.add_argument("--output", help="Warm store (default: next to the model)")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="Most registered Make/Model pairs to add")
+    parser.add_argument("--commute", type=float, default=DEFAULT_DAILY_COMMUTE,
+                        help="Daily commute assumed by the charging strategy")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Vehicles warmed at once")
+    parser.add_argument("--no-insights", action="store_true", help="Only precompute predictions")
+    args = parser.parse_args(argv)
+
+    summary = run_warmup(args.model, args.data, args.output, args.top, args.commute, args.concurrency,
+                         insights=not args.no_insights)
+    print(f"✅ Warmed {summary['vehicles']} vehicles in {summary['seconds']:.1f}s "
+          f"(predict {summary['predict_s'] * 1000:.0f} ms, insights {summary['llm_s']:.1f}s)")
+    if not args.no_insights and summary["insights"] < summary["vehicles"]:
+        print(f"⚠️ Insights for {summary['vehicles'] - summary['insights']} vehicles failed; "
+              "the app calls the LLM live for those")
+    print(f"→ Warm store: {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
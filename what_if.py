@@ -0,0 +1,141 @@
+"""
+What-If Module for EV Range Predictor
+Sweeps a base vehicle over grids of Base MSRP, Model Year and State and
+predicts the whole Cartesian grid in vectorized chunks
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from batch_predict import PREDICTION_COLUMN
+from ev_model import FEATURES, MODEL_PATH, load_model, normalize_vehicle
+from telemetry import span
+from vocabulary import Vocabulary, vocabulary_path_for
+
+SWEEP_AXES = ("Base MSRP", "Model Year", "State")
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _axes(base: Dict[str, Any], msrp_values: Optional[Sequence[float]],
+          year_values: Optional[Sequence[int]], states: Optional[Sequence[str]]) -> Dict[str, np.ndarray]:
+    """Grid values per axis; an axis without a grid stays at the base vehicle's value"""
+    return {
+        "Base MSRP": np.asarray(msrp_values if msrp_values is not None else [base["Base MSRP"]], dtype=float),
+        "Model Year": np.asarray(year_values if year_values is not None else [base["Model Year"]], dtype=int),
+        "State": np.asarray([s.strip().upper() for s in states] if states is not None else [base["State"]],
+                            dtype=object),
+    }
+
+
+def iter_grid(base_vehicle: Dict[str, Any], msrp_values: Optional[Sequence[float]] = None,
+              year_values: Optional[Sequence[int]] = None, states: Optional[Sequence[str]] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the Cartesian grid as model-ready frames of at most ``chunk_size`` rows
+
+    Rows are generated from flat indices with ``np.unravel_index``, so even
+    a grid too large to hold at once is built one chunk at a time.
+    """
+    base = normalize_vehicle(base_vehicle)
+    axes = _axes(base, msrp_values, year_values, states)
+    shape = tuple(len(values) for values in axes.values())
+    total = int(np.prod(shape))
+
+    for start in range(0, total, chunk_size):
+        coords = np.unravel_index(np.arange(start, min(start + chunk_size, total)), shape)
+        chunk = pd.DataFrame({name: values[index] for (name, values), index in zip(axes.items(), coords)})
+        for column in FEATURES:
+            if column not in chunk:
+                chunk[column] = base[column]
+        yield chunk[FEATURES]
+
+
+def sweep(model, base_vehicle: Dict[str, Any], msrp_values: Optional[Sequence[float]] = None,
+          year_values: Optional[Sequence[int]] = None, states: Optional[Sequence[str]] = None,
+          chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """Predict the range over every MSRP x Model Year x State combination
+
+    Each chunk is one ``model.predict`` call; forests score large batches
+    far more cheaply per row than repeated single predictions.
+    """
+    frames = []
+    with span("predict", "what_if_sweep") as event:
+        for chunk in iter_grid(base_vehicle, msrp_values, year_values, states, chunk_size):
+            frames.append(chunk[list(SWEEP_AXES)].assign(**{PREDICTION_COLUMN: model.predict(chunk)}))
+        event.update(rows=sum(len(frame) for frame in frames), chunks=len(frames))
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_matrix(result: pd.DataFrame, index: str = "Model Year", columns: str = "Base MSRP",
+              state: Optional[str] = None) -> pd.DataFrame:
+    """Pivot a sweep into a 2-D table (one state) for heatmaps"""
+    if state is not None:
+        result = result[result["State"] == state]
+    return result.pivot_table(index=index, columns=columns, values=PREDICTION_COLUMN)
+
+
+def linspace_grid(start: float, stop: float, steps: int, integer: bool = False) -> np.ndarray:
+    """``steps`` evenly spaced values from ``start`` to ``stop`` inclusive"""
+    values = np.linspace(start, stop, max(int(steps), 1))
+    return np.unique(np.round(values).astype(int)) if integer else values
+
+
+def _parse_range(text: str, cast=float) -> np.ndarray:
+    """``start:stop:steps`` (inclusive) or a comma separated list"""
+    if ":" in text:
+        start, stop, steps = text.split(":")
+        return linspace_grid(float(start), float(stop), int(steps), integer=cast is int)
+    return np.asarray([cast(value) for value in text.split(",")])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep predicted range over MSRP, Model Year and State")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Path to the trained model")
+    parser.add_argument("--make", required=True)
+    parser.add_argument("--model-name", required=True, help="Vehicle model, e.g. 'MODEL 3'")
+    parser.add_argument("--type", default="BEV", help="Electric Vehicle Type (BEV or PHEV)")
+    parser.add_argument("--year", type=int, default=2023, help="Base Model Year")
+    parser.add_argument("--msrp", type=float, default=0.0, help="Base MSRP")
+    parser.add_argument("--state", default="WA", help="Base State")
+    parser.add_argument("--msrp-grid", help="start:stop:steps or comma list, e.g. 20000:100000:50")
+    parser.add_argument("--year-grid", help="start:stop:steps or comma list, e.g. 2015,2020,2024")
+    parser.add_argument("--states", help="Comma separated states, e.g. WA,CA,TX")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per predict call")
+    parser.add_argument("--output", help="Write the sweep to this CSV or Parquet file")
+    args = parser.parse_args(argv)
+
+    base = {"Model Year": args.year, "Base MSRP": args.msrp, "Make": args.make, "Model": args.model_name,
+            "Electric Vehicle Type": args.type, "State": args.state}
+    model = load_model(args.model)
+    vocabulary_path = vocabulary_path_for(args.model)
+    if vocabulary_path.exists():
+        # Spelling variants ("Model 3", "tesla") map onto the trained labels, as in the app
+        vocabulary = Vocabulary.load(vocabulary_path)
+        for issue in vocabulary.check(base):
+            if issue["field"] != "Model Year":
+                print(f"⚠️ {issue['field']} '{issue['value']}' is not in the training data "
+                      f"(suggestions: {', '.join(map(str, issue['suggestions'])) or 'none'})")
+        base = vocabulary.canonicalize(base)
+    start = time.perf_counter()
+    result = sweep(model, base,
+                   _parse_range(args.msrp_grid) if args.msrp_grid else None,
+                   _parse_range(args.year_grid, int) if args.year_grid else None,
+                   args.states.split(",") if args.states else None,
+                   args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Swept {len(result):,} scenarios in {elapsed * 1000:.0f} ms")
+    print(result[PREDICTION_COLUMN].describe().to_string())
+    if args.output:
+        if args.output.endswith(".parquet"):
+            result.to_parquet(args.output, index=False)
+        else:
+            result.to_csv(args.output, index=False)
+        print(f"→ Sweep: {args.output}")
+
+
+if __name__ == "__main__":
+    main()